@@ -0,0 +1,275 @@
+import asyncio
+import time
+from urllib.parse import parse_qs
+
+import jwt
+import orjson
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from werkzeug.http import http_date, is_resource_modified, quote_etag
+
+from App.database import set_sqlite_pragmas
+from App.models import ConfirmationRequest, RequestStatus, hours_to_minutes
+from App.schemas import dumps
+from App.queries import (
+    LEADERBOARD, LEADERBOARD_ACCOLADES, STUDENT_BY_USER_ID, PENDING_COUNT, DATA_VERSION,
+    leaderboard_rows, leaderboard_accolades_params
+)
+from App.controllers.AccoladeController import format_leaderboard
+from App.controllers.ServiceController import validate_hours, submitted_result, submit_hours_scope
+from App.controllers.IdempotencyController import (
+    IDEMPOTENCY_KEY_MAX_LENGTH, STORED_RESPONSE, valid_idempotency_key, load_response, stored_key
+)
+from App.controllers.InstitutionController import institution_key
+from App.controllers.RateLimitController import rate_limiter_from_config
+from App.controllers.EventController import load_broker
+from App.controllers.VersionController import version_etag
+
+# A small ASGI app serving the two hottest API routes on an async engine, so
+# one worker can keep many requests waiting on the database at once without
+# a greenlet or thread per request. It reuses the prebuilt statements and
+# the controllers' payload builders, idempotency keys, rate limits, events
+# and ETags, so it behaves like the Flask routes it stands in for.
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def async_database_uri(uri):
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for '{backend}' databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class AsyncAPI:
+    """ASGI app for GET /api/leaderboard and POST /api/service/hours.
+
+    Built from a Flask app's config, so it talks to the same database and
+    accepts the same access tokens (Authorization header or access_token
+    cookie). Anything else gets a 404 and should be routed to the Flask app.
+    Rate limits and pending-count events only reach the Flask workers through
+    a shared RATELIMIT_BACKEND and EVENT_BROKER, as between gunicorn workers.
+    """
+
+    def __init__(self, config):
+        self.engine = create_async_engine(async_database_uri(config['SQLALCHEMY_DATABASE_URI']))
+        if self.engine.dialect.name == "sqlite" and config.get('SQLITE_PRAGMAS'):
+            set_sqlite_pragmas(self.engine.sync_engine, config['SQLITE_PRAGMAS'])
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.jwt_secret = config.get('JWT_SECRET_KEY') or config['SECRET_KEY']
+        self.jwt_algorithm = config.get('JWT_ALGORITHM', 'HS256')
+        self.cookie_name = config.get('JWT_ACCESS_COOKIE_NAME', 'access_token')
+        self.rate_limiter = rate_limiter_from_config(config)
+        # only the main database is served here
+        self.broker = load_broker(config['EVENT_BROKER'])
+        self.routes = {
+            ("GET", "/api/leaderboard"): self.leaderboard,
+            ("POST", "/api/service/hours"): self.submit_hours,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        route = self.routes.get((scope["method"], scope["path"]))
+        try:
+            if route is None:
+                raise HTTPError(404, "Not found")
+            status, data, headers = await route(scope, receive)
+        except HTTPError as error:
+            status, data, headers = error.status, {"message": error.message}, []
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), *headers],
+        })
+        # a 304 has no body
+        await send({"type": "http.response.body", "body": dumps(data) if data is not None else b""})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def leaderboard(self, scope, receive):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        try:
+            limit = max(1, min(int(query.get("limit", ["10"])[0]), 100))
+        except ValueError:
+            limit = 10
+        async with self.sessions() as session:
+            # answer 304 from the version row alone, as conditional_json_response does
+            version = (await session.execute(DATA_VERSION, {"name": "leaderboard"})).first() or (0, None)
+            etag, last_modified = version_etag("leaderboard", *version, limit)
+            headers = cache_headers(etag, last_modified)
+            if not is_modified(scope, etag, last_modified):
+                return 304, None, headers
+            students = (await session.execute(LEADERBOARD, {"limit": limit})).all()
+            accolades = []
+            if students:
+                params = leaderboard_accolades_params(students)
+                accolades = (await session.execute(LEADERBOARD_ACCOLADES, params)).all()
+            return 200, format_leaderboard(leaderboard_rows(students, accolades), limit), headers
+
+    async def submit_hours(self, scope, receive):
+        user_id = self.authenticate(scope)
+        if not self.rate_limiter.allow("submit_hours", institution_key(f"user:{user_id}")):
+            raise HTTPError(429, "Too many requests, please slow down")
+        try:
+            data = orjson.loads(await read_body(receive))
+            hours = float(data['hours'])
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+            raise HTTPError(400, "Expected a JSON body with 'hours'")
+        key = header(scope, b"idempotency-key")
+        if not valid_idempotency_key(key):
+            raise HTTPError(400, f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+
+        async with self.sessions() as session:
+            identity = (await session.execute(STUDENT_BY_USER_ID, {"user_id": user_id})).first()
+            if identity is None:
+                raise HTTPError(401, "Unknown user")
+            if identity.student_id is None:
+                return 400, {"success": False, "message": "Only students can submit hours"}, []
+            key_scope = submit_hours_scope(identity.username)
+            if key is not None:
+                replay = await replay_response(session, key_scope, key)
+                if replay is not None:
+                    return 201, replay, []
+            validation_result = validate_hours(hours)
+            if not validation_result["success"]:
+                return 400, validation_result, []
+
+            confirmation_request = ConfirmationRequest(
+                student_id=identity.student_id,
+                minutes=hours_to_minutes(hours),
+                description=data.get('description', ''),
+                status=RequestStatus.PENDING
+            )
+            session.add(confirmation_request)
+            await session.flush()
+            result = submitted_result(confirmation_request)
+            replay = await commit_with_key(session, key_scope, key, result)
+            if replay is not None:
+                return 201, replay, []
+            self.broker.publish("pending", {"count": await session.scalar(PENDING_COUNT)})
+            return 201, result, []
+
+    def authenticate(self, scope):
+        headers = dict(scope.get("headers", ()))
+        token = None
+        authorization = headers.get(b"authorization", b"").decode()
+        if authorization.startswith("Bearer "):
+            token = authorization[len("Bearer "):]
+        elif b"cookie" in headers:
+            for part in headers[b"cookie"].decode().split(";"):
+                name, _, value = part.strip().partition("=")
+                if name == self.cookie_name:
+                    token = value
+        if not token:
+            raise HTTPError(401, "Missing access token")
+        try:
+            claims = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
+            user_id = int(claims["sub"])
+        except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+            raise HTTPError(401, "Invalid access token")
+        # institution databases are only served by the Flask app
+        if claims.get("institution") is not None:
+            raise HTTPError(401, "Invalid access token")
+        return user_id
+
+async def replay_response(session, scope, key):
+    return load_response(await session.scalar(STORED_RESPONSE, {"scope": scope, "key": key}))
+
+async def commit_with_key(session, scope, key, result):
+    # IdempotencyController.commit_with_key on an async session
+    if key is None:
+        await session.commit()
+        return None
+    session.add(stored_key(scope, key, result))
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        replay = await replay_response(session, scope, key)
+        if replay is None:
+            raise
+        return replay
+    return None
+
+def header(scope, name):
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def cache_headers(etag, last_modified):
+    headers = [(b"etag", quote_etag(etag).encode()), (b"cache-control", b"no-cache")]
+    if last_modified is not None:
+        headers.append((b"last-modified", http_date(last_modified).encode()))
+    return headers
+
+def is_modified(scope, etag, last_modified):
+    # werkzeug's conditional request check, given the WSGI keys it reads
+    environ = {"REQUEST_METHOD": scope["method"]}
+    for name, key in [(b"if-none-match", "HTTP_IF_NONE_MATCH"), (b"if-modified-since", "HTTP_IF_MODIFIED_SINCE")]:
+        value = header(scope, name)
+        if value is not None:
+            environ[key] = value
+    return is_resource_modified(environ, etag=etag, last_modified=last_modified)
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+def run_requests(app, requests, concurrency):
+    """Drive app with (scope, body) pairs, at most concurrency at a time.
+
+    Returns (status, seconds, body) for each request in order. Used by the
+    benchmark and the tests to call the app without an ASGI server.
+    """
+    async def call(limit, scope, body):
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        async with limit:
+            start = time.perf_counter()
+            await app(scope, receive, send)
+            return sent[0]["status"], time.perf_counter() - start, sent[1]["body"]
+
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+        try:
+            return await asyncio.gather(*(call(limit, scope, body) for scope, body in requests))
+        finally:
+            # pooled connections belong to this event loop
+            await app.engine.dispose()
+
+    return asyncio.run(main())
+
+def http_scope(method, path, query_string=b"", headers=()):
+    return {"type": "http", "method": method, "path": path, "query_string": query_string, "headers": list(headers)}
@@ -0,0 +1,358 @@
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, lambda_stmt, select
+from sqlalchemy.exc import OperationalError
+
+# Benchmarks run their workers in spawned processes, each with its own app and
+# engine, the same way gunicorn workers would against a shared database file.
+# Large datasets are built once and restored from a snapshot on later runs.
+
+BENCH_STAFF = "bench_staff"
+# kept between runs, but outside the project's instance folder
+BENCH_SNAPSHOT_DIR = os.path.join(tempfile.gettempdir(), "student-incentive-bench-snapshots")
+
+def _bench_app(uri, pragmas):
+    from App.main import create_app
+    return create_app({'SQLALCHEMY_DATABASE_URI': uri, 'SQLITE_PRAGMAS': pragmas, 'SNAPSHOT_DIR': BENCH_SNAPSHOT_DIR})
+
+def _prepare_submit_approve_db(uri, pragmas, workers):
+    from App.database import create_db
+    from App.controllers import create_user
+    _bench_app(uri, pragmas)
+    create_db()
+    create_user(BENCH_STAFF, "benchpass", "staff")
+    for worker_id in range(workers):
+        create_user(f"bench_student{worker_id}", "benchpass", "student")
+
+def _submit_approve_worker(uri, pragmas, worker_id, operations, results):
+    from App.database import db
+    from App.models import User
+    from App.controllers import submit_hours, approve_request
+    _bench_app(uri, pragmas)
+    student = {"username": f"bench_student{worker_id}", "role": "student"}
+    staff_user = User.query.filter_by(username=BENCH_STAFF).first()
+    completed = 0
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(operations):
+        try:
+            submitted = submit_hours(0.5, "benchmark", student)
+            approve_request(submitted["request_id"], staff_user)
+            completed += 1
+        except OperationalError:
+            db.session.rollback()
+            errors += 1
+    results.put((completed, errors, time.perf_counter() - start))
+
+def bench_submit_approve(pragmas, workers=4, operations=100):
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        setup = context.Process(target=_prepare_submit_approve_db, args=(uri, pragmas, workers))
+        setup.start()
+        setup.join()
+
+        results = context.Queue()
+        processes = [
+            context.Process(target=_submit_approve_worker, args=(uri, pragmas, worker_id, operations, results))
+            for worker_id in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    # workers start at slightly different times, so the slowest one bounds the run
+    elapsed = max(outcome[2] for outcome in outcomes)
+    completed = sum(outcome[0] for outcome in outcomes)
+    return {
+        "workers": workers,
+        "completed": completed,
+        "errors": sum(outcome[1] for outcome in outcomes),
+        "seconds": round(elapsed, 2),
+        "ops_per_second": round(completed / elapsed, 1) if elapsed else 0.0
+    }
+
+def _measure(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def _hand_built_requests_json(requests):
+    # how get_student_requests and jsonify built the payload before schemas
+    formatted_requests = []
+    for req in requests:
+        formatted_requests.append({
+            "id": req.id,
+            "hours": req.hours,
+            "status": req.status.value.title(),
+            "description": req.description,
+            "submitted_at": req.requested_at.strftime('%Y-%m-%d %H:%M') if req.requested_at else "Unknown",
+            "reason": req.reason
+        })
+    return json.dumps({"success": True, "requests": formatted_requests}).encode()
+
+def bench_serialization(rows=10000, repeat=5):
+    from App.models import ConfirmationRequest, RequestStatus
+    from App.schemas import RequestSchema, dumps
+    start = datetime(2024, 1, 1)
+    requests = [
+        ConfirmationRequest(
+            id=i, student_id=1, minutes=90, description=f"Food Drive {i}",
+            status=RequestStatus.APPROVED, requested_at=start + timedelta(minutes=i), reason=None
+        )
+        for i in range(rows)
+    ]
+    cases = [
+        ("dicts + strftime + json", lambda: _hand_built_requests_json(requests)),
+        ("RequestSchema + orjson", lambda: dumps({"success": True, "requests": RequestSchema.dump_many(requests)})),
+    ]
+    results = []
+    for name, func in cases:
+        seconds, peak = _measure(func, repeat)
+        results.append({"name": name, "rows": rows, "ms": round(seconds * 1000, 2), "peak_kib": round(peak / 1024, 1)})
+    return results
+
+def _service_log_table(column_type, rows):
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            f"CREATE TABLE service_logs (id INTEGER PRIMARY KEY, student_id INTEGER NOT NULL, amount {column_type} NOT NULL)"
+        )
+        connection.exec_driver_sql("INSERT INTO service_logs (student_id, amount) VALUES (?, ?)", rows)
+    return engine
+
+def bench_aggregation(rows=1000000, students=1000, repeat=5, seed=1):
+    # per-student SUM over the same logs stored as REAL hours and as INTEGER minutes
+    rng = random.Random(seed)
+    logs = [(rng.randrange(students), rng.randint(15, 240)) for _ in range(rows)]
+    exact = {}
+    for student_id, minutes in logs:
+        exact[student_id] = exact.get(student_id, 0) + minutes
+
+    cases = [
+        ("REAL hours", "REAL", [(student_id, minutes / 60) for student_id, minutes in logs], 1),
+        ("INTEGER minutes", "INTEGER", logs, 60),
+    ]
+    results = []
+    for name, column_type, values, per_hour in cases:
+        engine = _service_log_table(column_type, values)
+        with engine.connect() as connection:
+            query = "SELECT student_id, SUM(amount) FROM service_logs GROUP BY student_id"
+            seconds, _ = _measure(lambda: connection.exec_driver_sql(query).all(), repeat)
+            totals = connection.exec_driver_sql(query).all()
+            pages = connection.exec_driver_sql("PRAGMA page_count").scalar()
+        error = max(abs(total / per_hour - exact[student_id] / 60) for student_id, total in totals)
+        results.append({"name": name, "rows": rows, "ms": round(seconds * 1000, 2), "pages": pages, "max_error": error})
+        engine.dispose()
+    return results
+
+def _lambda_user_lookup(User, username):
+    return lambda_stmt(lambda: select(User).where(User.username == username).limit(1))
+
+def _queries_worker(calls, repeat, results):
+    from App.database import db, create_db
+    from App.models import User, ConfirmationRequest, RequestStatus
+    from App.controllers import create_user, submit_hours
+    from App.queries import user_by_username, pending_count
+    _bench_app("sqlite://", {})
+    create_db()
+    create_user("bench_student", "benchpass", "student")
+    for _ in range(20):
+        submit_hours(1, "benchmark", {"username": "bench_student", "role": "student"})
+
+    username = "bench_student"
+    cases = [
+        ("user: Query.filter_by", lambda: User.query.filter_by(username=username).first()),
+        ("user: select()", lambda: db.session.scalars(db.select(User).where(User.username == username).limit(1)).first()),
+        ("user: lambda_stmt", lambda: db.session.scalars(_lambda_user_lookup(User, username)).first()),
+        ("user: prebuilt statement", lambda: user_by_username(username)),
+        ("pending count: select()", lambda: db.session.scalar(
+            db.select(db.func.count(ConfirmationRequest.id)).where(ConfirmationRequest.status == RequestStatus.PENDING)
+        )),
+        ("pending count: prebuilt statement", pending_count),
+    ]
+    timings = []
+    for name, query in cases:
+        def run():
+            for _ in range(calls):
+                query()
+        seconds, _ = _measure(run, repeat)
+        timings.append({"name": name, "calls": calls, "us_per_call": round(seconds / calls * 1e6, 1)})
+    results.put(timings)
+
+def bench_queries(calls=5000, repeat=5):
+    # in a spawned process, so the benchmark app and its in-memory database stay out of the CLI's app context
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_queries_worker, args=(calls, repeat, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError("query benchmark worker failed")
+    return results.get()
+
+def _latency_summary(name, concurrency, latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    return {
+        "name": name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+    }
+
+def _async_worker(concurrency, requests, results):
+    from concurrent.futures import ThreadPoolExecutor
+    from flask_jwt_extended import create_access_token
+    from App.main import create_app
+    from App.database import create_db
+    from App.controllers import create_user, seed_database, restore_or_build
+    from App.asgi import AsyncAPI, run_requests, http_scope
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({'SQLALCHEMY_DATABASE_URI': uri, 'RATELIMIT_ENABLED': False, 'SNAPSHOT_DIR': BENCH_SNAPSHOT_DIR})
+        create_db()
+        restore_or_build("bench-async", lambda: seed_database(students=500, requests=5000, seed=1))
+        token = create_access_token(identity=create_user("bench_student", "benchpass", "student")["user"].id)
+        body = b'{"hours": 0.5, "description": "benchmark"}'
+        # half leaderboard reads, half submissions
+        plan = [i % 2 == 0 for i in range(requests)]
+
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+        def flask_call(is_read):
+            start = time.perf_counter()
+            if is_read:
+                response = client.get('/api/leaderboard?limit=10')
+            else:
+                response = client.post('/api/service/hours', data=body, headers=headers)
+            return response.status_code, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            outcomes = list(pool.map(flask_call, plan))
+        flask_elapsed = time.perf_counter() - start
+
+        api = AsyncAPI(app.config)
+        submit = http_scope("POST", "/api/service/hours", headers=[(b"authorization", f"Bearer {token}".encode())])
+        leaderboard = http_scope("GET", "/api/leaderboard", b"limit=10")
+        start = time.perf_counter()
+        responses = run_requests(api, [(leaderboard, b"") if is_read else (submit, body) for is_read in plan], concurrency)
+        async_elapsed = time.perf_counter() - start
+
+    results.put([
+        _latency_summary("Flask, thread per request", concurrency, [seconds for _, seconds in outcomes], flask_elapsed,
+                         sum(status >= 400 for status, _ in outcomes)),
+        _latency_summary("ASGI, async engine", concurrency, [seconds for _, seconds, _ in responses], async_elapsed,
+                         sum(status >= 400 for status, _, _ in responses)),
+    ])
+
+def bench_async(concurrency=50, requests=2000):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_async_worker, args=(concurrency, requests, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError("async benchmark worker failed")
+    return results.get()
+
+def _rows_worker(rows, repeat, results):
+    from App.database import db, create_db
+    from App.models import User, UserRoleEnum, Student, ConfirmationRequest, RequestStatus
+    from App.schemas import RequestSchema
+    from App.controllers import get_leaderboard, list_users_formatted, restore_or_build
+    from App.controllers.SeedController import insert_in_chunks
+    from App.queries import requests_for_student
+    _bench_app("sqlite://", {})
+
+    def build():
+        create_db()
+        user_ids = insert_in_chunks(
+            User, [{"username": f"bench{i}", "password": "x", "role": UserRoleEnum.STUDENT} for i in range(rows)], 10000, return_ids=True
+        )
+        student_ids = insert_in_chunks(
+            Student, [{"user_id": user_id, "total_minutes": i % 3000} for i, user_id in enumerate(user_ids)], 10000, return_ids=True
+        )
+        start = datetime(2024, 1, 1)
+        insert_in_chunks(ConfirmationRequest, [
+            {"student_id": student_ids[0], "minutes": 60, "description": f"Food Drive {i}",
+             "status": RequestStatus.APPROVED, "requested_at": start + timedelta(minutes=i)}
+            for i in range(rows)
+        ], 10000)
+        db.session.commit()
+    restore_or_build(f"bench-rows-{rows}", build)
+    student_ids = [db.session.scalar(db.select(db.func.min(Student.id)))]
+
+    def orm_leaderboard():
+        students = db.session.scalars(
+            db.select(Student).options(db.joinedload(Student.user), db.selectinload(Student.accolades))
+            .order_by(Student.total_minutes.desc()).limit(rows)
+        ).all()
+        return [
+            {"rank": i, "username": student.user.username, "total_hours": student.total_hours,
+             "accolades": " ".join(f"{accolade.accolade_type}h" for accolade in student.accolades) or "No accolades"}
+            for i, student in enumerate(students, 1)
+        ]
+
+    def orm_requests():
+        return RequestSchema.dump_many(db.session.scalars(
+            db.select(ConfirmationRequest).where(ConfirmationRequest.student_id == student_ids[0])
+            .order_by(ConfirmationRequest.requested_at.desc())
+        ).all())
+
+    def orm_users():
+        users = db.session.scalars(db.select(User).options(db.joinedload(User.student), db.joinedload(User.staff))).unique().all()
+        return [
+            {"username": user.username, "role": user.role.value.title(),
+             "profile_info": f"Student ID: {user.student.id} | Hours: {user.student.total_hours}" if user.student else "No profile"}
+            for user in users
+        ]
+
+    cases = [
+        ("leaderboard", "ORM objects", orm_leaderboard),
+        ("leaderboard", "column rows", lambda: get_leaderboard(rows)),
+        ("student requests", "ORM objects", orm_requests),
+        ("student requests", "column rows", lambda: RequestSchema.dump_many(requests_for_student(student_ids[0]))),
+        ("user list", "ORM objects", orm_users),
+        ("user list", "column rows", list_users_formatted),
+    ]
+    timings = []
+    for name, style, func in cases:
+        def run():
+            # a fresh session each time, as each request or command gets
+            db.session.remove()
+            func()
+        seconds, peak = _measure(run, repeat)
+        timings.append({"name": name, "style": style, "rows": rows, "ms": round(seconds * 1000, 1), "peak_mib": round(peak / 2**20, 1)})
+    results.put(timings)
+
+def bench_rows(rows=100000, repeat=3):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_rows_worker, args=(rows, repeat, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError("row benchmark worker failed")
+    return results.get()
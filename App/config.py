@@ -1,4 +1,5 @@
 import os
+from App.database import REPLICA_BIND, institution_bind
 
 def load_config(app, overrides):
     if os.path.exists(os.path.join('./App', 'custom_config.py')):
@@ -15,5 +16,52 @@ def load_config(app, overrides):
     app.config["JWT_COOKIE_SECURE"] = True
     app.config["JWT_COOKIE_CSRF_PROTECT"] = False
     app.config['FLASK_ADMIN_SWATCH'] = 'darkly'
+    app.config.setdefault('RATELIMIT_ENABLED', True)
+    # 'memory' keeps buckets per worker; point this at a 'module:Class' backend to share them
+    app.config.setdefault('RATELIMIT_BACKEND', 'memory')
+    # 'memory' only reaches clients of this worker; use a 'module:Class' broker to fan out across workers
+    app.config.setdefault('EVENT_BROKER', 'memory')
+    # Proxies in front of the app (1 on Render) whose X-Forwarded-For/-Proto headers are trusted, so
+    # per-IP rate limits see the client's address rather than the proxy's
+    app.config.setdefault('PROXY_FIX_HOPS', 0)
+    app.config.setdefault('RATELIMIT_LIMITS', {
+        'login': '10/minute',
+        'submit_hours': '30/minute',
+    })
+    # Seconds a stored submit/approve result is replayed for before `flask service purge-keys` removes it
+    app.config.setdefault('IDEMPOTENCY_KEY_TTL', 86400)
+    # Profile this fraction of requests when PROFILE_ENABLED; staff can also send 'X-Profile: 1'
+    app.config.setdefault('PROFILE_ENABLED', False)
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.01)
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    # Profile every wsgi.py CLI command run
+    app.config.setdefault('PROFILE_CLI', False)
+    # Database snapshots used by `flask init`, `flask snapshot` and the benchmarks
+    app.config.setdefault('SNAPSHOT_DIR', os.path.join(app.instance_path, 'snapshots'))
+    # /readyz pings the database at most this often per worker
+    app.config.setdefault('HEALTH_CHECK_CACHE_SECONDS', 1.0)
+    # /readyz reports the database unavailable when a ping takes longer than this
+    app.config.setdefault('HEALTH_CHECK_TIMEOUT_SECONDS', 2.0)
+    # Applied to every new SQLite connection; set to {} to keep SQLite's defaults
+    app.config.setdefault('SQLITE_PRAGMAS', {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -20000,
+        'mmap_size': 268435456,
+    })
+    # {name: database URI} for institutions hosted in their own database
+    app.config.setdefault('INSTITUTION_DATABASE_URIS', {})
+    # Requests pick an institution with this header; commands use INSTITUTION (FLASK_INSTITUTION)
+    app.config.setdefault('INSTITUTION_HEADER', 'X-Institution')
+    app.config.setdefault('INSTITUTION', None)
     for key in overrides:
-        app.config[key] = overrides[key]
\ No newline at end of file
+        app.config[key] = overrides[key]
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    replica_uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if replica_uri:
+        binds[REPLICA_BIND] = replica_uri
+    for name, uri in app.config['INSTITUTION_DATABASE_URIS'].items():
+        binds[institution_bind(name)] = uri
+    if binds:
+        app.config['SQLALCHEMY_BINDS'] = binds
\ No newline at end of file
@@ -1,27 +1,54 @@
+import threading
+from bisect import bisect_left, insort
 from datetime import datetime
-from App.database import db
-from App.models import Student, Accolade, User
+from flask import current_app
+from App.database import db, read_only, current_institution
+from App.models import Student, Accolade, MINUTES_PER_HOUR, minutes_to_hours
+from App.schemas import LeaderboardSchema, AccoladeSchema
+from App.queries import user_by_username, leaderboard_students
+from .VersionController import get_version
 
-def check_and_award_accolades(student):
-    thresholds = [10, 25, 50]
-    
-    for threshold in thresholds:
+# in hours; compared against whole minutes so a total can't fall just short
+ACCOLADE_THRESHOLDS = [10, 25, 50]
+
+def check_and_award_accolades(student, commit=True):
+    for threshold in ACCOLADE_THRESHOLDS:
         existing_accolade = Accolade.query.filter_by(
             student_id=student.id,
             accolade_type=str(threshold)
         ).first()
         
-        if student.total_hours >= threshold and not existing_accolade:
+        if student.total_minutes >= threshold * MINUTES_PER_HOUR and not existing_accolade:
             accolade = Accolade(
                 student_id=student.id,
                 accolade_type=str(threshold)
             )
             db.session.add(accolade)
     
-    db.session.commit()
+    if commit:
+        db.session.commit()
+
+def award_accolades_for_students(student_ids):
+    # set-based check_and_award_accolades for many students; the caller commits
+    now = datetime.utcnow()
+    for threshold in ACCOLADE_THRESHOLDS:
+        already_awarded = db.select(Accolade.id).where(
+            Accolade.student_id == Student.id,
+            Accolade.accolade_type == str(threshold)
+        ).exists()
+        db.session.execute(
+            db.insert(Accolade).from_select(
+                ["student_id", "accolade_type", "awarded_at"],
+                db.select(Student.id, db.literal(str(threshold)), db.literal(now)).where(
+                    Student.id.in_(student_ids),
+                    Student.total_minutes >= threshold * MINUTES_PER_HOUR,
+                    ~already_awarded
+                )
+            )
+        )
 
 def get_student_accolades(student_username):    
-    student_user = User.query.filter_by(username=student_username).first()
+    student_user = user_by_username(student_username)
     accolades = Accolade.query.filter_by(student_id=student_user.student.id).all()
     
     if not accolades:
@@ -31,36 +58,24 @@ def get_student_accolades(student_username):
             "accolades": []
         }
     
-    formatted_accolades = []
-    for accolade in accolades:
-        formatted_accolades.append({
-            "type": accolade.accolade_type,
-            "awarded_at": accolade.awarded_at.strftime('%Y-%m-%d')
-        })
-    
     return {
         "success": True,
         "message": f"Accolades for {student_username}:",
-        "accolades": formatted_accolades
+        "accolades": AccoladeSchema.dump_many(accolades)
     }
 
+@read_only
 def get_leaderboard(limit=10):
-    students = Student.query.order_by(Student.total_hours.desc()).limit(limit).all()
-    
+    return format_leaderboard(leaderboard_students(limit), limit)
+
+def format_leaderboard(students, limit):
     if not students:
         return {"success": False, "message": "No students found", "leaderboard": []}
     
-    formatted_leaderboard = []
-    for i, student in enumerate(students, 1):
-        accolades = Accolade.query.filter_by(student_id=student.id).all()
-        accolade_badges = " ".join([f"{acc.accolade_type}h" for acc in accolades])
-        
-        formatted_leaderboard.append({
-            "rank": i,
-            "username": student.user.username,
-            "total_hours": student.total_hours,
-            "accolades": accolade_badges if accolade_badges else "No accolades"
-        })
+    formatted_leaderboard = [
+        {"rank": i, **LeaderboardSchema.dump(student)}
+        for i, student in enumerate(students, 1)
+    ]
     
     return {
         "success": True,
@@ -70,4 +85,115 @@ def get_leaderboard(limit=10):
 
 def format_accolade_badges(student_id):
     accolades = Accolade.query.filter_by(student_id=student_id).all()
-    return " ".join([f"{acc.accolade_type}h" for acc in accolades]) if accolades else "No accolades"
\ No newline at end of file
+    return " ".join([f"{acc.accolade_type}h" for acc in accolades]) if accolades else "No accolades"
+
+class StandingsCache:
+    """Every student's total minutes in ascending order, as of one leaderboard version.
+
+    Approvals and new users bump the leaderboard version. The worker that
+    made the change moves the changed totals in place (see update_standings),
+    and the others re-read the totals the next time they look one up; every
+    other percentile lookup is a binary search in memory. Each institution
+    has its own standings.
+    """
+
+    def __init__(self):
+        self.standings = {}
+        self.rebuilds = 0
+        self.updates = 0
+        self.lock = threading.Lock()
+
+    def percentile(self, total_minutes):
+        totals = self.totals(get_version("leaderboard")[0])
+        if not totals:
+            return 100.0
+        # share of students with fewer hours
+        return round(bisect_left(totals, total_minutes) / len(totals) * 100, 1)
+
+    def totals(self, version):
+        institution = current_institution.get()
+        cached_version, totals = self.standings.get(institution, (None, []))
+        if cached_version == version:
+            return totals
+        with self.lock:
+            # another thread may have caught up while this one waited
+            cached_version, totals = self.standings.get(institution, (None, []))
+            if cached_version == version:
+                return totals
+            totals = db.session.scalars(db.select(Student.total_minutes).order_by(Student.total_minutes)).all()
+            self.rebuilds += 1
+            # only kept if no change committed between reading the version and the totals,
+            # or update_standings could apply that change a second time
+            self.standings[institution] = (version if get_version("leaderboard")[0] == version else None, totals)
+        return totals
+
+    def apply_changes(self, changes, version):
+        """Move each (old_minutes, new_minutes) total, old_minutes None for a new
+        student, for a change committed as leaderboard version `version`.
+
+        Only applied when the cache was at the version just before; otherwise
+        another change came in between and the next lookup re-reads the totals.
+        """
+        institution = current_institution.get()
+        with self.lock:
+            cached_version, totals = self.standings.get(institution, (None, []))
+            if cached_version != version - 1:
+                return False
+            for old_minutes, new_minutes in changes:
+                if old_minutes is not None:
+                    index = bisect_left(totals, old_minutes)
+                    if index == len(totals) or totals[index] != old_minutes:
+                        del self.standings[institution]
+                        return False
+                    del totals[index]
+                insort(totals, new_minutes)
+            self.standings[institution] = (version, totals)
+            self.updates += 1
+        return True
+
+    def get_stats(self):
+        return {
+            "students": sum(len(totals) for _, totals in self.standings.values()),
+            "rebuilds": self.rebuilds,
+            "updates": self.updates
+        }
+
+def setup_standings_cache(app):
+    cache = StandingsCache()
+    app.extensions['standings'] = cache
+    return cache
+
+def update_standings(changes):
+    # after committing changed totals, as [(old_minutes, new_minutes)], so this worker needn't re-read them all
+    current_app.extensions['standings'].apply_changes(changes, get_version("leaderboard")[0])
+
+def next_milestone(total_minutes):
+    for threshold in ACCOLADE_THRESHOLDS:
+        if total_minutes < threshold * MINUTES_PER_HOUR:
+            return threshold
+    return None
+
+@read_only
+def get_milestone_progress(student_username):
+    student_user = user_by_username(student_username)
+    if not student_user or not student_user.student:
+        return {"success": False, "message": f"Student '{student_username}' not found"}
+    
+    total_minutes = student_user.student.total_minutes
+    threshold = next_milestone(total_minutes)
+    percentile = current_app.extensions['standings'].percentile(total_minutes)
+    progress = {
+        "total_hours": minutes_to_hours(total_minutes),
+        "next_milestone": threshold,
+        "hours_remaining": minutes_to_hours(threshold * MINUTES_PER_HOUR - total_minutes) if threshold else 0.0,
+        "percentile": percentile
+    }
+    if threshold:
+        message = f"{progress['hours_remaining']} hours to go until the {threshold}h accolade"
+    else:
+        message = "Every accolade earned!"
+    return {
+        "success": True,
+        "message": f"{message} (more hours than {percentile}% of students)",
+        "progress": progress
+    }
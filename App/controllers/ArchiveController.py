@@ -0,0 +1,111 @@
+from datetime import datetime
+from App.database import db, analyze_tables
+from App.models import ServiceLog, ConfirmationRequest, RequestStatus, unindex_descriptions
+from App.models import ArchivedServiceLog, ArchivedConfirmationRequest, StudentArchiveSummary
+
+ARCHIVED_REQUEST_COLUMNS = ["id", "student_id", "staff_id", "minutes", "description", "status", "requested_at", "responded_at", "reason"]
+ARCHIVED_LOG_COLUMNS = ["id", "student_id", "staff_id", "minutes", "description", "logged_at"]
+
+def move_rows(model, archive_model, columns, ids, archived_at):
+    # copy then delete in the same transaction, so a row is never in both tables
+    db.session.execute(
+        db.insert(archive_model).from_select(
+            columns + ["archived_at"],
+            db.select(*[getattr(model, column) for column in columns], db.literal(archived_at)).where(model.id.in_(ids))
+        )
+    )
+    db.session.execute(db.delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+
+def update_summaries(request_counts, log_totals, before):
+    student_ids = set(request_counts) | set(log_totals)
+    summaries = {
+        summary.student_id: summary
+        for summary in StudentArchiveSummary.query.filter(StudentArchiveSummary.student_id.in_(student_ids))
+    }
+    for student_id in student_ids:
+        summary = summaries.get(student_id)
+        if summary is None:
+            summary = StudentArchiveSummary(student_id=student_id, archived_requests=0, archived_logs=0, archived_minutes=0)
+            db.session.add(summary)
+        logs, minutes = log_totals.get(student_id, (0, 0))
+        summary.archived_requests += request_counts.get(student_id, 0)
+        summary.archived_logs += logs
+        summary.archived_minutes += minutes
+        if summary.archived_through is None or summary.archived_through < before:
+            summary.archived_through = before
+
+def archive_chunk(model, archive_model, columns, conditions, kind, chunk_size, archived_at):
+    ids = db.session.scalars(db.select(model.id).where(*conditions).order_by(model.id).limit(chunk_size)).all()
+    if not ids:
+        return ids, {}
+    if model is ServiceLog:
+        totals = {
+            row.student_id: (row.logs, row.minutes)
+            for row in db.session.execute(
+                db.select(model.student_id, db.func.count(model.id).label("logs"), db.func.sum(model.minutes).label("minutes"))
+                .where(model.id.in_(ids)).group_by(model.student_id)
+            )
+        }
+    else:
+        totals = dict(db.session.execute(
+            db.select(model.student_id, db.func.count(model.id)).where(model.id.in_(ids)).group_by(model.student_id)
+        ).all())
+    move_rows(model, archive_model, columns, ids, archived_at)
+    unindex_descriptions(db.session.connection(), kind, ids)
+    return ids, totals
+
+def archive_records(before, chunk_size=5000):
+    """Move processed requests answered before `before` and service logs
+    logged before it into the archive tables.
+
+    Rows move in id-ordered chunks with INSERT ... SELECT and DELETE, one
+    transaction per chunk, and each chunk adds its counts and hours to the
+    students' archive summaries. Pending requests are never archived, and
+    student totals and accolades are left untouched.
+    """
+    archived_at = datetime.utcnow()
+    moved = {"requests": 0, "logs": 0}
+
+    request_conditions = [
+        ConfirmationRequest.status != RequestStatus.PENDING,
+        ConfirmationRequest.responded_at < before
+    ]
+    while True:
+        ids, counts = archive_chunk(
+            ConfirmationRequest, ArchivedConfirmationRequest, ARCHIVED_REQUEST_COLUMNS,
+            request_conditions, "request", chunk_size, archived_at
+        )
+        if not ids:
+            break
+        update_summaries(counts, {}, before)
+        db.session.commit()
+        moved["requests"] += len(ids)
+
+    while True:
+        ids, totals = archive_chunk(
+            ServiceLog, ArchivedServiceLog, ARCHIVED_LOG_COLUMNS,
+            [ServiceLog.logged_at < before], "log", chunk_size, archived_at
+        )
+        if not ids:
+            break
+        update_summaries({}, totals, before)
+        db.session.commit()
+        moved["logs"] += len(ids)
+    analyze_tables()
+
+    return {
+        "success": True,
+        "message": f"Archived {moved['requests']} requests and {moved['logs']} service logs from before {before:%Y-%m-%d}",
+        **moved
+    }
+
+def get_archive_summary(student_id):
+    summary = db.session.get(StudentArchiveSummary, student_id)
+    if summary is None:
+        return None
+    return {
+        "requests": summary.archived_requests,
+        "logs": summary.archived_logs,
+        "hours": summary.archived_hours,
+        "archived_through": summary.archived_through.strftime('%Y-%m-%d')
+    }
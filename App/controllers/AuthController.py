@@ -2,7 +2,7 @@
 from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity, verify_jwt_in_request
 
 from App.models import User
-from App.database import db
+from App.database import db, current_institution
 
 def login(username, password):
   result = db.session.execute(db.select(User).filter_by(username=username))
@@ -23,8 +23,15 @@ def setup_jwt(app):
     user_id = getattr(identity, "id", identity)
     return str(user_id) if user_id is not None else None
 
+  # User ids repeat between institution databases, so a token only works for the one it was issued in
+  @jwt.additional_claims_loader
+  def add_institution_claim(identity):
+    return {"institution": current_institution.get()}
+
   @jwt.user_lookup_loader
   def user_lookup_callback(_jwt_header, jwt_data):
+    if jwt_data.get("institution") != current_institution.get():
+      return None
     identity = jwt_data["sub"]
     # Cast back to int primary key
     try:
@@ -0,0 +1,117 @@
+import io
+import json
+import shlex
+import time
+from contextlib import redirect_stdout
+import click
+from App.database import db, joined_session, current_engine, sqlite_transactions
+from .SessionController import cached_session
+
+# Runs a file of CLI commands in the current process, so a nightly job pays
+# for create_app(), the session file and the database connection once
+# instead of once per command.
+
+def batch_args(entry):
+    """CLI arguments for one batch entry.
+
+    An entry is a command line ('service submit-hours 2 --description "Food
+    drive"', with or without a leading 'flask'), a JSON list of arguments or
+    a JSON object like {"command": "service submit-hours", "args": ["2"],
+    "options": {"description": "Food drive"}}.
+    """
+    if isinstance(entry, str):
+        args = shlex.split(entry)
+        return args[1:] if args[:1] == ["flask"] else args
+    if isinstance(entry, list):
+        return [str(arg) for arg in entry]
+    args = shlex.split(entry["command"]) + [str(arg) for arg in entry.get("args", [])]
+    for name, value in entry.get("options", {}).items():
+        if value is True:
+            args.append(f"--{name}")
+        elif value is not None and value is not False:
+            args.extend([f"--{name}", str(value)])
+    return args
+
+def read_batch(lines):
+    # (line number, args) for every command, skipping blank lines and # comments
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        yield number, batch_args(json.loads(line) if line[0] in "[{" else line)
+
+def run_batch_command(cli, args):
+    output = io.StringIO()
+    error = None
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            if args[:1] == ["run-batch"]:
+                raise click.UsageError("run-batch cannot be nested")
+            exit_code = cli.main(args, prog_name="flask", standalone_mode=False)
+        if isinstance(exit_code, int) and exit_code != 0:
+            error = f"Exited with code {exit_code}"
+    except click.ClickException as e:
+        error = e.format_message()
+    except click.Abort:
+        error = "Aborted (commands in a batch can't prompt for input)"
+    except SystemExit as e:
+        if e.code:
+            error = f"Exited with code {e.code}"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    # like the end of a one-off flask process: whatever the command didn't commit is dropped
+    db.session.rollback()
+    return {
+        "command": " ".join(args),
+        "success": error is None,
+        "error": error,
+        "output": output.getvalue(),
+        "ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+
+def run_batch(cli, lines, commit_every=100, stop_on_error=False):
+    """Run every command in lines through cli in one app context and connection.
+
+    Commands share one database transaction that is committed every
+    commit_every commands, and each controller commit only releases a
+    savepoint, so a failing command is rolled back on its own. The logged in
+    user is read from the session file once; 'auth login' and 'auth logout'
+    lines switch it for the commands after them.
+    """
+    results = []
+    start = time.perf_counter()
+    connection = current_engine().connect()
+    try:
+        with sqlite_transactions(connection):
+            transaction = connection.begin()
+            try:
+                with joined_session(connection), cached_session():
+                    for number, args in read_batch(lines):
+                        result = run_batch_command(cli, args)
+                        result["line"] = number
+                        results.append(result)
+                        if not result["success"] and stop_on_error:
+                            break
+                        if len(results) % commit_every == 0:
+                            transaction.commit()
+                            transaction = connection.begin()
+                transaction.commit()
+            except BaseException:
+                transaction.rollback()
+                raise
+    finally:
+        connection.close()
+    seconds = time.perf_counter() - start
+
+    failed = sum(not result["success"] for result in results)
+    per_second = round(len(results) / seconds, 1) if seconds else 0.0
+    return {
+        "success": failed == 0,
+        "message": f"Ran {len(results)} commands ({failed} failed) in {seconds:.2f}s, {per_second} commands/sec",
+        "results": results,
+        "commands": len(results),
+        "failed": failed,
+        "seconds": round(seconds, 3),
+        "per_second": per_second
+    }
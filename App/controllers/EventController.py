@@ -0,0 +1,89 @@
+import threading
+from collections import deque
+from importlib import import_module
+from itertools import islice
+from flask import current_app
+from App.database import current_institution
+from App.schemas import dumps
+from App.queries import pending_count
+
+class MemoryBroker:
+    """Pub/sub for the clients connected to this worker.
+
+    Each event is encoded as a server-sent event frame once, when published,
+    and kept in a ring buffer. Subscribers block on one shared condition and
+    copy the frames they have not seen yet, so publishing costs the same no
+    matter how many clients are listening. Under gunicorn's gevent worker the
+    condition is cooperative, so each waiting client is a cheap greenlet.
+    """
+
+    def __init__(self, size=1000):
+        self.frames = deque(maxlen=size)
+        self.last_id = 0
+        self.condition = threading.Condition()
+
+    def publish(self, channel, data):
+        with self.condition:
+            self.last_id += 1
+            frame = f"id: {self.last_id}\nevent: {channel}\ndata: ".encode() + dumps(data) + b"\n\n"
+            self.frames.append(frame)
+            self.condition.notify_all()
+
+    def listen(self, after_id, timeout=None):
+        """Frames published after after_id, waiting up to timeout for new ones.
+
+        Returns (frames, last_id). frames is None when the client fell so far
+        behind that events it missed were already dropped from the buffer.
+        """
+        with self.condition:
+            if self.last_id <= after_id:
+                self.condition.wait(timeout)
+            missed = self.last_id - after_id
+            if missed > len(self.frames):
+                return None, self.last_id
+            return list(islice(self.frames, len(self.frames) - missed, None)), self.last_id
+
+def load_broker(path, institution=None):
+    # 'memory' or 'package.module:ClassName' for a broker shared between workers,
+    # which gets the institution name so it can keep each database's channels apart
+    if path == "memory":
+        return MemoryBroker()
+    module_name, class_name = path.split(":")
+    return getattr(import_module(module_name), class_name)(institution)
+
+def setup_event_broker(app):
+    # one broker per database, so events never reach another institution's clients
+    brokers = {
+        institution: load_broker(app.config['EVENT_BROKER'], institution)
+        for institution in [None, *app.config['INSTITUTION_DATABASE_URIS']]
+    }
+    app.extensions['event_brokers'] = brokers
+    return brokers
+
+def current_broker():
+    return current_app.extensions['event_brokers'][current_institution.get()]
+
+def publish_event(channel, data):
+    current_broker().publish(channel, data)
+
+def publish_pending_count():
+    publish_event("pending", {"count": pending_count()})
+
+def stream_events(after_id, keepalive=15):
+    # picked now, while the request's institution is still set
+    broker = current_broker()
+
+    def generate():
+        last_id = after_id
+        yield b"retry: 3000\n\n"
+        while True:
+            frames, latest = broker.listen(last_id, keepalive)
+            if frames is None:
+                # tell the client to refetch full state instead of replaying
+                yield f"id: {latest}\nevent: resync\ndata: {{}}\n\n".encode()
+            elif frames:
+                yield b"".join(frames)
+            else:
+                yield b": keep-alive\n\n"
+            last_id = latest
+    return generate()
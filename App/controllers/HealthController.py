@@ -0,0 +1,133 @@
+import concurrent.futures, os, threading, time
+from flask import current_app
+from App.database import db, current_engine, current_institution
+from .AccoladeController import get_leaderboard
+from .UserController import get_all_users_json
+from .VersionController import get_version
+
+# Start time of this worker process. It is reset after a fork, so preloaded
+# gunicorn workers report their own uptime, not the master's.
+process_started = {"pid": os.getpid(), "at": time.monotonic()}
+
+# Last check of each institution's database (None is the main one) and the
+# pings still waiting on a reply, shared by every request in this worker
+last_checks = {}
+pending_pings = {}
+check_lock = threading.Lock()
+
+def get_uptime():
+    if process_started["pid"] != os.getpid():
+        process_started.update(pid=os.getpid(), at=time.monotonic())
+    return round(time.monotonic() - process_started["at"], 1)
+
+def get_rss_kib():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, AttributeError, ValueError):
+        # no /proc (macOS, Windows)
+        return None
+
+def warm_worker():
+    """Run the leaderboard and user list reads once, so a new worker's first
+    requests find a pooled connection, compiled statements and warm database
+    pages. Returns the time taken in milliseconds.
+    """
+    start = time.perf_counter()
+    for name in ("users", "leaderboard"):
+        get_version(name)
+    get_leaderboard()
+    get_all_users_json()
+    db.session.remove()
+    return round((time.perf_counter() - start) * 1000, 1)
+
+def ping_database(engine):
+    start = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(db.select(1))
+    except Exception as error:
+        return {"status": "unavailable", "error": str(error).splitlines()[0]}
+    return {"status": "ok", "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+def start_ping(key, engine):
+    # on a daemon thread, so a ping stuck on a hung database never blocks shutdown
+    future = concurrent.futures.Future()
+
+    def run():
+        result = ping_database(engine)
+        with check_lock:
+            last_checks[key] = {"at": time.monotonic(), "result": result}
+            del pending_pings[key]
+        future.set_result(result)
+
+    pending_pings[key] = future
+    threading.Thread(target=run, name="health-check", daemon=True).start()
+    return future
+
+def check_database():
+    """Round trip to the current institution's database, or the main one, run
+    at most once per HEALTH_CHECK_CACHE_SECONDS per worker so frequent polling
+    stays cheap.
+
+    The lock only guards the cache. Probes that arrive while a ping is out wait
+    on that ping rather than sending another, and give up after
+    HEALTH_CHECK_TIMEOUT_SECONDS, so a hung database answers every probe with
+    'unavailable' instead of queueing them.
+    """
+    max_age = current_app.config['HEALTH_CHECK_CACHE_SECONDS']
+    timeout = current_app.config['HEALTH_CHECK_TIMEOUT_SECONDS']
+    key = current_institution.get()
+    with check_lock:
+        check = last_checks.get(key)
+        if check is not None and time.monotonic() - check["at"] < max_age:
+            return dict(check["result"], cached=True)
+        future = pending_pings.get(key) or start_ping(key, current_engine())
+    try:
+        result = future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        return {"status": "unavailable", "error": f"No reply within {timeout} seconds", "cached": False}
+    return dict(result, cached=False)
+
+def get_pool_stats():
+    stats = {}
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        stats[bind or "default"] = {
+            "pool": type(pool).__name__,
+            # only queue pools track these; SQLite's default pools hold one connection per thread
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        }
+    return stats
+
+def get_cache_stats():
+    statement_caches = {}
+    for bind, engine in db.engines.items():
+        cache = engine._compiled_cache
+        statement_caches[bind or "default"] = {"size": len(cache), "capacity": cache.capacity} if cache is not None else None
+    events = {
+        institution or "default": {"last_id": getattr(broker, "last_id", None), "buffered": len(getattr(broker, "frames", ()))}
+        for institution, broker in current_app.extensions['event_brokers'].items()
+    }
+    return {
+        "statements": statement_caches,
+        "rate_limiter": current_app.extensions['rate_limiter'].get_stats(),
+        "events": events,
+        "standings": current_app.extensions['standings'].get_stats(),
+    }
+
+def get_liveness():
+    return {"status": "ok", "pid": os.getpid(), "uptime_seconds": get_uptime(), "rss_kib": get_rss_kib()}
+
+def get_readiness():
+    database = check_database()
+    return {
+        "status": "ok" if database["status"] == "ok" else "unavailable",
+        "pid": os.getpid(),
+        "uptime_seconds": get_uptime(),
+        "database": database,
+        "pools": get_pool_stats(),
+        "caches": get_cache_stats(),
+    }
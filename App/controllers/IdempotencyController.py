@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+import orjson
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from App.database import db
+from App.models import IdempotencyKey
+from App.schemas import dumps
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 100
+
+# one lookup on the (scope, key) unique index
+STORED_RESPONSE = db.select(IdempotencyKey.response).where(
+    IdempotencyKey.scope == db.bindparam("scope"), IdempotencyKey.key == db.bindparam("key")
+)
+
+def valid_idempotency_key(key):
+    return key is None or 0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH
+
+def load_response(response):
+    return orjson.loads(response) if response is not None else None
+
+def stored_key(scope, key, result):
+    return IdempotencyKey(scope=scope, key=key, response=dumps(result).decode())
+
+def replay_response(scope, key):
+    return load_response(db.session.scalar(STORED_RESPONSE, {"scope": scope, "key": key}))
+
+def commit_with_key(scope, key, result):
+    """Commit the current transaction, storing result under key if one was given.
+
+    Returns None once committed. If a concurrent retry with the same key
+    committed first, the unique index rejects this transaction; it is rolled
+    back and the stored result is returned instead. Any other integrity
+    error is raised after the rollback, since nothing was written.
+    """
+    if key is None:
+        db.session.commit()
+        return None
+    db.session.add(stored_key(scope, key, result))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        replay = replay_response(scope, key)
+        if replay is None:
+            raise
+        return replay
+    return None
+
+def purge_idempotency_keys(ttl=None):
+    if ttl is None:
+        ttl = current_app.config['IDEMPOTENCY_KEY_TTL']
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl)
+    deleted = db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
+    db.session.commit()
+    return {"success": True, "message": f"Removed {deleted} idempotency keys older than {ttl} seconds", "deleted": deleted}
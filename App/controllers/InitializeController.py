@@ -1,11 +1,25 @@
 from datetime import datetime
-from App.database import db
+from App.database import db, current_engine
 from App.models import User, UserRoleEnum, Student, Staff, ServiceLog, ConfirmationRequest, RequestStatus, Accolade
+from App.models import MINUTES_PER_HOUR
 from App.controllers import create_user
+from .SnapshotController import restore_or_build
 
-def initialize():
-    db.drop_all()
-    db.create_all()
+def initialize(rebuild=False):
+    # restored from a snapshot of the sample data when one exists for the current schema
+    if restore_or_build("init", build_sample_database, rebuild=rebuild):
+        print("database initialized from snapshot!")
+    else:
+        print("database initialized!")
+
+def reset_database():
+    # the current institution's database, or the main one
+    engine = current_engine()
+    db.metadata.drop_all(bind=engine)
+    db.metadata.create_all(bind=engine)
+
+def build_sample_database():
+    reset_database()
     
     staff_members = create_sample_staff()
     students = create_sample_students()
@@ -13,7 +27,6 @@ def initialize():
     create_sample_service_logs(requests)
     update_student_hours(students)
     create_sample_accolades(students)
-    print("database initialized!")
 
 def create_sample_staff():
     staff_members = []
@@ -40,7 +53,7 @@ def create_sample_students():
         student_user = User(username=f"student{i}", password="studentpass", role=UserRoleEnum.STUDENT)
         db.session.add(student_user)
         db.session.flush()
-        student_profile = Student(user_id=student_user.id, total_hours=0.0)
+        student_profile = Student(user_id=student_user.id, total_minutes=0)
         db.session.add(student_profile)
         students.append(student_profile)
     
@@ -49,14 +62,14 @@ def create_sample_students():
 
 def create_sample_requests(students, staff_members):
     requests = [
-        ConfirmationRequest(student_id=students[0].id, staff_id=staff_members[0].id, hours=5.0, description="Community Outreach", status=RequestStatus.APPROVED, responded_at=datetime.utcnow()),
-        ConfirmationRequest(student_id=students[1].id, staff_id=staff_members[0].id, hours=3.0, description="Food Drive", status=RequestStatus.APPROVED, responded_at=datetime.utcnow()),
-        ConfirmationRequest(student_id=students[1].id, staff_id=staff_members[1].id, hours=8.0, description="Football", status=RequestStatus.REJECTED, responded_at=datetime.utcnow()),
-        ConfirmationRequest(student_id=students[2].id, staff_id=staff_members[1].id, hours=10.0, description="Library Book Sorting", status=RequestStatus.APPROVED, responded_at=datetime.utcnow()),
-        ConfirmationRequest(student_id=students[3].id, staff_id=staff_members[2].id, hours=15.0, description="Park Cleanup", status=RequestStatus.PENDING),
-        ConfirmationRequest(student_id=students[4].id, staff_id=staff_members[2].id, hours=7.0, description="Senior Center", status=RequestStatus.APPROVED, responded_at=datetime.utcnow()),
-        ConfirmationRequest(student_id=students[5].id, staff_id=staff_members[0].id, hours=12.0, description="Animal Shelter", status=RequestStatus.APPROVED, responded_at=datetime.utcnow()),
-        ConfirmationRequest(student_id=students[6].id, staff_id=staff_members[1].id, hours=2.0, description="Help Desk", status=RequestStatus.PENDING),
+        ConfirmationRequest(student_id=students[0].id, staff_id=staff_members[0].id, minutes=5 * MINUTES_PER_HOUR, description="Community Outreach", status=RequestStatus.APPROVED, responded_at=datetime.utcnow()),
+        ConfirmationRequest(student_id=students[1].id, staff_id=staff_members[0].id, minutes=3 * MINUTES_PER_HOUR, description="Food Drive", status=RequestStatus.APPROVED, responded_at=datetime.utcnow()),
+        ConfirmationRequest(student_id=students[1].id, staff_id=staff_members[1].id, minutes=8 * MINUTES_PER_HOUR, description="Football", status=RequestStatus.REJECTED, responded_at=datetime.utcnow()),
+        ConfirmationRequest(student_id=students[2].id, staff_id=staff_members[1].id, minutes=10 * MINUTES_PER_HOUR, description="Library Book Sorting", status=RequestStatus.APPROVED, responded_at=datetime.utcnow()),
+        ConfirmationRequest(student_id=students[3].id, staff_id=staff_members[2].id, minutes=15 * MINUTES_PER_HOUR, description="Park Cleanup", status=RequestStatus.PENDING),
+        ConfirmationRequest(student_id=students[4].id, staff_id=staff_members[2].id, minutes=7 * MINUTES_PER_HOUR, description="Senior Center", status=RequestStatus.APPROVED, responded_at=datetime.utcnow()),
+        ConfirmationRequest(student_id=students[5].id, staff_id=staff_members[0].id, minutes=12 * MINUTES_PER_HOUR, description="Animal Shelter", status=RequestStatus.APPROVED, responded_at=datetime.utcnow()),
+        ConfirmationRequest(student_id=students[6].id, staff_id=staff_members[1].id, minutes=2 * MINUTES_PER_HOUR, description="Help Desk", status=RequestStatus.PENDING),
     ]
     
     db.session.add_all(requests)
@@ -69,7 +82,7 @@ def create_sample_service_logs(requests):
             service_log = ServiceLog(
                 student_id=req.student_id,
                 staff_id=req.staff_id,
-                hours=req.hours,
+                minutes=req.minutes,
                 description=req.description
             )
             db.session.add(service_log)
@@ -78,19 +91,19 @@ def create_sample_service_logs(requests):
 
 def update_student_hours(students):
     for student in students:
-        approved_hours = db.session.query(db.func.sum(ServiceLog.hours)).filter(ServiceLog.student_id == student.id).scalar() or 0.0
-        student.total_hours = approved_hours
+        approved_minutes = db.session.query(db.func.sum(ServiceLog.minutes)).filter(ServiceLog.student_id == student.id).scalar() or 0
+        student.total_minutes = approved_minutes
         db.session.add(student)
     
     db.session.commit()
 
 def create_sample_accolades(students):
     for student in students:
-        if student.total_hours >= 10:
+        if student.total_minutes >= 10 * MINUTES_PER_HOUR:
             db.session.add(Accolade(student_id=student.id, accolade_type="10"))
-        if student.total_hours >= 25:
+        if student.total_minutes >= 25 * MINUTES_PER_HOUR:
             db.session.add(Accolade(student_id=student.id, accolade_type="25"))
-        if student.total_hours >= 50:
+        if student.total_minutes >= 50 * MINUTES_PER_HOUR:
             db.session.add(Accolade(student_id=student.id, accolade_type="50"))
     
     db.session.commit()
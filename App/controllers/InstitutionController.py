@@ -0,0 +1,38 @@
+from flask import abort, g, request
+from App.database import current_institution, switch_institution
+
+def setup_institutions(app):
+    """Route each request and command to its institution's database.
+
+    Requests name the institution in the INSTITUTION_HEADER header and
+    commands with the INSTITUTION setting; without either they use the main
+    database. Registered before the other request hooks so that anything
+    loading the current user already reads from the right database.
+    """
+    names = set(app.config['INSTITUTION_DATABASE_URIS'])
+    default = app.config['INSTITUTION']
+    if default is not None and default not in names:
+        raise LookupError(f"Unknown institution '{default}'")
+    if not names:
+        return
+    # the CLI runs its commands in the thread that created the app
+    current_institution.set(default)
+    header = app.config['INSTITUTION_HEADER']
+
+    @app.before_request
+    def resolve_institution():
+        name = request.headers.get(header, default)
+        if name is not None and name not in names:
+            abort(404, description=f"Unknown institution '{name}'")
+        g.institution_token = switch_institution(name)
+
+    @app.teardown_request
+    def reset_institution(exception=None):
+        token = g.pop('institution_token', None)
+        if token is not None:
+            current_institution.reset(token)
+
+def institution_key(key):
+    # for per-worker caches and keys that must not be shared between institutions
+    institution = current_institution.get()
+    return key if institution is None else f"{institution}:{key}"
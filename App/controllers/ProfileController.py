@@ -0,0 +1,158 @@
+import cProfile, os, pstats, random, re, threading
+from datetime import datetime
+from functools import wraps
+import click
+from flask import current_app, g, request
+from flask_jwt_extended import current_user, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from App.models import UserRoleEnum
+
+PROFILE_HEADER = "X-Profile"
+
+def frame_name(func):
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+def folded_stacks(stats, max_depth=64):
+    """Call stacks in the folded 'a;b;c weight' format read by flamegraph.pl and
+    speedscope, weighted in microseconds.
+
+    cProfile only records caller -> callee totals, not whole stacks, so the time
+    spent under a function is split between its callers in proportion to the
+    time each call edge accounts for.
+    """
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    folded = {}
+
+    def walk(func, path, share):
+        _, _, self_time, total_time, _ = entries[func]
+        if total_time <= 0:
+            return
+        path = path + (frame_name(func),)
+        weight = int(share * self_time / total_time * 1e6)
+        if weight:
+            stack = ";".join(path)
+            folded[stack] = folded.get(stack, 0) + weight
+        if len(path) >= max_depth:
+            return
+        for callee, edge_time in callees.get(func, ()):
+            callee_share = share * edge_time / total_time
+            if callee_share >= 1e-6 and frame_name(callee) not in path:
+                walk(callee, path, callee_share)
+
+    for func, (_, _, _, total_time, callers) in entries.items():
+        if not callers:
+            walk(func, (), total_time)
+    return sorted(folded.items())
+
+class Profiler:
+    """Runs cProfile around a sampled fraction of calls and writes a .prof file
+    (for pstats/snakeviz) and a .folded file (for flame graphs) per call.
+
+    Only one call per process is profiled at a time. cProfile hooks the whole
+    thread, which gevent greenlets share, and calls that arrive while a profile
+    is running are simply not profiled, so the overhead stays bounded under load.
+    """
+
+    def __init__(self, directory, sample_rate=0.0, rng=random.random):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.rng = rng
+        self.lock = threading.Lock()
+
+    def should_sample(self):
+        return self.sample_rate > 0 and self.rng() < self.sample_rate
+
+    def start(self):
+        if not self.lock.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop(self, profile, label):
+        profile.disable()
+        try:
+            return self.write(profile, label)
+        finally:
+            self.lock.release()
+
+    def write(self, profile, label):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{datetime.utcnow():%Y%m%d-%H%M%S-%f}-{re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')}"
+        path = os.path.join(self.directory, name)
+        stats = pstats.Stats(profile)
+        stats.dump_stats(path + ".prof")
+        with open(path + ".folded", "w") as folded:
+            folded.writelines(f"{stack} {weight}\n" for stack, weight in folded_stacks(stats))
+        return name
+
+def is_staff_request():
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return False
+    return current_user is not None and current_user.role == UserRoleEnum.STAFF
+
+def wants_profile(profiler):
+    if request.headers.get(PROFILE_HEADER) and is_staff_request():
+        return True
+    return current_app.config['PROFILE_ENABLED'] and profiler.should_sample()
+
+def setup_profiler(app):
+    profiler = Profiler(app.config['PROFILE_DIR'], app.config['PROFILE_SAMPLE_RATE'])
+    app.extensions['profiler'] = profiler
+
+    @app.before_request
+    def start_request_profile():
+        profiler = current_app.extensions['profiler']
+        if wants_profile(profiler):
+            g.profile = profiler.start()
+
+    @app.after_request
+    def finish_request_profile(response):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            name = current_app.extensions['profiler'].stop(profile, f"{request.method} {request.path}")
+            response.headers['X-Profile-Id'] = name
+        return response
+
+    @app.teardown_request
+    def finish_failed_request_profile(error):
+        # after_request is skipped when the view raised
+        profile = g.pop('profile', None)
+        if profile is not None:
+            current_app.extensions['profiler'].stop(profile, f"{request.method} {request.path} error")
+
+    return profiler
+
+def profiled(profiler, label, callback):
+    @wraps(callback)
+    def wrapper(*args, **kwargs):
+        profile = profiler.start()
+        if profile is None:
+            return callback(*args, **kwargs)
+        try:
+            return callback(*args, **kwargs)
+        finally:
+            name = profiler.stop(profile, label)
+            click.echo(f"Profile written to {os.path.join(profiler.directory, name)}.prof", err=True)
+    return wrapper
+
+def profile_cli_commands(app, group=None, prefix="cli"):
+    # every run of a wrapped command is profiled; sampling only applies to requests
+    profiler = app.extensions['profiler']
+    group = group or app.cli
+    for name, command in group.commands.items():
+        if isinstance(command, click.Group):
+            profile_cli_commands(app, command, f"{prefix} {name}")
+        else:
+            command.callback = profiled(profiler, f"{prefix} {name}", command.callback)
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from functools import wraps
+from importlib import import_module
+from flask import current_app, jsonify, render_template, request
+from flask_jwt_extended import current_user
+from werkzeug.middleware.proxy_fix import ProxyFix
+from .InstitutionController import institution_key
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+def parse_limit(limit):
+    """Turn '10/minute' into (capacity, tokens refilled per second)."""
+    count, period = limit.split("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period.strip()]
+
+class MemoryBackend:
+    """Token buckets held in this process.
+
+    Buckets are kept in least recently used order, so every call only has to
+    look at the front of the queue to drop buckets that have refilled
+    completely; bookkeeping stays constant time however many clients there are.
+    """
+
+    def __init__(self):
+        self.buckets = defaultdict(OrderedDict)
+        self.lock = threading.Lock()
+
+    def take(self, name, key, capacity, rate, now):
+        with self.lock:
+            buckets = self.buckets[name]
+            tokens, updated = buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            buckets[key] = (tokens - 1 if allowed else tokens, now)
+
+            idle_for = capacity / rate
+            while buckets:
+                oldest_key, (_, oldest_update) = next(iter(buckets.items()))
+                if now - oldest_update < idle_for:
+                    break
+                del buckets[oldest_key]
+            return allowed
+
+def load_backend(path):
+    # 'memory' or 'package.module:ClassName' for a backend shared between workers
+    if path == "memory":
+        return MemoryBackend()
+    module_name, class_name = path.split(":")
+    return getattr(import_module(module_name), class_name)()
+
+class RateLimiter:
+
+    def __init__(self, backend, limits, clock=time.monotonic):
+        self.backend = backend
+        self.limits = {name: parse_limit(limit) for name, limit in limits.items()}
+        self.clock = clock
+        self.allowed = Counter()
+        self.rejected = Counter()
+
+    def allow(self, name, key):
+        if name not in self.limits:
+            return True
+        capacity, rate = self.limits[name]
+        if self.backend.take(name, key, capacity, rate, self.clock()):
+            self.allowed[name] += 1
+            return True
+        self.rejected[name] += 1
+        return False
+
+    def get_stats(self):
+        return {
+            name: {"allowed": self.allowed[name], "rejected": self.rejected[name]}
+            for name in self.limits
+        }
+
+def rate_limiter_from_config(config):
+    return RateLimiter(
+        load_backend(config['RATELIMIT_BACKEND']),
+        config['RATELIMIT_LIMITS'] if config['RATELIMIT_ENABLED'] else {}
+    )
+
+def setup_rate_limiter(app):
+    limiter = rate_limiter_from_config(app.config)
+    app.extensions['rate_limiter'] = limiter
+    return limiter
+
+def setup_proxy_fix(app):
+    # behind a proxy remote_addr is the proxy's, so read the client from the headers it adds
+    hops = app.config['PROXY_FIX_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+def client_address():
+    return request.remote_addr or "unknown"
+
+def current_user_key():
+    return institution_key(f"user:{current_user.id}") if current_user else client_address()
+
+def rate_limit(name, key_func=client_address):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.extensions['rate_limiter']
+            if not limiter.allow(name, key_func()):
+                message = "Too many requests, please slow down"
+                if request.path.startswith('/api/'):
+                    return jsonify(message=message), 429
+                return render_template('message.html', title="Slow Down", message=message), 429
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
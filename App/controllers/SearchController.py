@@ -0,0 +1,115 @@
+import re
+from sqlalchemy import text
+from App.database import db, read_only
+from App.models import User, Student, SEARCH_TABLE, SEARCH_CONFIG, SEARCH_KINDS, search_vector
+
+def to_fts5_query(query):
+    # quote every word so user input can't be read as FTS5 operators
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"' for word in words)
+
+def find_matches_sqlite(query, limit, offset):
+    rows = db.session.execute(
+        text(f"SELECT kind, source_id, -bm25({SEARCH_TABLE}) AS rank FROM {SEARCH_TABLE} "
+             f"WHERE {SEARCH_TABLE} MATCH :query ORDER BY rank DESC LIMIT :limit OFFSET :offset"),
+        {"query": to_fts5_query(query), "limit": limit, "offset": offset}
+    )
+    return [(row.kind, int(row.source_id), row.rank) for row in rows]
+
+def find_matches_postgres(query, limit, offset):
+    ts_query = db.func.plainto_tsquery(db.literal_column(f"'{SEARCH_CONFIG}'"), query)
+    selects = []
+    for kind, model in SEARCH_KINDS.items():
+        vector = search_vector(model)
+        selects.append(
+            db.select(
+                db.literal(kind).label("kind"),
+                model.id.label("source_id"),
+                db.func.ts_rank(vector, ts_query).label("rank")
+            ).where(vector.op("@@")(ts_query))
+        )
+    matches = db.union_all(*selects).subquery()
+    rows = db.session.execute(
+        db.select(matches).order_by(matches.c.rank.desc()).limit(limit).offset(offset)
+    )
+    return [(row.kind, row.source_id, row.rank) for row in rows]
+
+def load_matched_records(matches):
+    records = {}
+    for kind, model in SEARCH_KINDS.items():
+        ids = [source_id for match_kind, source_id, _ in matches if match_kind == kind]
+        if not ids:
+            continue
+        rows = db.session.execute(
+            db.select(model, User.username)
+            .join(Student, Student.id == model.student_id)
+            .join(User, User.id == Student.user_id)
+            .where(model.id.in_(ids))
+        )
+        for record, username in rows:
+            records[(kind, record.id)] = (record, username)
+    return records
+
+def format_search_result(kind, record, username, rank):
+    if kind == "log":
+        status = "Approved"
+        date = record.logged_at
+    else:
+        status = record.status.value.title()
+        date = record.requested_at
+    return {
+        "type": kind,
+        "id": record.id,
+        "student": username,
+        "hours": record.hours,
+        "description": record.description,
+        "status": status,
+        "date": date.strftime('%Y-%m-%d %H:%M') if date else "Unknown",
+        "rank": round(rank, 4)
+    }
+
+@read_only
+def search_service_records(query, page=1, per_page=10):
+    if not query or not re.search(r"\w", query):
+        return {"success": False, "message": "Search query cannot be empty", "results": []}
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+
+    # fetch one extra match to know whether there is another page without counting
+    offset = (page - 1) * per_page
+    if db.session.get_bind().dialect.name == "postgresql":
+        matches = find_matches_postgres(query, per_page + 1, offset)
+    else:
+        matches = find_matches_sqlite(query, per_page + 1, offset)
+    has_next = len(matches) > per_page
+    matches = matches[:per_page]
+
+    records = load_matched_records(matches)
+    results = []
+    for kind, source_id, rank in matches:
+        if (kind, source_id) in records:
+            record, username = records[(kind, source_id)]
+            results.append(format_search_result(kind, record, username, rank))
+
+    return {
+        "success": True,
+        "message": f"Results for '{query}' (page {page}):" if results else f"No results for '{query}'",
+        "results": results,
+        "page": page,
+        "per_page": per_page,
+        "has_next": has_next
+    }
+
+def rebuild_search_index():
+    if db.session.get_bind().dialect.name != "sqlite":
+        return {"success": True, "message": "Postgres indexes are maintained by the database"}
+
+    db.session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    for kind, model in SEARCH_KINDS.items():
+        db.session.execute(
+            text(f"INSERT INTO {SEARCH_TABLE} (description, kind, source_id, student_id) "
+                 f"SELECT coalesce(description, ''), :kind, id, student_id FROM {model.__tablename__}"),
+            {"kind": kind}
+        )
+    db.session.commit()
+    return {"success": True, "message": "Search index rebuilt"}
@@ -0,0 +1,151 @@
+import random
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from App.database import db, analyze_tables
+from App.models import User, UserRoleEnum, Student, Staff, ServiceLog, ConfirmationRequest, RequestStatus, Accolade
+from App.models import MINUTES_PER_HOUR
+from .AccoladeController import ACCOLADE_THRESHOLDS
+from .SearchController import rebuild_search_index
+from .VersionController import bump_version
+
+ACTIVITIES = [
+    "Food Drive", "Park Cleanup", "Library Book Sorting", "Animal Shelter", "Senior Center",
+    "Community Outreach", "Help Desk", "Beach Cleanup", "Tutoring", "Blood Drive",
+    "Soup Kitchen", "Tree Planting", "Hospital Visit", "Charity Run", "Recycling Drive"
+]
+
+REJECTION_REASONS = [
+    "Not an approved activity", "Hours look too high", "Missing supervisor", "Duplicate request", None
+]
+
+SEED_PASSWORD = "seedpass"
+
+def insert_in_chunks(model, rows, chunk_size, return_ids=False):
+    ids = []
+    returning = db.session.get_bind().dialect.insert_returning
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        if not return_ids:
+            db.session.execute(db.insert(model), chunk)
+        elif returning:
+            ids.extend(db.session.scalars(
+                db.insert(model).returning(model.id, sort_by_parameter_order=True), chunk
+            ).all())
+        else:
+            # without RETURNING (MySQL) only a single-row insert reports its id
+            ids.extend(db.session.execute(db.insert(model).values(row)).inserted_primary_key[0] for row in chunk)
+    return ids
+
+def seed_users(count, role, prefix, password_hash, chunk_size):
+    next_id = (db.session.scalar(db.select(db.func.max(User.id))) or 0) + 1
+    users = [
+        {"username": f"{prefix}_{role.value}{next_id + i}", "password": password_hash, "role": role}
+        for i in range(count)
+    ]
+    return insert_in_chunks(User, users, chunk_size, return_ids=True)
+
+def random_minutes(rng):
+    # mostly short sessions with a long tail, in half hours
+    minutes = rng.lognormvariate(0.8, 0.6) * MINUTES_PER_HOUR
+    return min(24 * MINUTES_PER_HOUR, max(30, round(minutes / 30) * 30))
+
+def seed_database(students=1000, requests=10000, staff=20, seed=None, days=365, chunk_size=10000, prefix="seed"):
+    """Bulk load realistic users, requests, service logs and accolades.
+
+    A few students log most of the hours (activity follows a Pareto
+    distribution), requests are spread evenly over the last `days` days, most
+    requests from the last 30 days are still pending while older ones are
+    about 88% approved and 12% rejected, and accolades are awarded at the
+    moment a student's running total crosses each threshold.
+    Rows are written with multi-row INSERTs in chunks and the same seed always
+    produces the same data.
+    """
+    rng = random.Random(seed)
+    password_hash = generate_password_hash(SEED_PASSWORD)
+
+    staff_user_ids = seed_users(staff, UserRoleEnum.STAFF, prefix, password_hash, chunk_size)
+    staff_ids = insert_in_chunks(Staff, [{"user_id": user_id} for user_id in staff_user_ids], chunk_size, return_ids=True)
+    student_user_ids = seed_users(students, UserRoleEnum.STUDENT, prefix, password_hash, chunk_size)
+    student_ids = insert_in_chunks(
+        Student, [{"user_id": user_id, "total_minutes": 0} for user_id in student_user_ids], chunk_size, return_ids=True
+    )
+    db.session.commit()
+
+    activity_weights = []
+    total_weight = 0.0
+    for _ in student_ids:
+        total_weight += rng.paretovariate(1.2)
+        activity_weights.append(total_weight)
+    staff_pairs = list(zip(staff_ids, staff_user_ids))
+
+    now = datetime.utcnow()
+    start = now - timedelta(days=days)
+    step = timedelta(days=days) / max(requests, 1)
+    totals = dict.fromkeys(student_ids, 0)
+    accolades = []
+    counts = {status: 0 for status in RequestStatus}
+
+    for chunk_start in range(0, requests, chunk_size):
+        request_rows = []
+        log_rows = []
+        for i in range(chunk_start, min(chunk_start + chunk_size, requests)):
+            student_id = rng.choices(student_ids, cum_weights=activity_weights)[0]
+            minutes = random_minutes(rng)
+            description = rng.choice(ACTIVITIES)
+            requested_at = start + step * i + timedelta(seconds=rng.randint(0, 3600))
+            if (now - requested_at).days < 30 and rng.random() < 0.6:
+                status = RequestStatus.PENDING
+            elif rng.random() < 0.12:
+                status = RequestStatus.REJECTED
+            else:
+                status = RequestStatus.APPROVED
+            counts[status] += 1
+
+            row = {
+                "student_id": student_id, "minutes": minutes, "description": description,
+                "status": status, "requested_at": requested_at,
+                "staff_id": None, "responded_at": None, "reason": None
+            }
+            if status != RequestStatus.PENDING:
+                staff_id, staff_user_id = rng.choice(staff_pairs)
+                responded_at = min(now, requested_at + timedelta(hours=rng.randint(1, 24 * 7)))
+                row.update(staff_id=staff_id, responded_at=responded_at)
+                if status == RequestStatus.REJECTED:
+                    row["reason"] = rng.choice(REJECTION_REASONS)
+                else:
+                    log_rows.append({
+                        "student_id": student_id, "staff_id": staff_user_id, "minutes": minutes,
+                        "description": description, "logged_at": responded_at
+                    })
+                    before = totals[student_id]
+                    totals[student_id] = before + minutes
+                    for threshold in ACCOLADE_THRESHOLDS:
+                        if before < threshold * MINUTES_PER_HOUR <= totals[student_id]:
+                            accolades.append({"student_id": student_id, "accolade_type": str(threshold), "awarded_at": responded_at})
+            request_rows.append(row)
+
+        insert_in_chunks(ConfirmationRequest, request_rows, chunk_size)
+        insert_in_chunks(ServiceLog, log_rows, chunk_size)
+        db.session.commit()
+
+    student_totals = [{"id": student_id, "total_minutes": minutes} for student_id, minutes in totals.items()]
+    for chunk_start in range(0, len(student_totals), chunk_size):
+        db.session.execute(db.update(Student), student_totals[chunk_start:chunk_start + chunk_size])
+    insert_in_chunks(Accolade, accolades, chunk_size)
+    bump_version("users", "leaderboard")
+    db.session.commit()
+    # bulk INSERTs skip the mapper events that keep the SQLite search index in sync
+    rebuild_search_index()
+    analyze_tables()
+
+    return {
+        "success": True,
+        "message": f"Seeded {staff} staff, {students} students and {requests} requests",
+        "staff": staff,
+        "students": students,
+        "requests": requests,
+        "approved": counts[RequestStatus.APPROVED],
+        "rejected": counts[RequestStatus.REJECTED],
+        "pending": counts[RequestStatus.PENDING],
+        "accolades": len(accolades)
+    }
@@ -1,55 +1,84 @@
-from datetime import datetime
-from App.database import db
+import math
+from datetime import datetime, timedelta
+from App.database import db, read_only
 from App.models import User, Student, Staff, ServiceLog, ConfirmationRequest, Accolade
-from App.models import RequestStatus
-from .AccoladeController import check_and_award_accolades
+from App.models import RequestStatus, index_descriptions, hours_to_minutes, minutes_to_hours
+from App.schemas import RequestSchema, PendingRequestSchema, ServiceLogSchema
+from App.queries import (
+    user_by_username, requests_for_student, pending_requests_for_student, pending_requests, service_logs_for_student
+)
+from .AccoladeController import check_and_award_accolades, award_accolades_for_students, update_standings
+from .VersionController import bump_version
+from .EventController import publish_event, publish_pending_count
+from .ArchiveController import get_archive_summary
+from .IdempotencyController import replay_response, commit_with_key
 
+CLAIM_LEASE_SECONDS = 300
 
 def validate_hours(hours):
-    if hours <= 0:
+    if not math.isfinite(hours):
+        return {"success": False, "message": "Hours must be a number"}
+    if hours_to_minutes(hours) <= 0:
         return {"success": False, "message": "Hours must be greater than 0"}
     if hours > 24:
         return {"success": False, "message": "Hours cannot exceed 24 per session"}
     return {"success": True, "message": "Valid hours"}
 
-def submit_hours(hours, description, current_user):
+def submitted_result(confirmation_request):
+    return {
+        "success": True, 
+        "message": f"Submitted {confirmation_request.hours} hours for approval (Request ID: {confirmation_request.id})\nStaff will review and approve your request.",
+        "request_id": confirmation_request.id
+    }
+
+def submit_hours_scope(username):
+    # a student's Idempotency-Keys only replay their own submissions
+    return f"submit_hours:{username}"
+
+def submit_hours(hours, description, current_user, idempotency_key=None):
     if not current_user or current_user["role"] != "student":
         return {"success": False, "message": "Only students can submit hours"}
     
+    scope = submit_hours_scope(current_user['username'])
+    if idempotency_key is not None:
+        replay = replay_response(scope, idempotency_key)
+        if replay is not None:
+            return replay
+    
     validation_result = validate_hours(hours)
     if not validation_result["success"]:
         return validation_result
     
-    student_user = User.query.filter_by(username=current_user["username"]).first()
+    student_user = user_by_username(current_user["username"])
     if not student_user or not student_user.student:
         return {"success": False, "message": "Student profile not found"}
     
     confirmation_request = ConfirmationRequest(
         student_id=student_user.student.id,
-        hours=hours,
+        minutes=hours_to_minutes(hours),
         description=description,
         status=RequestStatus.PENDING
     )
     
     db.session.add(confirmation_request)
-    db.session.commit()
-    
-    return {
-        "success": True, 
-        "message": f"Submitted {hours} hours for approval (Request ID: {confirmation_request.id})\nStaff will review and approve your request."
-    }
+    db.session.flush()
+    result = submitted_result(confirmation_request)
+    replay = commit_with_key(scope, idempotency_key, result)
+    if replay is not None:
+        return replay
+    publish_pending_count()
+    return result
 
+@read_only
 def get_student_requests(current_user):
     if not current_user or current_user["role"] != "student":
         return {"success": False, "message": "Only students can view their requests"}
     
-    student_user = User.query.filter_by(username=current_user["username"]).first()
+    student_user = user_by_username(current_user["username"])
     if not student_user or not student_user.student:
         return {"success": False, "message": "Student profile not found"}
     
-    requests = ConfirmationRequest.query.filter_by(
-        student_id=student_user.student.id
-    ).order_by(ConfirmationRequest.requested_at.desc()).all()
+    requests = requests_for_student(student_user.student.id)
     
     if not requests:
         return {
@@ -58,41 +87,18 @@ def get_student_requests(current_user):
             "requests": []
         }
     
-    formatted_requests = []
-    for req in requests:
-        formatted_requests.append({
-            "id": req.id,
-            "hours": req.hours,
-            "status": req.status.value.title(),
-            "description": req.description,
-            "submitted_at": req.requested_at.strftime('%Y-%m-%d %H:%M') if req.requested_at else "Unknown",
-            "reason": req.reason
-        })
-    
     return {
         "success": True,
         "message": f"Your Hour Requests:",
-        "requests": formatted_requests
+        "requests": RequestSchema.dump_many(requests)
     }
 
 def get_pending_requests_for_student(student_username):
-    student_user = User.query.filter_by(username=student_username).first()
+    student_user = user_by_username(student_username)
     if not student_user or not student_user.student:
         return {"success": False, "message": f"Student '{student_username}' not found", "requests": []}
     
-    requests = ConfirmationRequest.query.filter_by(
-        student_id=student_user.student.id,
-        status=RequestStatus.PENDING
-    ).all()
-    
-    formatted_requests = []
-    for req in requests:
-        formatted_requests.append({
-            "id": req.id,
-            "hours": req.hours,
-            "description": req.description,
-            "submitted_at": req.requested_at.strftime('%Y-%m-%d %H:%M') if req.requested_at else "Unknown"
-        })
+    requests = pending_requests_for_student(student_user.student.id)
     
     return {
         "success": True,
@@ -101,10 +107,16 @@ def get_pending_requests_for_student(student_username):
             "username": student_username,
             "current_hours": student_user.student.total_hours
         },
-        "requests": formatted_requests
+        "requests": PendingRequestSchema.dump_many(requests)
     }
 
-def approve_request(request_id, staff_user):
+def approve_request(request_id, staff_user, idempotency_key=None):
+    scope = f"approve_request:{staff_user.username}"
+    if idempotency_key is not None:
+        replay = replay_response(scope, idempotency_key)
+        if replay is not None:
+            return replay
+    
     request = ConfirmationRequest.query.get(request_id)
     if not request:
         return {"success": False, "message": "Request not found"}
@@ -112,6 +124,9 @@ def approve_request(request_id, staff_user):
     if request.status != RequestStatus.PENDING:
         return {"success": False, "message": "Request is not pending"}
     
+    if is_claimed_by_other(request, staff_user):
+        return {"success": False, "message": "Request is being reviewed by another staff member"}
+    
     request.staff_id = staff_user.staff.id
     request.status = RequestStatus.APPROVED
     request.responded_at = datetime.utcnow()
@@ -119,23 +134,35 @@ def approve_request(request_id, staff_user):
     service_log = ServiceLog(
         student_id=request.student_id,
         staff_id=staff_user.id,
-        hours=request.hours,
+        minutes=request.minutes,
         description=request.description,
     )
     db.session.add(service_log)
     
     student_profile = Student.query.get(request.student_id)
-    student_profile.total_hours += request.hours
+    student_profile.total_minutes += request.minutes
     
-    check_and_award_accolades(student_profile)
-    
-    db.session.commit()
+    bump_version("leaderboard")
+    # committed below together with the idempotency key
+    check_and_award_accolades(student_profile, commit=False)
     
     student_user = User.query.get(student_profile.user_id)
-    return {
+    result = {
         "success": True,
         "message": f"Approved! {student_user.username} now has {student_profile.total_hours} total hours."
     }
+    replay = commit_with_key(scope, idempotency_key, result)
+    if replay is not None:
+        return replay
+    
+    update_standings([(student_profile.total_minutes - request.minutes, student_profile.total_minutes)])
+    publish_event("leaderboard", {
+        "username": student_user.username,
+        "total_hours": student_profile.total_hours,
+        "added_hours": request.hours
+    })
+    publish_pending_count()
+    return result
 
 def reject_request(request_id, staff_user, reason=None):
     request = ConfirmationRequest.query.get(request_id)
@@ -145,6 +172,9 @@ def reject_request(request_id, staff_user, reason=None):
     if request.status != RequestStatus.PENDING:
         return {"success": False, "message": "Request is not pending"}
     
+    if is_claimed_by_other(request, staff_user):
+        return {"success": False, "message": "Request is being reviewed by another staff member"}
+    
     request.staff_id = staff_user.staff.id
     request.status = RequestStatus.REJECTED
     request.responded_at = datetime.utcnow()
@@ -152,6 +182,7 @@ def reject_request(request_id, staff_user, reason=None):
         request.reason=reason
 
     db.session.commit()
+    publish_pending_count()
     
     student_user = User.query.get(request.student.user_id)
     message = f"Rejected request from {student_user.username}"
@@ -160,48 +191,242 @@ def reject_request(request_id, staff_user, reason=None):
     
     return {"success": True, "message": message}
 
+def reviewable_requests(request_ids, staff_user, now):
+    # pending requests in request_ids that no other reviewer currently holds
+    return db.and_(
+        ConfirmationRequest.id.in_(request_ids),
+        ConfirmationRequest.status == RequestStatus.PENDING,
+        db.or_(
+            ConfirmationRequest.claimed_by.is_(None),
+            ConfirmationRequest.claimed_by == staff_user.staff.id,
+            ConfirmationRequest.claim_expires_at < now
+        )
+    )
+
+def mark_requests(request_ids, staff_user, status, now, reason=None):
+    # flips the reviewable requests in one statement and returns the rows it changed
+    changed = (ConfirmationRequest.id, ConfirmationRequest.student_id, ConfirmationRequest.minutes, ConfirmationRequest.description)
+    values = {"status": status, "staff_id": staff_user.staff.id, "responded_at": now}
+    if reason:
+        values["reason"] = reason
+    
+    if db.session.get_bind().dialect.update_returning:
+        return db.session.execute(
+            db.update(ConfirmationRequest)
+            .where(reviewable_requests(request_ids, staff_user, now))
+            .values(**values)
+            .returning(*changed)
+            .execution_options(synchronize_session=False)
+        ).all()
+    
+    rows = db.session.execute(
+        db.select(*changed).where(reviewable_requests(request_ids, staff_user, now)).with_for_update()
+    ).all()
+    db.session.execute(
+        db.update(ConfirmationRequest)
+        .where(ConfirmationRequest.id.in_([row.id for row in rows]))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return rows
+
+def record_approvals(approved, staff_user, now):
+    # service logs, totals, accolades and the leaderboard version for rows mark_requests approved; the caller commits
+    logs = [
+        {"student_id": row.student_id, "staff_id": staff_user.id, "minutes": row.minutes, "description": row.description, "logged_at": now}
+        for row in approved
+    ]
+    if db.session.get_bind().dialect.insert_returning:
+        log_ids = db.session.scalars(db.insert(ServiceLog).returning(ServiceLog.id), logs).all()
+    else:
+        db.session.execute(db.insert(ServiceLog), logs)
+        # every log written here has this staff member and timestamp
+        log_ids = db.session.scalars(
+            db.select(ServiceLog.id).where(ServiceLog.staff_id == staff_user.id, ServiceLog.logged_at == now)
+        ).all()
+    index_descriptions(db.session.connection(), "log", log_ids)
+    
+    student_ids = {row.student_id for row in approved}
+    approved_minutes = db.select(db.func.sum(ConfirmationRequest.minutes)).where(
+        ConfirmationRequest.student_id == Student.id,
+        ConfirmationRequest.id.in_([row.id for row in approved])
+    ).scalar_subquery()
+    db.session.execute(
+        db.update(Student)
+        .where(Student.id.in_(student_ids))
+        .values(total_minutes=Student.total_minutes + approved_minutes)
+        .execution_options(synchronize_session=False)
+    )
+    award_accolades_for_students(student_ids)
+    bump_version("leaderboard")
+    return student_ids
+
+def publish_approvals(approved):
+    added_minutes = {}
+    for row in approved:
+        added_minutes[row.student_id] = added_minutes.get(row.student_id, 0) + row.minutes
+    students = db.session.execute(
+        db.select(Student.id, User.username, Student.total_minutes)
+        .join(User, User.id == Student.user_id)
+        .where(Student.id.in_(added_minutes))
+    ).all()
+    update_standings([(student.total_minutes - added_minutes[student.id], student.total_minutes) for student in students])
+    for student in students:
+        publish_event("leaderboard", {
+            "username": student.username,
+            "total_hours": minutes_to_hours(student.total_minutes),
+            "added_hours": minutes_to_hours(added_minutes[student.id])
+        })
+
+def bulk_approve_requests(request_ids, staff_user):
+    now = datetime.utcnow()
+    approved = mark_requests(request_ids, staff_user, RequestStatus.APPROVED, now)
+    if not approved:
+        return {"success": False, "message": "No pending requests were approved"}
+    
+    student_ids = record_approvals(approved, staff_user, now)
+    db.session.commit()
+    publish_approvals(approved)
+    publish_pending_count()
+    
+    return {"success": True, "message": f"Approved {len(approved)} requests for {len(student_ids)} students"}
+
+def bulk_reject_requests(request_ids, staff_user, reason=None):
+    rejected = mark_requests(request_ids, staff_user, RequestStatus.REJECTED, datetime.utcnow(), reason)
+    if not rejected:
+        return {"success": False, "message": "No pending requests were rejected"}
+    db.session.commit()
+    publish_pending_count()
+    return {"success": True, "message": f"Rejected {len(rejected)} requests"}
+
+class ReviewSession:
+    """One staff member's review of one student's pending requests.
+
+    The requests are loaded once and each decision is only recorded until
+    commit(), which applies all of them in one transaction through the same
+    set-based statements as the bulk actions. A request another reviewer
+    decided in the meantime is no longer pending, so the UPDATE skips it and
+    it is reported as a conflict instead of being decided twice. Used as a
+    context manager, the decisions are committed on a normal exit and
+    rolled back if the block raises.
+    """
+
+    def __init__(self, student_username, staff_user):
+        self.student_username = student_username
+        self.staff_user = staff_user
+        self.decisions = {}
+        result = get_pending_requests_for_student(student_username)
+        self.found = result["success"]
+        self.message = result["message"]
+        self.student = result.get("student")
+        self.requests = result["requests"]
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.result = None
+        if exc_type is not None:
+            self.rollback()
+        elif self.decisions:
+            self.result = self.commit()
+    
+    def undecided(self):
+        return [request for request in self.requests if request["id"] not in self.decisions]
+    
+    def approve(self, request_id):
+        self.decide(request_id, RequestStatus.APPROVED, None)
+    
+    def reject(self, request_id, reason=None):
+        self.decide(request_id, RequestStatus.REJECTED, reason or None)
+    
+    def decide(self, request_id, status, reason):
+        if request_id not in {request["id"] for request in self.requests}:
+            raise ValueError(f"Request {request_id} is not pending for {self.student_username}")
+        # re-deciding moves the request to the end, so undo always takes back the latest decision
+        self.decisions.pop(request_id, None)
+        self.decisions[request_id] = (status, reason)
+    
+    def undo(self):
+        if not self.decisions:
+            return None
+        request_id = next(reversed(list(self.decisions)))
+        del self.decisions[request_id]
+        return request_id
+    
+    def commit(self):
+        now = datetime.utcnow()
+        approve_ids = [request_id for request_id, (status, _) in self.decisions.items() if status == RequestStatus.APPROVED]
+        reject_ids = {}
+        for request_id, (status, reason) in self.decisions.items():
+            if status == RequestStatus.REJECTED:
+                reject_ids.setdefault(reason, []).append(request_id)
+        
+        approved = mark_requests(approve_ids, self.staff_user, RequestStatus.APPROVED, now) if approve_ids else []
+        if approved:
+            record_approvals(approved, self.staff_user, now)
+        rejected = []
+        for reason, request_ids in reject_ids.items():
+            rejected += mark_requests(request_ids, self.staff_user, RequestStatus.REJECTED, now, reason)
+        db.session.commit()
+        
+        if approved:
+            publish_approvals(approved)
+        if approved or rejected:
+            publish_pending_count()
+        
+        changed = {row.id for row in approved} | {row.id for row in rejected}
+        conflicts = [request_id for request_id in self.decisions if request_id not in changed]
+        self.decisions = {}
+        message = f"Approved {len(approved)} and rejected {len(rejected)} requests for {self.student_username}"
+        if conflicts:
+            message += f"\nSkipped {len(conflicts)} requests another reviewer already handled: {', '.join(map(str, conflicts))}"
+        return {
+            "success": not conflicts,
+            "message": message,
+            "approved": len(approved),
+            "rejected": len(rejected),
+            "conflicts": conflicts
+        }
+    
+    def rollback(self):
+        self.decisions = {}
+        db.session.rollback()
+
+@read_only
 def get_student_service_logs(current_user):
     if not current_user or current_user["role"] != "student":
         return {"success": False, "message": "Only students can view their service logs"}
     
-    student_user = User.query.filter_by(username=current_user["username"]).first()
+    student_user = user_by_username(current_user["username"])
     if not student_user or not student_user.student:
         return {"success": False, "message": "Student profile not found"}
     
-    service_logs = ServiceLog.query.filter_by(
-        student_id=student_user.student.id
-    ).order_by(ServiceLog.logged_at.desc()).all()
+    service_logs = service_logs_for_student(student_user.student.id)
+    archived = get_archive_summary(student_user.student.id)
     
     if not service_logs:
         return {
             "success": True,
             "message": "No confirmed service logs found. Submit hours for approval first!",
             "logs": [],
-            "total_hours": student_user.student.total_hours
+            "total_hours": student_user.student.total_hours,
+            "archived": archived
         }
     
-    formatted_logs = []
-    for log in service_logs:
-        staff_user = User.query.get(log.staff_id)
-        formatted_logs.append({
-            "id": log.id,
-            "hours": log.hours,
-            "description": log.description,
-            "approved_by": staff_user.username,
-            "logged_at": log.logged_at.strftime('%Y-%m-%d %H:%M')
-        })
-    
     return {
         "success": True,
         "message": f"Confirmed Service Logs for {current_user['username']}:",
-        "logs": formatted_logs,
-        "total_hours": student_user.student.total_hours
+        "logs": ServiceLogSchema.dump_many(service_logs),
+        "total_hours": student_user.student.total_hours,
+        "archived": archived
     }
 
+@read_only
 def get_pending_students():
-    pending_requests = ConfirmationRequest.query.filter_by(status=RequestStatus.PENDING).all()
+    pending = pending_requests()
     
-    if not pending_requests:
+    if not pending:
         return {
             "success": True,
             "message": "No pending requests from any students.",
@@ -209,7 +434,7 @@ def get_pending_students():
         }
     
     students_with_requests = {}
-    for req in pending_requests:
+    for req in pending:
         student_id = req.student_id
         if student_id not in students_with_requests:
             students_with_requests[student_id] = []
@@ -220,7 +445,7 @@ def get_pending_students():
         student = Student.query.get(student_id)
         student_user = User.query.get(student.user_id)
         
-        total_pending_hours = sum(req.hours for req in requests)
+        total_pending_hours = minutes_to_hours(sum(req.minutes for req in requests))
         formatted_students.append({
             "username": student_user.username,
             "current_hours": student.total_hours,
@@ -234,24 +459,136 @@ def get_pending_students():
         "students": formatted_students
     }
 
-def interactive_request_review(student_username, staff_user):
+def is_claimed_by_other(request, staff_user):
+    if request.claimed_by is None or request.claimed_by == staff_user.staff.id:
+        return False
+    return request.claim_expires_at is not None and request.claim_expires_at > datetime.utcnow()
+
+def claim_pending_requests(staff_user, limit=5, lease_seconds=CLAIM_LEASE_SECONDS):
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    staff_id = staff_user.staff.id
+    
+    # Postgres and MySQL lock the selected rows and skip ones another reviewer
+    # is claiming right now. SQLite has no row locks, so the UPDATE checks the
+    # rows are still claimable and another reviewer's claim in between wins.
+    # Either way a claim is only a lease, so requests held by a reviewer who
+    # walked away become claimable again once it expires.
+    claimable = (
+        ConfirmationRequest.status == RequestStatus.PENDING,
+        db.or_(
+            ConfirmationRequest.claimed_by.is_(None),
+            ConfirmationRequest.claimed_by == staff_id,
+            ConfirmationRequest.claim_expires_at < now
+        )
+    )
+    # selected first and updated by id: MySQL can't UPDATE a table it selects
+    # from in a subquery, nor take a LIMIT inside IN
+    ids = db.session.scalars(
+        db.select(ConfirmationRequest.id).where(*claimable)
+        .order_by(ConfirmationRequest.requested_at, ConfirmationRequest.id)
+        .limit(limit).with_for_update(skip_locked=True)
+    ).all()
+    if ids:
+        db.session.execute(
+            db.update(ConfirmationRequest)
+            .where(ConfirmationRequest.id.in_(ids), *claimable)
+            .values(claimed_by=staff_id, claim_expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    
+    rows = db.session.execute(
+        db.select(ConfirmationRequest, User.username)
+        .join(Student, Student.id == ConfirmationRequest.student_id)
+        .join(User, User.id == Student.user_id)
+        .where(
+            ConfirmationRequest.claimed_by == staff_id,
+            ConfirmationRequest.claim_expires_at == expires_at,
+            ConfirmationRequest.status == RequestStatus.PENDING
+        )
+        .order_by(ConfirmationRequest.requested_at, ConfirmationRequest.id)
+    ).all()
+    
+    formatted_requests = []
+    for req, username in rows:
+        formatted_requests.append({
+            "id": req.id,
+            "student": username,
+            "hours": req.hours,
+            "description": req.description,
+            "submitted_at": req.requested_at.strftime('%Y-%m-%d %H:%M') if req.requested_at else "Unknown"
+        })
+    
+    return {
+        "success": True,
+        "message": f"Claimed {len(formatted_requests)} pending requests until {expires_at.strftime('%H:%M:%S')} UTC",
+        "requests": formatted_requests
+    }
+
+def release_claims(staff_user):
+    db.session.execute(
+        db.update(ConfirmationRequest)
+        .where(
+            ConfirmationRequest.claimed_by == staff_user.staff.id,
+            ConfirmationRequest.status == RequestStatus.PENDING
+        )
+        .values(claimed_by=None, claim_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+def review_claimed_requests(staff_user, limit=5):
     while True:
-        result = get_pending_requests_for_student(student_username)
-        if not result["success"]:
-            print(result["message"])
-            break
-        
+        result = claim_pending_requests(staff_user, limit)
         requests = result["requests"]
         if not requests:
-            print(f"\nNo pending requests for {student_username}.")
+            print("\nNo unclaimed pending requests left.")
             break
         
-        display_student_requests(student_username, requests, result["student"])
+        print(f"\n{result['message']}")
+        for request in requests:
+            display_request_details(request, request["student"])
+            decision = process_request_decision(request["id"], staff_user)
+            print(decision["message"])
+        
+        continue_review = input("\nClaim the next batch? (y/n): ").strip().lower()
+        if continue_review != 'y':
+            break
+    
+    release_claims(staff_user)
+
+def interactive_request_review(student_username, staff_user):
+    with ReviewSession(student_username, staff_user) as review:
+        if not review.found:
+            print(review.message)
+            return
+        try:
+            review_requests(review, student_username)
+        except (KeyboardInterrupt, EOFError):
+            print("\nExiting review mode.")
+            if review.decisions and not confirm_save(len(review.decisions)):
+                review.rollback()
+                print("Discarded the decisions.")
+    if review.result:
+        print(review.result["message"])
+
+def review_requests(review, student_username):
+    while True:
+        requests = review.undecided()
+        if not requests:
+            print(f"\nNo undecided requests left for {student_username}.")
+            return
+        
+        display_student_requests(student_username, requests, review.student)
         
         choice = get_request_choice(requests)
         if choice is None:
-            print("Exiting review mode.")
-            break
+            return
+        elif choice == "undo":
+            request_id = review.undo()
+            print(f"Undid the decision on request #{request_id}." if request_id else "Nothing to undo.")
+            continue
         elif choice is False:
             continue
         
@@ -259,15 +596,22 @@ def interactive_request_review(student_username, staff_user):
         
         display_request_details(selected_request, student_username)
         
-        result = process_request_decision(selected_request["id"], staff_user)
-        print(result["message"])
-        
-        if not result["success"]:
+        decision = ask_decision()
+        if decision is None:
+            print("Invalid choice. Skipping this request.")
             continue
-        
-        continue_review = input("\nContinue reviewing? (y/n): ").strip().lower()
-        if continue_review != 'y':
-            break
+        status, reason = decision
+        if status == RequestStatus.APPROVED:
+            review.approve(selected_request["id"])
+        else:
+            review.reject(selected_request["id"], reason)
+        print(f"Request #{selected_request['id']} marked {status.value}. Decisions are saved when you finish.")
+
+def confirm_save(count):
+    try:
+        return input(f"Save {count} decisions? [y/N]: ").strip().lower() == 'y'
+    except (KeyboardInterrupt, EOFError):
+        return False
 
 def display_student_requests(student_username, requests, student_info):
     print(f"\nReviewing requests for: {student_username}")
@@ -281,10 +625,12 @@ def display_student_requests(student_username, requests, student_info):
 
 def get_request_choice(requests):
     try:
-        choice = input(f"Select request (1-{len(requests)}) or 'q' to quit: ").strip()
+        choice = input(f"Select request (1-{len(requests)}), 'u' to undo or 'q' to finish: ").strip()
         
         if choice.lower() == 'q':
             return None
+        if choice.lower() == 'u':
+            return "undo"
         
         choice_num = int(choice)
         if choice_num < 1 or choice_num > len(requests):
@@ -307,15 +653,22 @@ def display_request_details(request, student_username):
     print(f"Description: {request['description']}")
     print(f"Submitted: {request['submitted_at']}")
 
-def process_request_decision(request_id, staff_user):
+def ask_decision():
     decision = input("\nApprove this request? (y/n/r for reason): ").strip().lower()
     
     if decision == 'y':
-        return approve_request(request_id, staff_user)
+        return RequestStatus.APPROVED, None
     elif decision == 'n':
-        return reject_request(request_id, staff_user)
+        return RequestStatus.REJECTED, None
     elif decision == 'r':
-        reason = input("Enter rejection reason: ").strip()
-        return reject_request(request_id, staff_user, reason)
-    else:
-        return {"success": False, "message": "Invalid choice. Skipping this request."}
\ No newline at end of file
+        return RequestStatus.REJECTED, input("Enter rejection reason: ").strip()
+    return None
+
+def process_request_decision(request_id, staff_user):
+    decision = ask_decision()
+    if decision is None:
+        return {"success": False, "message": "Invalid choice. Skipping this request."}
+    status, reason = decision
+    if status == RequestStatus.APPROVED:
+        return approve_request(request_id, staff_user)
+    return reject_request(request_id, staff_user, reason)
\ No newline at end of file
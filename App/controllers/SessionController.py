@@ -1,23 +1,31 @@
 import json
 import os
+from contextlib import contextmanager
 from datetime import datetime
 from functools import wraps
-from App.models import User
+from App.database import current_institution
+from App.queries import user_by_username
 
 # Session management using a file
 SESSION_FILE = ".current_user.json"
 
+# Inside cached_session() the file is read once and kept in sync in memory
+_cached_session = []
+
 def set_current_user(user):
     session_data = {
         "username": user.username,
         "role": user.role.value,
         "user_id": user.id,
+        "institution": current_institution.get(),
         "login_time": datetime.utcnow().isoformat()
     }
     with open(SESSION_FILE, "w") as f:
         json.dump(session_data, f)
+    if _cached_session:
+        _cached_session[-1] = session_data
 
-def get_current_user():
+def read_session_file():
     if not os.path.exists(SESSION_FILE):
         return None
     try:
@@ -26,12 +34,28 @@ def get_current_user():
     except (json.JSONDecodeError, FileNotFoundError):
         return None
 
+def get_current_user():
+    if _cached_session:
+        return _cached_session[-1]
+    return read_session_file()
+
 def clear_current_user():
     if os.path.exists(SESSION_FILE):
         os.remove(SESSION_FILE)
+    if _cached_session:
+        _cached_session[-1] = None
+
+@contextmanager
+def cached_session():
+    # for running many commands in one process, e.g. flask run-batch
+    _cached_session.append(read_session_file())
+    try:
+        yield
+    finally:
+        _cached_session.pop()
 
 def login(username, password):
-    user = User.query.filter_by(username=username).first()
+    user = user_by_username(username)
     if user and user.check_password(password):
         set_current_user(user)
         return {
@@ -66,7 +90,7 @@ def get_current_user_info():
 
 def require_login():
     user = get_current_user()
-    if not user:
+    if not user or user.get("institution") != current_institution.get():
         return {
             "success": False,
             "message": "You must login first. Use: flask auth login <username>",
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import subprocess
+from flask import current_app
+from sqlalchemy.schema import CreateIndex, CreateTable
+from App.database import db, current_engine
+
+# Saves a whole database to a file and loads it back in one bulk operation:
+# SQLite's online backup API copies every page at once, and Postgres uses a
+# pg_dump custom-format archive restored with pg_restore.
+
+SNAPSHOT_EXTENSIONS = {"sqlite": ".sqlite", "postgresql": ".dump"}
+
+def schema_fingerprint(engine):
+    # changes whenever a model changes, so snapshots of an older schema are never restored
+    ddl = []
+    for table in db.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(engine)))
+        ddl.extend(str(CreateIndex(index).compile(engine)) for index in sorted(table.indexes, key=lambda index: index.name))
+    return hashlib.sha1("\n".join(ddl).encode()).hexdigest()[:12]
+
+def snapshot_path(name, engine=None):
+    engine = engine or current_engine()
+    dialect = engine.dialect.name
+    if dialect not in SNAPSHOT_EXTENSIONS:
+        raise RuntimeError(f"Snapshots are not supported on {dialect}")
+    filename = f"{name}-{schema_fingerprint(engine)}{SNAPSHOT_EXTENSIONS[dialect]}"
+    return os.path.join(current_app.config['SNAPSHOT_DIR'], filename)
+
+def pg_command(program, engine):
+    if shutil.which(program) is None:
+        raise RuntimeError(f"{program} was not found on PATH")
+    url = engine.url
+    args = [program, "--no-owner", "--dbname", url.database]
+    for flag, value in (("--host", url.host), ("--port", url.port), ("--username", url.username)):
+        if value:
+            args += [flag, str(value)]
+    env = dict(os.environ)
+    if url.password:
+        env["PGPASSWORD"] = url.password
+    return args, env
+
+def save_snapshot(path, engine=None):
+    engine = engine or current_engine()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # write next to the target and rename, so a crash never leaves half a snapshot behind
+    partial = f"{path}.{os.getpid()}.partial"
+    if engine.dialect.name == "postgresql":
+        args, env = pg_command("pg_dump", engine)
+        subprocess.run(args + ["--format", "custom", "--file", partial], env=env, check=True)
+    else:
+        connection = engine.raw_connection()
+        target = sqlite3.connect(partial)
+        try:
+            connection.driver_connection.backup(target)
+        finally:
+            target.close()
+            connection.close()
+    os.replace(partial, path)
+    return {"success": True, "message": f"Saved snapshot to {path}", "path": path}
+
+def restore_snapshot(path, engine=None):
+    """Replace the whole database with the snapshot at path."""
+    engine = engine or current_engine()
+    if not os.path.exists(path):
+        return {"success": False, "message": f"No snapshot at {path}"}
+    # nothing may hold the old tables open while they are replaced
+    db.session.remove()
+    if engine.dialect.name == "postgresql":
+        args, env = pg_command("pg_restore", engine)
+        subprocess.run(args + ["--clean", "--if-exists", "--single-transaction", path], env=env, check=True)
+    else:
+        source = sqlite3.connect(path)
+        connection = engine.raw_connection()
+        try:
+            source.backup(connection.driver_connection)
+        finally:
+            connection.close()
+            source.close()
+    return {"success": True, "message": f"Restored snapshot from {path}", "path": path}
+
+def restore_or_build(name, build, engine=None, rebuild=False):
+    """Restore the named snapshot for the current schema, or run build() and save one.
+
+    Returns True when the database came from an existing snapshot. With
+    rebuild, build() always runs and replaces the snapshot.
+    """
+    engine = engine or current_engine()
+    path = snapshot_path(name, engine)
+    if not rebuild and restore_snapshot(path, engine)["success"]:
+        return True
+    build()
+    db.session.remove()
+    save_snapshot(path, engine)
+    return False
@@ -1,5 +1,9 @@
-from App.models import User, UserRoleEnum, Student, Staff
-from App.database import db
+from App.models import User, UserRoleEnum, Student, Staff, minutes_to_hours
+from App.database import db, read_only
+from App.schemas import UserSchema
+from App.queries import user_by_username, user_profiles
+from .VersionController import bump_version
+from .AccoladeController import update_standings
 
 def create_user(username, password, role):
     existing = User.query.filter_by(username=username).first()
@@ -26,7 +30,10 @@ def create_user(username, password, role):
         )
         db.session.add(staff)
     
+    bump_version("users", "leaderboard")
     db.session.commit()
+    # new students start with no hours
+    update_standings([(None, 0)] if role == 'student' else [])
     return {"success": True, "message": f'User {username} created with role {role}!', "user": user}
 
 def validate_user_creation(username, password, role):
@@ -38,8 +45,9 @@ def validate_user_creation(username, password, role):
     
     return {"success": True, "message": "Valid parameters"}
 
+@read_only
 def list_users_formatted():
-    users = User.query.all()
+    users = user_profiles()
     
     if not users:
         return {"success": True, "message": "No users found", "users": []}
@@ -47,10 +55,10 @@ def list_users_formatted():
     formatted_users = []
     for user in users:
         profile_info = ""
-        if user.student:
-            profile_info = f"Student ID: {user.student.id} | Hours: {user.student.total_hours}"
-        elif user.staff:
-            profile_info = f"Staff ID: {user.staff.id}"
+        if user.student_id is not None:
+            profile_info = f"Student ID: {user.student_id} | Hours: {minutes_to_hours(user.total_minutes)}"
+        elif user.staff_id is not None:
+            profile_info = f"Staff ID: {user.staff_id}"
         else:
             profile_info = "No profile"
         
@@ -67,8 +75,7 @@ def list_users_formatted():
     }
 
 def get_user_by_username(username):
-    result = db.session.execute(db.select(User).filter_by(username=username))
-    return result.scalar_one_or_none()
+    return user_by_username(username)
 
 def get_user(id):
     return db.session.get(User, id)
@@ -76,17 +83,16 @@ def get_user(id):
 def get_all_users():
     return db.session.scalars(db.select(User)).all()
 
+@read_only
 def get_all_users_json():
-    users = get_all_users()
-    if not users:
-        return []
-    users = [user.get_json() for user in users]
-    return users
+    return UserSchema.dump_many(get_all_users())
 
 def update_user(id, username):
     user = get_user(id)
     if user:
         user.username = username
+        bump_version("users", "leaderboard")
         db.session.commit()
+        update_standings([])
         return True
     return None
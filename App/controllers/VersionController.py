@@ -0,0 +1,54 @@
+from datetime import datetime
+from flask import Response, request
+from werkzeug.http import is_resource_modified
+from App.database import db, current_institution, read_only
+from App.models import DataVersion
+from App.schemas import dumps
+from App.queries import DATA_VERSION
+
+def bump_version(*names):
+    # runs inside the caller's transaction so the new version commits with the change
+    now = datetime.utcnow()
+    for name in names:
+        updated = db.session.execute(
+            db.update(DataVersion)
+            .where(DataVersion.name == name)
+            .values(version=DataVersion.version + 1, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if updated.rowcount == 0:
+            db.session.add(DataVersion(name=name, version=1, updated_at=now))
+
+# read from the same database as the read_only functions whose data it versions,
+# so a lagging replica never pairs its old data with the primary's new version
+@read_only
+def get_version(name):
+    row = db.session.execute(DATA_VERSION, {"name": name}).first()
+    if not row:
+        return 0, None
+    return row.version, row.updated_at
+
+def version_etag(name, version, updated_at, *variant):
+    # (ETag, Last-Modified) of name's data at version
+    stamp = updated_at.strftime('%Y%m%d%H%M%S%f') if updated_at else "0"
+    # versions count separately in each institution's database
+    etag = "-".join([str(current_institution.get() or ""), name, str(version), stamp, *map(str, variant)])
+    last_modified = updated_at.replace(microsecond=0) if updated_at else None
+    return etag, last_modified
+
+def conditional_json_response(name, produce, *variant):
+    """Answer 304 Not Modified from the version row alone, only calling produce()
+    to build the body when the client's copy is out of date."""
+    etag, last_modified = version_etag(name, *get_version(name), *variant)
+
+    response = Response(mimetype="application/json")
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response.status_code = 304
+        return response
+
+    response.set_data(dumps(produce()))
+    return response
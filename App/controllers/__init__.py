@@ -1,6 +1,18 @@
+from .InstitutionController import *
 from .UserController import *
 from .AuthController import *
+from .SnapshotController import *
 from .InitializeController import *
+from .IdempotencyController import *
 from .ServiceController import *
 from .AccoladeController import *
-from .SessionController import *
\ No newline at end of file
+from .SessionController import *
+from .RateLimitController import *
+from .ProfileController import *
+from .SearchController import *
+from .VersionController import *
+from .EventController import *
+from .HealthController import *
+from .SeedController import *
+from .ArchiveController import *
+from .BatchController import *
@@ -1,14 +1,218 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session, _app_ctx_id
 from flask_migrate import Migrate
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
 
+REPLICA_BIND = "replica"
+INSTITUTION_BIND_PREFIX = "institution:"
 
-db = SQLAlchemy()
+# The institution whose database this request or command works in; None is the main database
+current_institution = ContextVar("current_institution", default=None)
+
+def institution_bind(name):
+    return f"{INSTITUTION_BIND_PREFIX}{name}"
+
+def institution_names():
+    return [key[len(INSTITUTION_BIND_PREFIX):] for key in db.engines if key and key.startswith(INSTITUTION_BIND_PREFIX)]
+
+def switch_institution(name):
+    """Make name the current institution and return the token to reset it with.
+
+    Rows are only identified by primary key, so a session that moves to
+    another institution writes out what it has and forgets the objects it
+    loaded, rather than returning one school's user for another's id.
+    """
+    if name is not None and name not in institution_names():
+        raise LookupError(f"Unknown institution '{name}'")
+    if name != current_institution.get():
+        db.session.flush()
+        db.session.expunge_all()
+    return current_institution.set(name)
+
+@contextmanager
+def use_institution(name):
+    previous = current_institution.get()
+    token = switch_institution(name)
+    try:
+        yield
+    finally:
+        if previous != name:
+            db.session.flush()
+            db.session.expunge_all()
+        current_institution.reset(token)
+
+def current_engine():
+    institution = current_institution.get()
+    return db.engines[institution_bind(institution)] if institution is not None else db.engine
+
+class RoutingSession(Session):
+    """Sends everything to the current institution's database when one is set,
+    and otherwise sends reads made inside a read_only function to the replica bind.
+
+    Once the session has written anything it sticks to the primary so the
+    caller always reads its own writes. A session joined to connections (see
+    joined_session) uses the one opened on the chosen engine.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and (self._flushing or isinstance(clause, UpdateBase)):
+            self.info["wrote"] = True
+        institution = current_institution.get()
+        if bind is None and institution is not None:
+            engine = self._db.engines[institution_bind(institution)]
+        elif (bind is None
+                and self.info.get("read_only")
+                and not self.info.get("wrote")
+                and REPLICA_BIND in self._db.engines):
+            engine = self._db.engines[REPLICA_BIND]
+        else:
+            engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if isinstance(self.bind, Connection) and self.bind.engine is engine:
+            return self.bind
+        return self.info.get("connections", {}).get(engine, engine)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+def read_only(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        session = db.session()
+        previous = session.info.get("read_only", False)
+        session.info["read_only"] = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            session.info["read_only"] = previous
+    return wrapper
+
+@contextmanager
+def joined_session(connection, *others):
+    """Point db.session at a transaction the caller already opened on connection.
+
+    Commits made by controllers only release a SAVEPOINT, so the caller decides
+    whether the work is kept by committing or rolling back its own transaction.
+    Reads and writes routed to another bind (the replica or an institution)
+    join the transaction opened on that bind's connection in others.
+    """
+    original = db.session
+    factory = sessionmaker(
+        class_=RoutingSession,
+        db=db,
+        query_cls=db.Query,
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+        info={"connections": {other.engine: other for other in others}}
+    )
+    db.session = scoped_session(factory, scopefunc=_app_ctx_id)
+    try:
+        yield db.session
+    finally:
+        db.session.remove()
+        db.session = original
+
+def estimated_row_count(table_name):
+    """A cheap row count for paging big tables, or None when the database can't
+    estimate one. Both Postgres and SQLite read the statistics their last
+    ANALYZE recorded (see analyze_tables). SQLite has none until it is first
+    analyzed, and its largest rowid is no estimate: AUTOINCREMENT never reuses
+    ids, so it keeps counting rows that were archived or deleted."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        estimate = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table_name}
+        ).scalar()
+        return estimate if estimate is not None and estimate >= 0 else None
+    if dialect == "sqlite":
+        analyzed = db.session.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")).first()
+        if analyzed is None:
+            return None
+        # every row ANALYZE writes for a table starts with its row count
+        stat = db.session.execute(text("SELECT stat FROM sqlite_stat1 WHERE tbl = :name LIMIT 1"), {"name": table_name}).scalar()
+        return int(stat.split()[0]) if stat else None
+    return None
+
+def analyze_tables():
+    # refreshes the statistics estimated_row_count reads, after bulk inserts and deletes
+    if db.session.get_bind().dialect.name in ("postgresql", "sqlite"):
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+# the Alembic revisions `flask db upgrade` applies, wherever the app is started from
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
 
 def get_migrate(app):
-    return Migrate(app, db)
+    return Migrate(app, db, directory=MIGRATIONS_DIR)
 
 def create_db():
     db.create_all()
+    # every institution database holds the full schema
+    for name in institution_names():
+        db.metadata.create_all(bind=db.engines[institution_bind(name)])
     
+def set_sqlite_pragmas(engine, pragmas):
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def use_sqlite_savepoints(engine):
+    # pysqlite starts and ends transactions on its own, which breaks SAVEPOINT,
+    # so hand transaction control back to SQLAlchemy
+    @event.listens_for(engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+@contextmanager
+def sqlite_transactions(connection):
+    """Let SQLAlchemy's BEGIN, SAVEPOINT and COMMIT on connection work as written
+    on SQLite until the block ends.
+
+    pysqlite only opens a transaction before an INSERT, UPDATE or DELETE, so a
+    SAVEPOINT outside one starts its own and releasing it commits right away.
+    Engines set up with use_sqlite_savepoints already behave, so they are left
+    alone, and other engines get pysqlite's behaviour back afterwards.
+    """
+    dbapi_connection = connection.connection.driver_connection
+    if connection.dialect.name != "sqlite" or dbapi_connection.isolation_level is None:
+        yield connection
+        return
+
+    def emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    previous = dbapi_connection.isolation_level
+    dbapi_connection.isolation_level = None
+    event.listen(connection, "begin", emit_begin)
+    try:
+        yield connection
+    finally:
+        event.remove(connection, "begin", emit_begin)
+        dbapi_connection.isolation_level = previous
+
+def dispose_engines():
+    # in a forked worker: drop the parent's pooled connections without closing them under it
+    for engine in db.engines.values():
+        engine.dispose(close=False)
+
 def init_db(app):
-    db.init_app(app)
\ No newline at end of file
+    db.init_app(app)
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if pragmas:
+        with app.app_context():
+            for engine in db.engines.values():
+                if engine.dialect.name == 'sqlite':
+                    set_sqlite_pragmas(engine, pragmas)
@@ -11,7 +11,13 @@ from App.config import load_config
 
 from App.controllers import (
     setup_jwt,
-    add_auth_context
+    add_auth_context,
+    setup_rate_limiter,
+    setup_proxy_fix,
+    setup_event_broker,
+    setup_profiler,
+    setup_standings_cache,
+    setup_institutions
 )
 
 from App.views import views, setup_admin
@@ -25,13 +31,19 @@ def add_views(app):
 def create_app(overrides={}):
     app = Flask(__name__, static_url_path='/static')
     load_config(app, overrides)
+    setup_proxy_fix(app)
     CORS(app)
     add_auth_context(app)
     photos = UploadSet('photos', TEXT + DOCUMENTS + IMAGES)
     configure_uploads(app, photos)
     add_views(app)
     init_db(app)
+    setup_institutions(app)
     jwt = setup_jwt(app)
+    setup_rate_limiter(app)
+    setup_event_broker(app)
+    setup_profiler(app)
+    setup_standings_cache(app)
     setup_admin(app)
     @jwt.invalid_token_loader
     @jwt.unauthorized_loader
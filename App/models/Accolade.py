@@ -7,7 +7,7 @@ class Accolade(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
     accolade_type = db.Column(db.String(10), nullable=False)
-    awarded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    awarded_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     student = db.relationship("Student", backref="accolades", lazy="select")
 
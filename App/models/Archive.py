@@ -0,0 +1,62 @@
+from datetime import datetime
+from App.database import db
+from .ConfirmationRequest import RequestStatus
+from .Hours import minutes_to_hours
+
+# Cold storage for processed requests and old service logs moved out of the
+# hot tables by `flask archive`. Rows keep their original ids.
+
+class ArchivedConfirmationRequest(db.Model):
+    __tablename__ = "archived_confirmation_requests"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False, index=True)
+    staff_id = db.Column(db.Integer, db.ForeignKey("staff.id"), nullable=True)
+    minutes = db.Column(db.Integer, nullable=False)
+    description = db.Column(db.Text)
+    status = db.Column(db.Enum(RequestStatus), nullable=False)
+    requested_at = db.Column(db.DateTime)
+    responded_at = db.Column(db.DateTime)
+    reason = db.Column(db.String(50), nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def hours(self):
+        return minutes_to_hours(self.minutes)
+
+    def __repr__(self):
+        return f'<ArchivedConfirmationRequest {self.id}: {self.hours}h - {self.status}>'
+
+class ArchivedServiceLog(db.Model):
+    __tablename__ = "archived_service_logs"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False, index=True)
+    staff_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    minutes = db.Column(db.Integer, nullable=False)
+    description = db.Column(db.Text)
+    logged_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def hours(self):
+        return minutes_to_hours(self.minutes)
+
+    def __repr__(self):
+        return f"<ArchivedServiceLog {self.id}: {self.hours}h for student {self.student_id}>"
+
+class StudentArchiveSummary(db.Model):
+    __tablename__ = "student_archive_summaries"
+
+    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), primary_key=True)
+    archived_requests = db.Column(db.Integer, nullable=False, default=0)
+    archived_logs = db.Column(db.Integer, nullable=False, default=0)
+    archived_minutes = db.Column(db.Integer, nullable=False, default=0)
+    archived_through = db.Column(db.DateTime)
+
+    @property
+    def archived_hours(self):
+        return minutes_to_hours(self.archived_minutes)
+
+    def __repr__(self):
+        return f'<StudentArchiveSummary {self.student_id}: {self.archived_logs} logs>'
@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from App.database import db
+from .Hours import minutes_to_hours
 
 class RequestStatus(str, Enum):
     PENDING = "pending"
@@ -9,19 +10,27 @@ class RequestStatus(str, Enum):
 
 class ConfirmationRequest(db.Model):
     __tablename__ = "confirmation_requests"
+    # archived rows are deleted from here, so SQLite must not hand their ids out again
+    __table_args__ = {'sqlite_autoincrement': True}
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
     staff_id = db.Column(db.Integer, db.ForeignKey("staff.id"), nullable=True)
-    hours = db.Column(db.Float, nullable=False)
+    minutes = db.Column(db.Integer, nullable=False)
     description = db.Column(db.Text)
-    status = db.Column(db.Enum(RequestStatus), default=RequestStatus.PENDING)
-    requested_at = db.Column(db.DateTime, default=datetime.utcnow)
+    status = db.Column(db.Enum(RequestStatus), default=RequestStatus.PENDING, index=True)
+    requested_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     responded_at = db.Column(db.DateTime, nullable=True)
+    claimed_by = db.Column(db.Integer, db.ForeignKey("staff.id"), nullable=True)
+    claim_expires_at = db.Column(db.DateTime, nullable=True)
 
     student = db.relationship("Student", backref="confirmation_requests")
-    staff = db.relationship("Staff", backref="handled_requests")
+    staff = db.relationship("Staff", backref="handled_requests", foreign_keys=[staff_id])
     reason = db.Column(db.String(50), nullable=True)
 
+    @property
+    def hours(self):
+        return minutes_to_hours(self.minutes)
+
     def __repr__(self):
         return f'<ConfirmationRequest {self.id}: {self.hours}h - {self.status}>'
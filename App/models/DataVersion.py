@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import event
+from App.database import db
+
+# Names of the cached resources whose version is bumped whenever they change
+VERSIONED_DATA = ("users", "leaderboard")
+
+class DataVersion(db.Model):
+    __tablename__ = "data_versions"
+
+    name = db.Column(db.String(30), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DataVersion {self.name} v{self.version}>'
+
+@event.listens_for(DataVersion.__table__, "after_create")
+def add_versioned_data(table, connection, **kwargs):
+    now = datetime.utcnow()
+    connection.execute(table.insert(), [{"name": name, "version": 0, "updated_at": now} for name in VERSIONED_DATA])
@@ -0,0 +1,10 @@
+# Hours are stored as whole minutes so totals add up exactly and SUM runs on
+# integers. Convert only where hours come in from or go out to users.
+
+MINUTES_PER_HOUR = 60
+
+def hours_to_minutes(hours):
+    return round(hours * MINUTES_PER_HOUR)
+
+def minutes_to_hours(minutes):
+    return round(minutes / MINUTES_PER_HOUR, 2)
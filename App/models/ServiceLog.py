@@ -1,19 +1,26 @@
 from App.database import db
+from .Hours import minutes_to_hours
 from datetime import datetime
 
 class ServiceLog(db.Model):
     __tablename__ = "service_logs"
+    # archived rows are deleted from here, so SQLite must not hand their ids out again
+    __table_args__ = {'sqlite_autoincrement': True}
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
     staff_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    hours = db.Column(db.Float, nullable=False)
+    minutes = db.Column(db.Integer, nullable=False)
     description = db.Column(db.Text)
-    logged_at = db.Column(db.DateTime, default=datetime.utcnow)
+    logged_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     student = db.relationship("Student", backref=db.backref("service_logs", lazy="select"))
     staff = db.relationship("User", backref=db.backref("logged_service", lazy="select"))
     
+    @property
+    def hours(self):
+        return minutes_to_hours(self.minutes)
+
     def __repr__(self):
         return f"<ServiceLog {self.id}: {self.hours}h for student {self.student_id}>"
 
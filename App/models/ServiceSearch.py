@@ -0,0 +1,100 @@
+from sqlalchemy import DDL, event, text
+from App.database import db
+from .ServiceLog import ServiceLog
+from .ConfirmationRequest import ConfirmationRequest
+
+# Full-text search over service log and request descriptions.
+# Postgres searches the tables directly through GIN expression indexes.
+# SQLite keeps a copy of each description in an FTS5 table instead.
+
+SEARCH_TABLE = "service_search"
+SEARCH_CONFIG = "english"
+
+SEARCH_KINDS = {
+    "log": ServiceLog,
+    "request": ConfirmationRequest,
+}
+
+def search_vector(model):
+    # must match the indexed expression exactly for Postgres to use the index
+    return db.func.to_tsvector(
+        db.literal_column(f"'{SEARCH_CONFIG}'"),
+        db.func.coalesce(model.description, db.literal_column("''"))
+    )
+
+def search_index_ddl(table):
+    return DDL(
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_description_search ON {table} "
+        f"USING gin (to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')))"
+    ).execute_if(dialect="postgresql")
+
+def search_table_ddl():
+    return DDL(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+        "USING fts5(description, kind UNINDEXED, source_id UNINDEXED, student_id UNINDEXED)"
+    ).execute_if(dialect="sqlite")
+
+for kind, model in SEARCH_KINDS.items():
+    event.listen(model.__table__, "after_create", search_index_ddl(model.__tablename__))
+
+event.listen(db.metadata, "after_create", search_table_ddl())
+
+event.listen(db.metadata, "before_drop", DDL(
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}"
+).execute_if(dialect="sqlite"))
+
+def index_description(connection, kind, record):
+    connection.execute(
+        text(f"INSERT INTO {SEARCH_TABLE} (description, kind, source_id, student_id) "
+             "VALUES (:description, :kind, :source_id, :student_id)"),
+        {"description": record.description or "", "kind": kind, "source_id": record.id, "student_id": record.student_id}
+    )
+
+def unindex_description(connection, kind, record):
+    connection.execute(
+        text(f"DELETE FROM {SEARCH_TABLE} WHERE kind = :kind AND source_id = :source_id"),
+        {"kind": kind, "source_id": record.id}
+    )
+
+def index_descriptions(connection, kind, ids):
+    # set-based index_description for rows written with bulk INSERT/UPDATE statements,
+    # which skip the mapper events below
+    if connection.dialect.name != "sqlite" or not ids:
+        return
+    model = SEARCH_KINDS[kind]
+    connection.execute(
+        db.insert(db.table(SEARCH_TABLE, db.column("description"), db.column("kind"), db.column("source_id"), db.column("student_id")))
+        .from_select(
+            ["description", "kind", "source_id", "student_id"],
+            db.select(db.func.coalesce(model.description, ""), db.literal(kind), model.id, model.student_id).where(model.id.in_(ids))
+        )
+    )
+
+def unindex_descriptions(connection, kind, ids):
+    # set-based unindex_description for rows removed with bulk DELETE statements
+    if connection.dialect.name != "sqlite" or not ids:
+        return
+    search_table = db.table(SEARCH_TABLE, db.column("kind"), db.column("source_id"))
+    connection.execute(
+        db.delete(search_table).where(search_table.c.kind == kind, search_table.c.source_id.in_(ids))
+    )
+
+def add_sync_listeners(kind, model):
+    @event.listens_for(model, "after_insert")
+    def after_insert(mapper, connection, target):
+        if connection.dialect.name == "sqlite":
+            index_description(connection, kind, target)
+
+    @event.listens_for(model, "after_update")
+    def after_update(mapper, connection, target):
+        if connection.dialect.name == "sqlite" and db.inspect(target).attrs.description.history.has_changes():
+            unindex_description(connection, kind, target)
+            index_description(connection, kind, target)
+
+    @event.listens_for(model, "after_delete")
+    def after_delete(mapper, connection, target):
+        if connection.dialect.name == "sqlite":
+            unindex_description(connection, kind, target)
+
+for kind, model in SEARCH_KINDS.items():
+    add_sync_listeners(kind, model)
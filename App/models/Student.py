@@ -1,12 +1,17 @@
 from datetime import datetime
 from App.database import db
+from .Hours import minutes_to_hours
 
 class Student(db.Model):
     __tablename__ = "students"
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
-    total_hours = db.Column(db.Float, default=0.0)
+    total_minutes = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def total_hours(self):
+        return minutes_to_hours(self.total_minutes or 0)
 
     def __repr__(self):
         return f'<Student {self.id}>'
\ No newline at end of file
@@ -1,6 +1,11 @@
+from .Hours import MINUTES_PER_HOUR, hours_to_minutes, minutes_to_hours
 from .User import User, UserRoleEnum
 from .Student import Student
 from .Staff import Staff
 from .ServiceLog import ServiceLog
 from .ConfirmationRequest import ConfirmationRequest, RequestStatus
-from .Accolade import Accolade
\ No newline at end of file
+from .Accolade import Accolade
+from .DataVersion import DataVersion, VERSIONED_DATA
+from .IdempotencyKey import IdempotencyKey
+from .Archive import ArchivedConfirmationRequest, ArchivedServiceLog, StudentArchiveSummary
+from .ServiceSearch import SEARCH_TABLE, SEARCH_CONFIG, SEARCH_KINDS, search_vector, index_descriptions, unindex_descriptions
\ No newline at end of file
@@ -0,0 +1,115 @@
+from typing import NamedTuple
+from App.database import db
+from App.models import User, Student, Staff, ServiceLog, ConfirmationRequest, RequestStatus, Accolade, DataVersion
+
+# The queries the controllers run on almost every call, built once at import
+# with bind parameters in place of the values. A prebuilt statement memoizes
+# its cache key, so each call goes straight to the compiled SQL in
+# SQLAlchemy's statement cache instead of rebuilding the select, walking it
+# for a cache key and looking it up again.
+
+# Read-only listings select just the columns they show. The result rows are
+# plain named tuples, so they skip the identity map, change tracking and
+# lazy-load machinery that full ORM objects carry.
+
+USER_BY_USERNAME = db.select(User).where(User.username == db.bindparam("username")).limit(1)
+
+# role and student profile id of a JWT identity, in one round trip
+STUDENT_BY_USER_ID = (
+    db.select(User.username, User.role, Student.id.label("student_id"))
+    .outerjoin(Student, Student.user_id == User.id)
+    .where(User.id == db.bindparam("user_id"))
+)
+
+REQUESTS_FOR_STUDENT = (
+    db.select(
+        ConfirmationRequest.id, ConfirmationRequest.minutes, ConfirmationRequest.status,
+        ConfirmationRequest.description, ConfirmationRequest.requested_at, ConfirmationRequest.reason
+    )
+    .where(ConfirmationRequest.student_id == db.bindparam("student_id"))
+    .order_by(ConfirmationRequest.requested_at.desc())
+)
+
+PENDING_REQUESTS_FOR_STUDENT = db.select(ConfirmationRequest).where(
+    ConfirmationRequest.student_id == db.bindparam("student_id"),
+    ConfirmationRequest.status == RequestStatus.PENDING
+)
+
+PENDING_REQUESTS = db.select(ConfirmationRequest).where(ConfirmationRequest.status == RequestStatus.PENDING)
+
+PENDING_COUNT = db.select(db.func.count(ConfirmationRequest.id)).where(ConfirmationRequest.status == RequestStatus.PENDING)
+
+DATA_VERSION = db.select(DataVersion.version, DataVersion.updated_at).where(DataVersion.name == db.bindparam("name"))
+
+SERVICE_LOGS_FOR_STUDENT = (
+    db.select(ServiceLog)
+    .options(db.joinedload(ServiceLog.staff))
+    .where(ServiceLog.student_id == db.bindparam("student_id"))
+    .order_by(ServiceLog.logged_at.desc())
+)
+
+# ties broken by id so the ranking is stable
+LEADERBOARD = (
+    db.select(Student.id, User.username, Student.total_minutes)
+    .join(User, User.id == Student.user_id)
+    .order_by(Student.total_minutes.desc(), Student.id)
+    .limit(db.bindparam("limit"))
+)
+
+# the accolades of the students LEADERBOARD returned; MySQL rejects a LIMIT
+# subquery inside IN, so their ids are passed in rather than selected again
+LEADERBOARD_ACCOLADES = (
+    db.select(Accolade.student_id, Accolade.accolade_type)
+    .where(Accolade.student_id.in_(db.bindparam("ids", expanding=True)))
+    .order_by(Accolade.id)
+)
+
+USER_PROFILES = (
+    db.select(User.username, User.role, Student.id.label("student_id"), Student.total_minutes, Staff.id.label("staff_id"))
+    .outerjoin(Student, Student.user_id == User.id)
+    .outerjoin(Staff, Staff.user_id == User.id)
+    .order_by(User.id)
+)
+
+class LeaderboardRow(NamedTuple):
+    username: str
+    total_minutes: int
+    accolades: tuple
+
+def leaderboard_accolades_params(students):
+    return {"ids": [student.id for student in students]}
+
+def leaderboard_rows(students, accolades):
+    # joins the LEADERBOARD rows with their LEADERBOARD_ACCOLADES rows
+    types = {student.id: [] for student in students}
+    for accolade in accolades:
+        types[accolade.student_id].append(accolade.accolade_type)
+    return [LeaderboardRow(student.username, student.total_minutes, tuple(types[student.id])) for student in students]
+
+def user_by_username(username):
+    return db.session.scalars(USER_BY_USERNAME, {"username": username}).first()
+
+def requests_for_student(student_id):
+    return db.session.execute(REQUESTS_FOR_STUDENT, {"student_id": student_id}).all()
+
+def pending_requests_for_student(student_id):
+    return db.session.scalars(PENDING_REQUESTS_FOR_STUDENT, {"student_id": student_id}).all()
+
+def pending_requests():
+    return db.session.scalars(PENDING_REQUESTS).all()
+
+def pending_count():
+    return db.session.scalar(PENDING_COUNT)
+
+def service_logs_for_student(student_id):
+    return db.session.scalars(SERVICE_LOGS_FOR_STUDENT, {"student_id": student_id}).all()
+
+def leaderboard_students(limit):
+    students = db.session.execute(LEADERBOARD, {"limit": limit}).all()
+    if not students:
+        return []
+    accolades = db.session.execute(LEADERBOARD_ACCOLADES, leaderboard_accolades_params(students)).all()
+    return leaderboard_rows(students, accolades)
+
+def user_profiles():
+    return db.session.execute(USER_PROFILES).all()
@@ -0,0 +1,107 @@
+from operator import attrgetter
+import orjson
+from flask import Response
+from App.models import minutes_to_hours
+
+# Declarative response schemas. Each field reads an attribute (dotted paths
+# follow relationships) from an ORM object or a result row, so query results
+# turn straight into dicts or JSON bytes without hand-written loops.
+
+def minutes(value):
+    # same text as strftime('%Y-%m-%d %H:%M') but formatted in C
+    return value.isoformat(" ", "minutes")
+
+def day(value):
+    return value.date().isoformat()
+
+def enum_title(value):
+    return value.value.title()
+
+def enum_value(value):
+    return value.value
+
+def badges(accolade_types):
+    return " ".join(f"{accolade_type}h" for accolade_type in accolade_types) or "No accolades"
+
+class Field:
+
+    def __init__(self, attr=None, format=None, default=None):
+        self.attr = attr
+        self.format = format
+        self.default = default
+
+    def build_getter(self, name):
+        get = attrgetter(self.attr or name)
+        format = self.format
+        default = self.default
+        if format is None and default is None:
+            return get
+
+        def getter(row):
+            value = get(row)
+            if value is None:
+                return default
+            return format(value) if format else value
+        return getter
+
+class Schema:
+    fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        declared = [(name, value) for name, value in vars(cls).items() if isinstance(value, Field)]
+        cls.fields = tuple(cls.fields) + tuple((name, field.build_getter(name)) for name, field in declared)
+
+    @classmethod
+    def dump(cls, row):
+        return {name: get(row) for name, get in cls.fields}
+
+    @classmethod
+    def dump_many(cls, rows):
+        fields = cls.fields
+        return [{name: get(row) for name, get in fields} for row in rows]
+
+    @classmethod
+    def dumps(cls, rows):
+        return dumps(cls.dump_many(rows))
+
+def dumps(data):
+    return orjson.dumps(data)
+
+def json_response(data, status=200):
+    return Response(dumps(data), status=status, mimetype="application/json")
+
+class UserSchema(Schema):
+    id = Field()
+    username = Field()
+    role = Field(format=enum_value)
+
+class RequestSchema(Schema):
+    id = Field()
+    hours = Field("minutes", format=minutes_to_hours)
+    status = Field(format=enum_title)
+    description = Field()
+    submitted_at = Field("requested_at", format=minutes, default="Unknown")
+    reason = Field()
+
+class PendingRequestSchema(Schema):
+    id = Field()
+    hours = Field("minutes", format=minutes_to_hours)
+    description = Field()
+    submitted_at = Field("requested_at", format=minutes, default="Unknown")
+
+class ServiceLogSchema(Schema):
+    id = Field()
+    hours = Field("minutes", format=minutes_to_hours)
+    description = Field()
+    approved_by = Field("staff.username")
+    logged_at = Field(format=minutes)
+
+class LeaderboardSchema(Schema):
+    username = Field()
+    total_hours = Field("total_minutes", format=minutes_to_hours)
+    accolades = Field(format=badges)
+
+class AccoladeSchema(Schema):
+    type = Field("accolade_type")
+    awarded_at = Field(format=day)
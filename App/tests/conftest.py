@@ -0,0 +1,38 @@
+import pytest
+
+from App.main import create_app
+from App.database import db, joined_session, use_sqlite_savepoints
+from App.controllers import restore_or_build
+
+# Each test process (including every pytest-xdist worker) gets its own private
+# in-memory databases, so tests never share state across cores.
+TEST_CONFIG = {
+    'TESTING': True,
+    'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+    'SQLALCHEMY_REPLICA_URI': 'sqlite://',
+    'INSTITUTION_DATABASE_URIS': {'north': 'sqlite://', 'south': 'sqlite://'},
+}
+
+# The schema is restored from a snapshot in the pytest cache once per process
+# and reused by every test; it is only built again when a model changes
+@pytest.fixture(scope="session")
+def app(request):
+    app = create_app({**TEST_CONFIG, 'SNAPSHOT_DIR': str(request.config.cache.mkdir('snapshots'))})
+    for engine in db.engines.values():
+        use_sqlite_savepoints(engine)
+        restore_or_build("schema", lambda: db.metadata.create_all(bind=engine), engine)
+    yield app
+
+# Every test runs inside a transaction on each database (the primary, the
+# replica and every institution) that is rolled back afterwards, so tests start
+# from empty databases no matter what order they run in
+@pytest.fixture(autouse=True)
+def db_session(app):
+    engines = [db.engine] + [engine for engine in db.engines.values() if engine is not db.engine]
+    connections = [engine.connect() for engine in engines]
+    transactions = [connection.begin() for connection in connections]
+    with joined_session(*connections) as session:
+        yield session
+    for transaction, connection in zip(transactions, connections):
+        transaction.rollback()
+        connection.close()
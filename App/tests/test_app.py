@@ -1,16 +1,54 @@
-import os, tempfile, pytest, logging, unittest
+import os, json, tempfile, time, pytest, logging, unittest, unittest.mock, click
 from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.http import quote_etag
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+import flask_migrate
+from flask_jwt_extended import create_access_token
 
-from App.main import create_app
-from App.database import db, create_db
-from App.models import User, UserRoleEnum
+from datetime import datetime, timedelta
+from App.models import User, UserRoleEnum, ConfirmationRequest, RequestStatus, Student, ServiceLog
+from App.models import ArchivedConfirmationRequest, ArchivedServiceLog, StudentArchiveSummary
+from App.database import db, use_institution, estimated_row_count, get_migrate
+from App.schemas import RequestSchema
+from App.queries import DATA_VERSION
+from App.asgi import AsyncAPI, run_requests, http_scope
+from App.controllers.HealthController import last_checks
 from App.controllers import (
     create_user,
     get_all_users_json,
     login,
     get_user,
     get_user_by_username,
-    update_user
+    update_user,
+    submit_hours,
+    approve_request,
+    claim_pending_requests,
+    RateLimiter,
+    MemoryBackend,
+    setup_proxy_fix,
+    search_service_records,
+    MemoryBroker,
+    bulk_approve_requests,
+    bulk_reject_requests,
+    get_student_service_logs,
+    get_student_accolades,
+    seed_database,
+    archive_records,
+    purge_idempotency_keys,
+    commit_with_key,
+    get_version,
+    version_etag,
+    Profiler,
+    read_batch,
+    run_batch,
+    run_batch_command,
+    ReviewSession,
+    interactive_request_review,
+    get_milestone_progress,
+    get_leaderboard
 )
 
 
@@ -42,20 +80,100 @@ class UserUnitTests(unittest.TestCase):
         user = User("bob", password, role=UserRoleEnum.STUDENT)
         assert user.check_password(password)
 
+class RateLimiterUnitTests(unittest.TestCase):
+
+    def test_bucket_empties_then_refills(self):
+        now = [0.0]
+        limiter = RateLimiter(MemoryBackend(), {"login": "2/minute"}, clock=lambda: now[0])
+        assert limiter.allow("login", "10.0.0.1")
+        assert limiter.allow("login", "10.0.0.1")
+        assert not limiter.allow("login", "10.0.0.1")
+        assert limiter.allow("login", "10.0.0.2")
+        now[0] += 30
+        assert limiter.allow("login", "10.0.0.1")
+        self.assertDictEqual(limiter.get_stats(), {"login": {"allowed": 4, "rejected": 1}})
+
+class SchemaUnitTests(unittest.TestCase):
+
+    def test_request_schema_formats_rows(self):
+        req = ConfirmationRequest(id=7, minutes=150, description="Food Drive", status=RequestStatus.PENDING, requested_at=datetime(2024, 3, 1, 9, 30, 12))
+        self.assertDictEqual(RequestSchema.dump(req), {
+            "id": 7, "hours": 2.5, "status": "Pending", "description": "Food Drive",
+            "submitted_at": "2024-03-01 09:30", "reason": None
+        })
+        assert RequestSchema.dumps([req]).startswith(b'[{"id":7,')
+
+class BatchUnitTests(unittest.TestCase):
+
+    def test_batch_lines_parse_to_cli_arguments(self):
+        lines = [
+            "# nightly submissions",
+            'flask service submit-hours 2 --description "Food drive"',
+            "",
+            '["user", "create", "sam", "pass", "student"]',
+            '{"command": "service leaderboard", "options": {"limit": 5, "json": true, "verbose": false}}',
+        ]
+        assert list(read_batch(lines)) == [
+            (2, ["service", "submit-hours", "2", "--description", "Food drive"]),
+            (4, ["user", "create", "sam", "pass", "student"]),
+            (5, ["service", "leaderboard", "--limit", "5", "--json"]),
+        ]
+
+    def test_batch_command_failures_are_reported_not_raised(self):
+        cli = click.Group()
+        cli.add_command(click.Command("hello", callback=lambda: print("hi")))
+        cli.add_command(click.Command("boom", callback=lambda: 1 / 0))
+        hello = run_batch_command(cli, ["hello"])
+        assert (hello["success"], hello["output"]) == (True, "hi\n")
+        assert run_batch_command(cli, ["boom"])["error"] == "ZeroDivisionError: division by zero"
+        assert run_batch_command(cli, ["missing"])["success"] is False
+        assert run_batch_command(cli, ["run-batch", "file.txt"])["error"] == "run-batch cannot be nested"
+
+    # a file database whose engine leaves transactions to pysqlite, as the app's engines do
+    def test_batch_writes_stay_hidden_until_each_commit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = db.create_engine(f"sqlite:///{os.path.join(directory, 'batch.db')}")
+            db.metadata.create_all(engine)
+            visible = []
+
+            def add(username):
+                create_user(username, "pass", "student")
+                with engine.connect() as other:
+                    visible.append(other.scalar(db.select(db.func.count(User.id))))
+
+            cli = click.Group()
+            cli.add_command(click.Command("add", callback=add, params=[click.Argument(["username"])]))
+            db.engines["institution:batch"] = engine
+            try:
+                with use_institution("batch"):
+                    result = run_batch(cli, ["add ann", "add ben", "add cal"], commit_every=2)
+            finally:
+                del db.engines["institution:batch"]
+                engine.dispose()
+        assert result["success"]
+        self.assertListEqual(visible, [0, 0, 2])
+
+class EventBrokerUnitTests(unittest.TestCase):
+
+    def test_listeners_get_frames_after_their_last_id(self):
+        broker = MemoryBroker(size=2)
+        broker.publish("pending", {"count": 1})
+        broker.publish("pending", {"count": 2})
+        frames, last_id = broker.listen(1, timeout=0)
+        self.assertListEqual(frames, [b'id: 2\nevent: pending\ndata: {"count":2}\n\n'])
+        assert last_id == 2
+
+    def test_listener_that_fell_behind_must_resync(self):
+        broker = MemoryBroker(size=2)
+        for count in range(3):
+            broker.publish("pending", {"count": count})
+        frames, last_id = broker.listen(0, timeout=0)
+        assert frames is None and last_id == 3
+
 '''
     Integration Tests
 '''
 
-# This fixture creates an empty database for the test and deletes it after the test
-# scope="class" would execute the fixture once and resued for all methods in the class
-@pytest.fixture(autouse=True, scope="module")
-def empty_db():
-    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///test.db'})
-    create_db()
-    yield app.test_client()
-    db.drop_all()
-
-
 def test_authenticate():
     user = create_user("bob", "bobpass", role=UserRoleEnum.STUDENT)
     assert login("bob", "bobpass") != None
@@ -68,13 +186,587 @@ class UsersIntegrationTests(unittest.TestCase):
         assert user.username == "rick"
 
     def test_get_all_users_json(self):
+        bob = create_user("bob", "bobpass", role=UserRoleEnum.STUDENT)["user"]
+        rick = create_user("rick", "bobpass", role=UserRoleEnum.STAFF)["user"]
         users_json = get_all_users_json()
-        self.assertListEqual([{"id":1, "username":"bob", "role": "student"}, {"id":2, "username":"rick", "role":"staff" }], users_json)
+        self.assertListEqual([{"id":bob.id, "username":"bob", "role": "student"}, {"id":rick.id, "username":"rick", "role":"staff" }], users_json)
 
     # Tests data changes in the database
     def test_update_user(self):
-        update_user(1, "ronnie")
-        user = get_user(1)
+        user = create_user("bob", "bobpass", role=UserRoleEnum.STUDENT)["user"]
+        update_user(user.id, "ronnie")
+        user = get_user(user.id)
         assert user.username == "ronnie"
-        
 
+class ReadReplicaIntegrationTests(unittest.TestCase):
+
+    # the replica is never written to, so anything read from it comes back empty
+    def test_reads_use_replica_until_session_writes(self):
+        self.assertListEqual([], get_all_users_json())
+        create_user("sticky", "stickypass", role="student")
+        usernames = [user["username"] for user in get_all_users_json()]
+        assert "sticky" in usernames
+
+    def test_service_logs_read_from_replica(self):
+        student = {"username": "lena", "role": "student"}
+        create_user("lena", "lenapass", role="student")
+        # a new session that hasn't written anything yet
+        db.session.remove()
+        assert get_student_service_logs(student)["message"] == "Student profile not found"
+        create_user("mark", "markpass", role="student")
+        assert get_student_service_logs(student)["success"]
+
+class ReviewQueueIntegrationTests(unittest.TestCase):
+
+    def setUp(self):
+        create_user("carol", "carolpass", role="student")
+        for hours in [1, 2, 3, 4]:
+            submit_hours(hours, "Food Drive", {"username": "carol", "role": "student"})
+        self.first_staff = create_user("sam", "sampass", role="staff")["user"]
+        self.second_staff = create_user("tina", "tinapass", role="staff")["user"]
+
+    def test_reviewers_claim_different_requests(self):
+        first = claim_pending_requests(self.first_staff, limit=2)["requests"]
+        second = claim_pending_requests(self.second_staff, limit=5)["requests"]
+        first_ids = {req["id"] for req in first}
+        second_ids = {req["id"] for req in second}
+        assert len(first_ids) == 2 and len(second_ids) == 2
+        assert first_ids.isdisjoint(second_ids)
+
+    # MySQL can't UPDATE a table it selects from in a subquery
+    def test_claim_updates_selected_ids_without_a_subquery(self):
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            claimed = claim_pending_requests(self.first_staff, limit=3)["requests"]
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        updates = [statement for statement in statements if statement.startswith("UPDATE confirmation_requests")]
+        assert len(claimed) == 3 and len(updates) == 1
+        assert "SELECT" not in updates[0]
+
+    def test_cannot_approve_request_claimed_by_another_reviewer(self):
+        claimed = claim_pending_requests(self.first_staff, limit=1)["requests"][0]
+        result = approve_request(claimed["id"], self.second_staff)
+        assert not result["success"]
+        assert approve_request(claimed["id"], self.first_staff)["success"]
+
+def test_submit_hours_api_is_rate_limited(app):
+    user = create_user("dave", "davepass", role="student")["user"]
+    headers = {"Authorization": f"Bearer {create_access_token(identity=user.id)}"}
+    default_limiter = app.extensions['rate_limiter']
+    app.extensions['rate_limiter'] = RateLimiter(MemoryBackend(), {"submit_hours": "1/minute"})
+    try:
+        client = app.test_client()
+        first = client.post('/api/service/hours', json={"hours": 2, "description": "Food Drive"}, headers=headers)
+        second = client.post('/api/service/hours', json={"hours": 2, "description": "Food Drive"}, headers=headers)
+    finally:
+        app.extensions['rate_limiter'] = default_limiter
+    assert first.status_code == 201
+    assert second.status_code == 429
+
+def test_login_limit_is_per_forwarded_client(app):
+    create_user("kim", "kimpass", role="student")
+    default_app, default_limiter = app.wsgi_app, app.extensions['rate_limiter']
+    app.config['PROXY_FIX_HOPS'] = 1
+    setup_proxy_fix(app)
+    app.extensions['rate_limiter'] = RateLimiter(MemoryBackend(), {"login": "1/minute"})
+    try:
+        client = app.test_client()
+        login = lambda address: client.post('/api/login', json={"username": "kim", "password": "kimpass"},
+                                            headers={"X-Forwarded-For": address}).status_code
+        statuses = [login("203.0.113.1"), login("203.0.113.1"), login("203.0.113.2")]
+    finally:
+        app.wsgi_app, app.extensions['rate_limiter'] = default_app, default_limiter
+        app.config['PROXY_FIX_HOPS'] = 0
+    assert statuses == [200, 429, 200]
+
+def test_submit_hours_api_rejects_non_finite_hours(app):
+    user = create_user("ivy", "ivypass", role="student")["user"]
+    headers = {"Authorization": f"Bearer {create_access_token(identity=user.id)}"}
+    client = app.test_client()
+    for hours in ["nan", "inf", "-inf"]:
+        response = client.post('/api/service/hours', json={"hours": hours}, headers=headers)
+        assert response.status_code == 400
+        assert response.json["message"] == "Hours must be a number"
+
+def test_submit_hours_api_rejects_malformed_body(app):
+    user = create_user("jo", "jopass", role="student")["user"]
+    headers = {"Authorization": f"Bearer {create_access_token(identity=user.id)}"}
+    client = app.test_client()
+    for body in [{}, {"hours": "abc"}, {"hours": None}, ["hours"]]:
+        response = client.post('/api/service/hours', json=body, headers=headers)
+        assert response.status_code == 400
+    assert client.post('/api/service/hours', data="hours=2", headers=headers).status_code == 400
+
+class SearchIntegrationTests(unittest.TestCase):
+
+    def setUp(self):
+        create_user("erin", "erinpass", role="student")
+        student = {"username": "erin", "role": "student"}
+        submit_hours(3, "Food Drive at the church", student)
+        submit_hours(2, "Library book sorting", student)
+        request_id = submit_hours(4, "Canned food drive", student)["request_id"]
+        staff = create_user("sam", "sampass", role="staff")["user"]
+        approve_request(request_id, staff)
+
+    def test_search_matches_requests_and_logs(self):
+        result = search_service_records("food drive")
+        found = {(match["type"], match["description"]) for match in result["results"]}
+        self.assertSetEqual(found, {
+            ("request", "Food Drive at the church"),
+            ("request", "Canned food drive"),
+            ("log", "Canned food drive"),
+        })
+
+    def test_search_pages_without_counting(self):
+        first = search_service_records("food", page=1, per_page=2)
+        second = search_service_records("food", page=2, per_page=2)
+        assert first["has_next"] and not second["has_next"]
+        assert len(first["results"]) == 2 and len(second["results"]) == 1
+
+def test_search_api_pages_hold_at_least_one_result(app):
+    create_user("lee", "leepass", role="student")
+    for description in ["Food Drive", "Canned food drive"]:
+        submit_hours(2, description, {"username": "lee", "role": "student"})
+    staff = create_user("max", "maxpass", role="staff")["user"]
+    headers = {"Authorization": f"Bearer {create_access_token(identity=staff.id)}"}
+    client = app.test_client()
+    for query in ["per_page=0", "per_page=-1&page=0", "per_page=1&page=-3"]:
+        response = client.get(f'/api/service/search?q=food&{query}', headers=headers)
+        assert (response.json["page"], response.json["per_page"]) == (1, 1)
+        assert len(response.json["results"]) == 1 and response.json["has_next"]
+
+# an install from before migrations: the first release's tables, hours stored as
+# floats and no alembic_version, in a file database registered as an institution
+def test_db_upgrade_brings_an_old_database_to_the_current_schema(app):
+    get_migrate(app)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = db.create_engine(f"sqlite:///{os.path.join(directory, 'old.db')}")
+        db.engines["institution:old"] = engine
+        try:
+            with use_institution("old"):
+                flask_migrate.upgrade(revision="9fbf9102c2d2")
+                with engine.begin() as connection:
+                    for statement in [
+                        "INSERT INTO users VALUES (1, 'amy', 'x', 'STUDENT'), (2, 'sam', 'x', 'STAFF')",
+                        "INSERT INTO students VALUES (1, 1, 2.5)",
+                        "INSERT INTO staff VALUES (1, 2)",
+                        "INSERT INTO confirmation_requests VALUES (1, 1, 1, 2.5, 'Food drive', 'APPROVED', NULL, NULL, NULL)",
+                        "INSERT INTO service_logs VALUES (1, 1, 2, 2.5, 'Food drive', NULL)",
+                        "DROP TABLE alembic_version",
+                    ]:
+                        connection.exec_driver_sql(statement)
+                flask_migrate.upgrade()
+            with engine.connect() as connection:
+                # what is left to migrate, apart from the search table, which isn't a model
+                context = MigrationContext.configure(connection, opts={
+                    "include_object": lambda object, name, type_, *args: not name.startswith("service_search")
+                })
+                assert compare_metadata(context, db.metadata) == []
+                assert connection.scalar(text("SELECT total_minutes FROM students")) == 150
+                assert connection.scalar(text("SELECT count(*) FROM data_versions")) == 2
+                assert connection.scalar(text("SELECT count(*) FROM service_search WHERE service_search MATCH 'food'")) == 2
+                assert connection.scalar(text("SELECT seq FROM sqlite_sequence WHERE name = 'confirmation_requests'")) == 1
+        finally:
+            del db.engines["institution:old"]
+            engine.dispose()
+
+def test_users_api_answers_not_modified_until_users_change(app):
+    client = app.test_client()
+    first = client.get('/api/users')
+    assert first.status_code == 200 and first.headers['ETag']
+    repeat = client.get('/api/users', headers={'If-None-Match': first.headers['ETag']})
+    assert repeat.status_code == 304 and repeat.data == b''
+    create_user("fay", "faypass", role="student")
+    changed = client.get('/api/users', headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != first.headers['ETag']
+
+def test_leaderboard_limit_is_at_least_one(app):
+    for name in ["nia", "oli"]:
+        create_user(name, f"{name}pass", role="student")
+    client = app.test_client()
+    for limit in ["0", "-1"]:
+        assert len(client.get(f'/api/leaderboard?limit={limit}').json["leaderboard"]) == 1
+
+def test_etag_comes_from_the_same_database_as_the_body(app):
+    # written to the primary only, as if the replica were lagging
+    create_user("fay", "faypass", role="student")
+    db.session.remove()
+    response = app.test_client().get('/api/users')
+    assert response.json == []
+    assert "-users-0-" in response.headers['ETag']
+
+def test_admin_edits_bump_the_versions_they_change(app):
+    views = {type(view).__name__: view for view in app.extensions['admin'][0]._views}
+    user = create_user("hal", "halpass", role="student")["user"]
+    before = {name: get_version(name)[0] for name in ["users", "leaderboard"]}
+    views["StudentView"].on_model_change(None, user.student, False)
+    assert get_version("leaderboard")[0] == before["leaderboard"] + 1
+    views["UserView"].on_model_delete(user)
+    assert [get_version(name)[0] for name in ["users", "leaderboard"]] == [before["users"] + 1, before["leaderboard"] + 2]
+
+def test_approval_publishes_leaderboard_and_pending_events(app):
+    broker = app.extensions['event_brokers'][None]
+    create_user("gail", "gailpass", role="student")
+    request_id = submit_hours(5, "Park Cleanup", {"username": "gail", "role": "student"})["request_id"]
+    staff = create_user("sam", "sampass", role="staff")["user"]
+    after_submit = broker.last_id
+    approve_request(request_id, staff)
+    frames, _ = broker.listen(after_submit, timeout=0)
+    assert frames[0].startswith(b"id: ") and b"event: leaderboard" in frames[0] and b'"username":"gail"' in frames[0]
+    assert b"event: pending" in frames[1] and b'"count":0' in frames[1]
+
+def test_events_stay_in_their_institution(app):
+    brokers = app.extensions['event_brokers']
+    before = {name: broker.last_id for name, broker in brokers.items()}
+    with use_institution("north"):
+        create_user("gus", "guspass", role="student")
+        request_id = submit_hours(2, "Park Cleanup", {"username": "gus", "role": "student"})["request_id"]
+        approve_request(request_id, create_user("sam", "sampass", role="staff")["user"])
+    frames, _ = brokers["north"].listen(before["north"], timeout=0)
+    assert any(b'"username":"gus"' in frame for frame in frames)
+    assert brokers[None].last_id == before[None] and brokers["south"].last_id == before["south"]
+
+class BulkReviewIntegrationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.staff = create_user("sam", "sampass", role="staff")["user"]
+        self.request_ids = []
+        for username, hours in [("hana", 6), ("hana", 5), ("ivan", 3)]:
+            create_user(username, "pass", role="student")
+            self.request_ids.append(submit_hours(hours, "Beach Cleanup", {"username": username, "role": "student"})["request_id"])
+
+    def test_bulk_approve_logs_hours_and_awards_accolades(self):
+        result = bulk_approve_requests(self.request_ids, self.staff)
+        assert result["success"]
+        hana = get_student_service_logs({"username": "hana", "role": "student"})
+        assert hana["total_hours"] == 11 and len(hana["logs"]) == 2
+        assert [accolade["type"] for accolade in get_student_accolades("hana")["accolades"]] == ["10"]
+        assert get_student_accolades("ivan")["accolades"] == []
+        assert search_service_records("beach")["results"]
+        # requests that are no longer pending are skipped
+        assert not bulk_approve_requests(self.request_ids, self.staff)["success"]
+
+    # as on MySQL, which has no RETURNING
+    def test_bulk_approve_without_returning(self):
+        dialect = db.engine.dialect
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        dialect.insert_returning = dialect.update_returning = False
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            assert bulk_approve_requests(self.request_ids, self.staff)["message"] == "Approved 3 requests for 2 students"
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+            dialect.insert_returning = dialect.update_returning = True
+        assert not [statement for statement in statements if "RETURNING" in statement]
+        logs = [match for match in search_service_records("beach")["results"] if match["type"] == "log"]
+        assert len(logs) == 3
+
+    def test_bulk_reject_only_touches_pending_requests(self):
+        approve_request(self.request_ids[0], self.staff)
+        result = bulk_reject_requests(self.request_ids, self.staff)
+        assert result["message"] == "Rejected 2 requests"
+
+    def test_leaderboard_reads_rows_without_loading_objects(self):
+        bulk_approve_requests(self.request_ids, self.staff)
+        db.session.expunge_all()
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            leaderboard = get_leaderboard(5)["leaderboard"]
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        # MySQL rejects a LIMIT inside an IN subquery
+        assert [statement.count("LIMIT") for statement in statements] == [1, 0]
+        assert [(row["username"], row["total_hours"], row["accolades"]) for row in leaderboard] == [
+            ("hana", 11.0, "10h"), ("ivan", 3.0, "No accolades")
+        ]
+        assert len(db.session.identity_map) == 0
+
+    def test_fractional_hours_add_up_exactly(self):
+        create_user("jo", "pass", role="student")
+        student = {"username": "jo", "role": "student"}
+        for _ in range(100):
+            approve_request(submit_hours(0.1, "Tutoring", student)["request_id"], self.staff)
+        # 100 float additions of 0.1 come to 9.99999999999998
+        assert get_student_service_logs(student)["total_hours"] == 10
+        assert [accolade["type"] for accolade in get_student_accolades("jo")["accolades"]] == ["10"]
+
+    def test_review_session_commits_once_and_reports_conflicts(self):
+        other_staff = create_user("tess", "tesspass", role="staff")["user"]
+        student = {"username": "hana", "role": "student"}
+        extra_id = submit_hours(2, "Tutoring", student)["request_id"]
+        first, second = self.request_ids[:2]
+        with ReviewSession("hana", self.staff) as review:
+            assert [request["id"] for request in review.requests] == [first, second, extra_id]
+            review.approve(first)
+            review.reject(second, "Missing supervisor")
+            review.approve(extra_id)
+            assert review.undo() == extra_id
+            assert [request["id"] for request in review.undecided()] == [extra_id]
+            # nothing is written until the session ends, so another reviewer can get there first
+            assert get_student_service_logs(student)["logs"] == []
+            approve_request(second, other_staff)
+        assert review.result["conflicts"] == [second]
+        assert (review.result["approved"], review.result["rejected"]) == (1, 0)
+        hana = get_student_service_logs(student)
+        assert hana["total_hours"] == 11 and len(hana["logs"]) == 2
+        assert ConfirmationRequest.query.get(extra_id).status == RequestStatus.PENDING
+
+    def test_interrupted_review_asks_before_saving(self):
+        first, second = self.request_ids[:2]
+        submit_hours(2, "Tutoring", {"username": "hana", "role": "student"})
+        # pick and approve the first request, then Ctrl-C at the next decision
+        answers = ["1", "y", "1", KeyboardInterrupt(), "y"]
+        with unittest.mock.patch("builtins.input", side_effect=answers):
+            interactive_request_review("hana", self.staff)
+        assert ConfirmationRequest.query.get(first).status == RequestStatus.APPROVED
+        assert ConfirmationRequest.query.get(second).status == RequestStatus.PENDING
+        # input ends, so the save prompt gets nothing and the rejection is discarded
+        with unittest.mock.patch("builtins.input", side_effect=["1", "n", EOFError(), EOFError()]):
+            interactive_request_review("hana", self.staff)
+        assert ConfirmationRequest.query.get(second).status == RequestStatus.PENDING
+
+class SeedIntegrationTests(unittest.TestCase):
+
+    def test_seeded_totals_match_logs_and_accolades(self):
+        result = seed_database(students=20, requests=500, staff=3, seed=42, chunk_size=64)
+        assert result["approved"] + result["rejected"] + result["pending"] == 500
+        assert db.session.scalar(db.select(db.func.count(ServiceLog.id))) == result["approved"]
+        logged = dict(db.session.execute(db.select(ServiceLog.student_id, db.func.sum(ServiceLog.minutes)).group_by(ServiceLog.student_id)).all())
+        for student in Student.query.all():
+            assert student.total_minutes == logged.get(student.id, 0)
+            earned = {accolade.accolade_type for accolade in student.accolades}
+            assert earned == {str(t) for t in [10, 25, 50] if student.total_minutes >= t * 60}
+
+    # as on MySQL, which has no RETURNING
+    def test_seed_without_returning(self):
+        dialect = db.engine.dialect
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        dialect.insert_returning = False
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            seed_database(students=5, requests=50, staff=2, seed=3, chunk_size=4)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+            dialect.insert_returning = True
+        assert not [statement for statement in statements if "RETURNING" in statement]
+        assert {student.user.role for student in Student.query.all()} == {UserRoleEnum.STUDENT}
+        assert Student.query.count() == 5
+
+class ArchiveIntegrationTests(unittest.TestCase):
+
+    def test_archive_moves_old_records_and_keeps_summary(self):
+        seed_database(students=10, requests=300, staff=2, seed=7, days=200, chunk_size=50, prefix="arch")
+        cutoff = datetime.utcnow() - timedelta(days=100)
+        old_logs = db.session.scalar(db.select(db.func.count(ServiceLog.id)).where(ServiceLog.logged_at < cutoff))
+        pending = ConfirmationRequest.query.filter_by(status=RequestStatus.PENDING).count()
+
+        result = archive_records(cutoff, chunk_size=40)
+        assert result["logs"] == old_logs
+        assert db.session.scalar(db.select(db.func.count(ArchivedServiceLog.id))) == old_logs
+        assert ServiceLog.query.filter(ServiceLog.logged_at < cutoff).count() == 0
+        assert ConfirmationRequest.query.filter_by(status=RequestStatus.PENDING).count() == pending
+        assert ArchivedConfirmationRequest.query.filter_by(status=RequestStatus.PENDING).count() == 0
+        # the admin pages from the row count after the archive, not the largest id
+        assert estimated_row_count("service_logs") == ServiceLog.query.count()
+        assert estimated_row_count("confirmation_requests") == ConfirmationRequest.query.count() < 300
+
+        student = Student.query.join(StudentArchiveSummary, StudentArchiveSummary.student_id == Student.id).first()
+        result = get_student_service_logs({"username": student.user.username, "role": "student"})
+        shown = sum(log["hours"] for log in result["logs"])
+        assert result["archived"]["hours"] + shown == pytest.approx(student.total_hours)
+
+    def test_archived_ids_are_not_reused(self):
+        staff = create_user("oli", "olipass", role="staff")["user"]
+        create_user("pat", "patpass", role="student")
+        student = {"username": "pat", "role": "student"}
+        tomorrow = datetime.utcnow() + timedelta(days=1)
+        for hours in [1, 2, 3]:
+            approve_request(submit_hours(hours, "Beach cleanup", student)["request_id"], staff)
+        assert archive_records(tomorrow)["requests"] == 3
+
+        request_id = submit_hours(4, "Beach cleanup", student)["request_id"]
+        assert request_id > max(db.session.scalars(db.select(ArchivedConfirmationRequest.id)))
+        approve_request(request_id, staff)
+        result = archive_records(tomorrow)
+        assert result["requests"] == 1 and result["logs"] == 1
+        assert db.session.scalar(db.select(db.func.count(ArchivedConfirmationRequest.id))) == 4
+
+class IdempotencyIntegrationTests(unittest.TestCase):
+
+    def test_retried_submit_and_approve_replay_original_result(self):
+        create_user("kiosk_student", "pass", "student")
+        staff = create_user("kiosk_staff", "pass", "staff")["user"]
+        student = {"username": "kiosk_student", "role": "student"}
+
+        first = submit_hours(2.0, "Kiosk shift", student, idempotency_key="k-1")
+        retry = submit_hours(2.0, "Kiosk shift", student, idempotency_key="k-1")
+        assert retry == first
+        assert ConfirmationRequest.query.filter_by(description="Kiosk shift").count() == 1
+
+        approved = approve_request(first["request_id"], staff, idempotency_key="a-1")
+        assert approve_request(first["request_id"], staff, idempotency_key="a-1") == approved
+        assert approve_request(first["request_id"], staff)["success"] is False
+        assert get_user_by_username("kiosk_student").student.total_hours == 2.0
+
+        assert purge_idempotency_keys(ttl=0)["deleted"] == 2
+
+    def test_other_integrity_errors_are_raised_not_replayed(self):
+        create_user("kiosk_student", "pass", "student")
+        db.session.add(User("kiosk_student", "pass", UserRoleEnum.STUDENT))
+        with pytest.raises(IntegrityError):
+            commit_with_key("submit_hours:kiosk_student", "k-2", {"success": True})
+        assert User.query.filter_by(username="kiosk_student").count() == 1
+
+def test_profile_header_is_honoured_for_staff_only(app):
+    staff = create_user("pat", "patpass", role="staff")["user"]
+    student = create_user("quinn", "quinnpass", role="student")["user"]
+    default_profiler = app.extensions['profiler']
+    with tempfile.TemporaryDirectory() as directory:
+        app.extensions['profiler'] = profiler = Profiler(directory)
+        try:
+            client = app.test_client()
+            staff_response = client.get('/api/users', headers={
+                "Authorization": f"Bearer {create_access_token(identity=staff.id)}", "X-Profile": "1"
+            })
+            student_response = client.get('/api/users', headers={
+                "Authorization": f"Bearer {create_access_token(identity=student.id)}", "X-Profile": "1"
+            })
+        finally:
+            app.extensions['profiler'] = default_profiler
+        name = staff_response.headers["X-Profile-Id"]
+        assert "X-Profile-Id" not in student_response.headers
+        assert sorted(os.listdir(directory)) == [name + ".folded", name + ".prof"]
+        with open(os.path.join(directory, name + ".folded")) as folded:
+            assert all(line.rsplit(" ", 1)[1].strip().isdigit() for line in folded)
+
+# pinged on file databases, since the test databases' one connection is held by the test's transaction
+def test_readiness_reports_database_and_pools(app):
+    pings = []
+    hang = lambda *args: pings.append(time.sleep(0.5))
+    with tempfile.TemporaryDirectory() as directory:
+        engines = {key: db.create_engine(f"sqlite:///{os.path.join(directory, f'{key}.db')}") for key in ["main", "north"]}
+        event.listen(engines["north"], "before_cursor_execute", hang)
+        originals = db.engines[None], db.engines["institution:north"]
+        db.engines[None], db.engines["institution:north"] = engines["main"], engines["north"]
+        app.config['HEALTH_CHECK_TIMEOUT_SECONDS'] = 0.1
+        last_checks.clear()
+        try:
+            client = app.test_client()
+            assert client.get('/healthz').json["status"] == "ok"
+            first = client.get('/readyz')
+            north = [client.get('/readyz', headers={"X-Institution": "north"}) for _ in range(2)]
+            second = client.get('/readyz')
+            time.sleep(0.6)
+            recovered = client.get('/readyz', headers={"X-Institution": "north"})
+        finally:
+            db.engines[None], db.engines["institution:north"] = originals
+            app.config['HEALTH_CHECK_TIMEOUT_SECONDS'] = 2.0
+            last_checks.clear()
+            for engine in engines.values():
+                engine.dispose()
+    assert first.status_code == 200
+    assert first.json["database"]["status"] == "ok"
+    assert set(first.json["pools"]) == {"default", "replica", "institution:north", "institution:south"}
+    assert second.json["database"]["cached"] is True
+    # a hung institution fails its own probes fast, with one ping out at a time
+    assert [response.status_code for response in north] == [503, 503]
+    assert len(pings) == 1
+    assert recovered.json["database"]["status"] == "ok" and recovered.json["database"]["cached"] is True
+
+def test_async_api_serves_leaderboard_and_submissions(app):
+    with tempfile.TemporaryDirectory() as directory:
+        uri = f"sqlite:///{os.path.join(directory, 'async.db')}"
+        engine = db.create_engine(uri)
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            user_id = connection.execute(db.insert(User).values(username="rio", password="x", role=UserRoleEnum.STUDENT)).inserted_primary_key[0]
+            connection.execute(db.insert(Student).values(user_id=user_id, total_minutes=90))
+        engine.dispose()
+
+        config = {**app.config, 'SQLALCHEMY_DATABASE_URI': uri,
+                  'RATELIMIT_ENABLED': True, 'RATELIMIT_LIMITS': {'submit_hours': '6/minute'}}
+        api = AsyncAPI(config)
+        token = create_access_token(identity=user_id).encode()
+        authorization = (b"authorization", b"Bearer " + token)
+        submit = http_scope("POST", "/api/service/hours", headers=[authorization])
+        retried = http_scope("POST", "/api/service/hours", headers=[authorization, (b"idempotency-key", b"kiosk-7")])
+        responses = run_requests(api, [
+            (http_scope("GET", "/api/leaderboard", b"limit=5"), b""),
+            (submit, b'{"hours": 1.5, "description": "Async shift"}'),
+            (submit, b'{"hours": 30}'),
+            (submit, b'{"hours": "nan"}'),
+            (submit, b'{"hours": "inf"}'),
+            (http_scope("POST", "/api/service/hours"), b'{"hours": 1}'),
+            (http_scope("GET", "/api/users"), b""),
+        ], concurrency=2)
+
+        assert [status for status, _, _ in responses] == [200, 201, 400, 400, 400, 401, 404]
+        leaderboard = json.loads(responses[0][2])["leaderboard"]
+        assert leaderboard == [{"rank": 1, "username": "rio", "total_hours": 1.5, "accolades": "No accolades"}]
+        assert json.loads(responses[1][2])["message"].startswith("Submitted 1.5 hours")
+
+        # same ETag as the Flask route, so a client's cached copy is answered with a 304
+        with engine.connect() as connection:
+            version = connection.execute(DATA_VERSION, {"name": "leaderboard"}).first()
+        engine.dispose()
+        etag = quote_etag(version_etag("leaderboard", *version, 5)[0]).encode()
+        # a retried kiosk POST replays the first response, and only new requests are published
+        published = api.broker.last_id
+        responses = run_requests(api, [
+            (http_scope("GET", "/api/leaderboard", b"limit=5", headers=[(b"if-none-match", etag)]), b""),
+            (retried, b'{"hours": 2}'),
+            (retried, b'{"hours": 2}'),
+            (submit, b'{"hours": 1}'),
+        ], concurrency=1)
+        assert [status for status, _, _ in responses] == [304, 201, 201, 429]
+        assert responses[0][2] == b""
+        assert json.loads(responses[1][2]) == json.loads(responses[2][2])
+        assert api.broker.last_id == published + 1
+
+def test_milestone_progress_follows_approvals(app):
+    standings = app.extensions['standings']
+    # versions are rolled back between tests, so standings cached by another test could match them
+    standings.standings.clear()
+    staff = create_user("uma", "umapass", role="staff")["user"]
+    for username, hours in [("vic", 4), ("wen", 12), ("xan", 0.5)]:
+        create_user(username, "pass", role="student")
+        if hours:
+            approve_request(submit_hours(hours, "Soup Kitchen", {"username": username, "role": "student"})["request_id"], staff)
+    client = app.test_client()
+    vic = get_user_by_username("vic")
+    response = client.get('/api/service/milestones', headers={"Authorization": f"Bearer {create_access_token(identity=vic.id)}"})
+    assert response.json["progress"] == {"total_hours": 4.0, "next_milestone": 10, "hours_remaining": 6.0, "percentile": 33.3}
+
+    # this worker moves the changed totals instead of re-reading them
+    rebuilds = standings.rebuilds
+    approve_request(submit_hours(20, "Soup Kitchen", {"username": "vic", "role": "student"})["request_id"], staff)
+    progress = get_milestone_progress("vic")["progress"]
+    assert (progress["next_milestone"], progress["hours_remaining"], progress["percentile"]) == (25, 1.0, 66.7)
+    create_user("yul", "pass", role="student")
+    assert get_milestone_progress("vic")["progress"]["percentile"] == 75.0
+    assert standings.rebuilds == rebuilds
+
+def test_institutions_keep_their_own_users(app):
+    with use_institution("north"):
+        north_user = create_user("yara", "yarapass", role="student")["user"]
+        token = create_access_token(identity=north_user.id)
+    with use_institution("south"):
+        create_user("zane", "zanepass", role="student")
+        assert get_user_by_username("yara") is None
+    assert get_user_by_username("yara") is None and get_user_by_username("zane") is None
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get('/api/service/milestones', headers={**headers, "X-Institution": "north"}).json["success"]
+    # the same user id in another institution's database is someone else
+    assert client.get('/api/service/milestones', headers={**headers, "X-Institution": "south"}).status_code == 401
+    assert client.get('/api/service/milestones', headers=headers).status_code == 401
+    assert client.get('/api/leaderboard', headers={"X-Institution": "east"}).status_code == 404
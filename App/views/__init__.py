@@ -3,8 +3,9 @@
 from .user import user_views
 from .index import index_views
 from .auth import auth_views
+from .service import service_views
 from .admin import setup_admin
 
 
-views = [user_views, index_views, auth_views] 
+views = [user_views, index_views, auth_views, service_views] 
 # blueprints must be added to this list
\ No newline at end of file
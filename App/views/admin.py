@@ -1,21 +1,121 @@
 from flask_admin.contrib.sqla import ModelView
+from flask_admin.actions import action
 from flask_jwt_extended import jwt_required, current_user, unset_jwt_cookies, set_access_cookies
 from flask_admin import Admin
 from flask import flash, redirect, url_for, request
-from App.database import db
-from App.models import User
+from sqlalchemy.orm import joinedload
+from App.database import db, estimated_row_count
+from App.models import User, Student, ConfirmationRequest, ServiceLog, Accolade
+from App.controllers import bulk_approve_requests, bulk_reject_requests, bump_version
 
 class AdminView(ModelView):
+    # data versions bumped in the same transaction as each edit, so cached ETags go stale
+    versioned = ()
 
     @jwt_required()
     def is_accessible(self):
         return current_user is not None
 
+    def on_model_change(self, form, model, is_created):
+        bump_version(*self.versioned)
+
+    def on_model_delete(self, model):
+        bump_version(*self.versioned)
+
     def inaccessible_callback(self, name, **kwargs):
         # redirect to login page if user doesn't have access
         flash("Login to access admin")
         return redirect(url_for('index_page', next=request.url))
 
+class LargeTableView(AdminView):
+    """List view for tables that grow without bound.
+
+    Pages are numbered from an estimated row count instead of a COUNT(*), or
+    paged with next/previous links when the database has no estimate yet, and
+    the relationships shown in the list are loaded with the page's query
+    instead of one lazy load per row.
+    """
+    simple_list_pager = True
+    page_size = 50
+
+    def eager_load(self):
+        return ()
+
+    def get_query(self):
+        return super().get_query().options(*self.eager_load())
+
+    def get_list(self, page, sort_column, sort_desc, search, filters, execute=True, page_size=None):
+        count, data = super().get_list(page, sort_column, sort_desc, search, filters, execute=execute, page_size=page_size)
+        # an estimate only describes the whole table, so filtered lists fall back to next/previous paging
+        if not search and not filters:
+            count = estimated_row_count(self.model.__tablename__)
+        return count, data
+
+class UserView(AdminView):
+    versioned = ("users", "leaderboard")
+
+class StudentView(LargeTableView):
+    versioned = ("leaderboard",)
+    column_list = ('id', 'user.username', 'total_minutes')
+    column_labels = {'user.username': 'Username'}
+    column_sortable_list = ('id', 'total_minutes')
+    column_filters = ('total_minutes',)
+    def eager_load(self):
+        return (joinedload(Student.user),)
+
+class ConfirmationRequestView(LargeTableView):
+    can_create = False
+    column_list = ('id', 'student.user.username', 'minutes', 'description', 'status', 'requested_at', 'responded_at', 'reason')
+    column_labels = {'student.user.username': 'Student'}
+    column_sortable_list = ('id', 'minutes', 'status', 'requested_at', 'responded_at')
+    column_default_sort = ('requested_at', True)
+    column_filters = ('status', 'requested_at')
+    def eager_load(self):
+        return (joinedload(ConfirmationRequest.student).joinedload(Student.user),)
+
+    def get_staff_user(self):
+        if current_user.staff is None:
+            flash("Only staff can review requests", "error")
+            return None
+        return current_user
+
+    @action('approve', 'Approve', 'Approve the selected pending requests?')
+    def action_approve(self, ids):
+        staff_user = self.get_staff_user()
+        if staff_user:
+            result = bulk_approve_requests([int(id) for id in ids], staff_user)
+            flash(result["message"], "success" if result["success"] else "error")
+
+    @action('reject', 'Reject', 'Reject the selected pending requests?')
+    def action_reject(self, ids):
+        staff_user = self.get_staff_user()
+        if staff_user:
+            result = bulk_reject_requests([int(id) for id in ids], staff_user)
+            flash(result["message"], "success" if result["success"] else "error")
+
+class ServiceLogView(LargeTableView):
+    can_create = False
+    column_list = ('id', 'student.user.username', 'minutes', 'description', 'staff.username', 'logged_at')
+    column_labels = {'student.user.username': 'Student', 'staff.username': 'Approved By'}
+    column_sortable_list = ('id', 'minutes', 'logged_at')
+    column_default_sort = ('logged_at', True)
+    column_filters = ('logged_at',)
+    def eager_load(self):
+        return (joinedload(ServiceLog.student).joinedload(Student.user), joinedload(ServiceLog.staff))
+
+class AccoladeView(LargeTableView):
+    versioned = ("leaderboard",)
+    column_list = ('id', 'student.user.username', 'accolade_type', 'awarded_at')
+    column_labels = {'student.user.username': 'Student'}
+    column_sortable_list = ('id', 'accolade_type', 'awarded_at')
+    column_filters = ('accolade_type', 'awarded_at')
+    def eager_load(self):
+        return (joinedload(Accolade.student).joinedload(Student.user),)
+
 def setup_admin(app):
     admin = Admin(app, name='FlaskMVC', template_mode='bootstrap3')
-    admin.add_view(AdminView(User, db.session))
\ No newline at end of file
+    admin.add_view(UserView(User, db.session))
+    admin.add_view(StudentView(Student, db.session))
+    admin.add_view(ConfirmationRequestView(ConfirmationRequest, db.session))
+    admin.add_view(ServiceLogView(ServiceLog, db.session))
+    admin.add_view(AccoladeView(Accolade, db.session))
@@ -5,9 +5,10 @@ from flask_jwt_extended import jwt_required, current_user, unset_jwt_cookies, se
 from.index import index_views
 
 from App.controllers import (
-    login,
-
+    rate_limit
 )
+# App.controllers also exports the CLI's session-file login under this name
+from App.controllers.AuthController import login
 
 auth_views = Blueprint('auth_views', __name__, template_folder='../templates')
 
@@ -25,6 +26,7 @@ def identify_page():
     
 
 @auth_views.route('/login', methods=['POST'])
+@rate_limit('login')
 def login_action():
     data = request.form
     token = login(data['username'], data['password'])
@@ -48,6 +50,7 @@ API Routes
 '''
 
 @auth_views.route('/api/login', methods=['POST'])
+@rate_limit('login')
 def user_login_api():
   data = request.json
   token = login(data['username'], data['password'])
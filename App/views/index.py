@@ -1,5 +1,6 @@
 from flask import Blueprint, redirect, render_template, request, send_from_directory, jsonify
-from App.controllers import create_user, initialize
+from App.controllers import create_user, initialize, get_liveness, get_readiness
+from App.schemas import json_response
 
 index_views = Blueprint('index_views', __name__, template_folder='../templates')
 
@@ -12,6 +13,15 @@ def init():
     initialize()
     return jsonify(message='db initialized!')
 
+# Liveness: the worker is up and serving, without touching the database
 @index_views.route('/health', methods=['GET'])
+@index_views.route('/healthz', methods=['GET'])
 def health_check():
-    return jsonify({'status':'healthy'})
\ No newline at end of file
+    return json_response(get_liveness())
+
+# Readiness: the database answers; 503 takes the worker out of rotation
+@index_views.route('/readyz', methods=['GET'])
+@index_views.route('/healthcheck', methods=['GET'])
+def readiness_check():
+    result = get_readiness()
+    return json_response(result, 200 if result["status"] == "ok" else 503)
\ No newline at end of file
@@ -0,0 +1,106 @@
+from flask import Blueprint, Response, abort, jsonify, request
+from flask_jwt_extended import jwt_required, current_user
+
+from App.models import UserRoleEnum
+from App.schemas import json_response
+from App.controllers import (
+    submit_hours,
+    approve_request,
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    valid_idempotency_key,
+    get_student_requests,
+    get_student_service_logs,
+    search_service_records,
+    get_leaderboard,
+    get_milestone_progress,
+    conditional_json_response,
+    stream_events,
+    current_broker,
+    rate_limit,
+    current_user_key
+)
+
+service_views = Blueprint('service_views', __name__, template_folder='../templates')
+
+# Controllers take the same user dict the CLI keeps in its session file
+def session_user():
+    return {"username": current_user.username, "role": current_user.role.value}
+
+def idempotency_key():
+    key = request.headers.get('Idempotency-Key')
+    if not valid_idempotency_key(key):
+        abort(400, description=f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+    return key
+
+'''
+API Routes
+'''
+
+@service_views.route('/api/service/hours', methods=['POST'])
+@jwt_required()
+@rate_limit('submit_hours', key_func=current_user_key)
+def submit_hours_api():
+    data = request.get_json(silent=True)
+    try:
+        hours = float(data['hours'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify(message="Expected a JSON body with 'hours'"), 400
+    result = submit_hours(hours, data.get('description', ''), session_user(), idempotency_key())
+    return json_response(result, 201 if result["success"] else 400)
+
+@service_views.route('/api/service/requests/<int:request_id>/approve', methods=['POST'])
+@jwt_required()
+def approve_request_api(request_id):
+    if current_user.role != UserRoleEnum.STAFF:
+        return jsonify(message="Only staff can approve requests"), 403
+    result = approve_request(request_id, current_user, idempotency_key())
+    return json_response(result, 200 if result["success"] else 409)
+
+@service_views.route('/api/service/requests', methods=['GET'])
+@jwt_required()
+def my_requests_api():
+    result = get_student_requests(session_user())
+    return json_response(result, 200 if result["success"] else 403)
+
+@service_views.route('/api/service/logs', methods=['GET'])
+@jwt_required()
+def my_logs_api():
+    result = get_student_service_logs(session_user())
+    return json_response(result, 200 if result["success"] else 403)
+
+@service_views.route('/api/service/milestones', methods=['GET'])
+@jwt_required()
+def my_milestones_api():
+    if current_user.role != UserRoleEnum.STUDENT:
+        return jsonify(message="Only students have milestones"), 403
+    return json_response(get_milestone_progress(current_user.username))
+
+@service_views.route('/api/service/search', methods=['GET'])
+@jwt_required()
+def search_api():
+    if current_user.role != UserRoleEnum.STAFF:
+        return jsonify(message="Only staff can search service records"), 403
+    result = search_service_records(
+        request.args.get('q', ''),
+        max(1, request.args.get('page', 1, type=int)),
+        max(1, min(request.args.get('per_page', 10, type=int), 100))
+    )
+    return json_response(result, 200 if result["success"] else 400)
+
+@service_views.route('/api/leaderboard', methods=['GET'])
+def leaderboard_api():
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    return conditional_json_response("leaderboard", lambda: get_leaderboard(limit), limit)
+
+# Server-sent events: 'leaderboard' when hours are approved and 'pending' when the pending count changes
+@service_views.route('/api/events', methods=['GET'])
+@jwt_required()
+def events_stream():
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        last_id = current_broker().last_id
+    return Response(
+        stream_events(last_id),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
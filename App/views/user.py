@@ -7,6 +7,7 @@ from App.controllers import (
     create_user,
     get_all_users,
     get_all_users_json,
+    conditional_json_response,
     jwt_required
 )
 
@@ -26,8 +27,7 @@ def create_user_action():
 
 @user_views.route('/api/users', methods=['GET'])
 def get_users_action():
-    users = get_all_users_json()
-    return jsonify(users)
+    return conditional_json_response("users", get_all_users_json)
 
 @user_views.route('/api/users', methods=['POST'])
 def create_user_endpoint():
@@ -0,0 +1,7 @@
+# asgi.py
+# The async leaderboard and submit-hours routes, served with:
+#   uvicorn asgi:app
+from App.main import create_app
+from App.asgi import AsyncAPI
+
+app = AsyncAPI(create_app().config)
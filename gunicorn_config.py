@@ -1,19 +1,59 @@
 # gunicorn_config.py
 import multiprocessing
+import os
+import time
+
+# Preloaded gevent workers must be patched before the app is imported, or locks
+# created at import time (event broker, rate limiter) would block the whole worker.
+from gevent import monkey
+monkey.patch_all()
+
+started_at = time.monotonic()
 
 # The socket to bind.
 # "0.0.0.0" to bind to all interfaces. 8000 is the port number.
 bind = "0.0.0.0:8080"
 
 # The number of worker processes for handling requests.
-workers = 4
+# One gevent worker per core plus one, unless WEB_CONCURRENCY says otherwise.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() + 1))
 
 # Use the 'gevent' worker type for async performance.
 worker_class = 'gevent'
 
+# Open connections each gevent worker will hold, including idle
+# server-sent event streams from /api/events.
+worker_connections = 2000
+
+# Import the app once in the master so workers share its code and data
+# copy-on-write instead of each importing and building it.
+preload_app = True
+
+# Recycle workers to bound slow leaks; the jitter keeps them from all restarting at once.
+max_requests = 2000
+max_requests_jitter = 200
+
 # Log level
 loglevel = 'info'
 
 # Where to log to
 accesslog = '-'  # '-' means log to stdout
-errorlog = '-'  # '-' means log to stderr
\ No newline at end of file
+errorlog = '-'  # '-' means log to stderr
+
+def when_ready(server):
+    from App.controllers import get_rss_kib
+    server.log.info("App preloaded in %.2fs, master RSS %s KiB", time.monotonic() - started_at, get_rss_kib())
+
+def post_fork(server, worker):
+    # connections pooled before the fork belong to the master
+    from App.database import dispose_engines
+    worker.forked_at = time.monotonic()
+    dispose_engines()
+
+def post_worker_init(worker):
+    from App.controllers import warm_worker, get_rss_kib
+    warm_ms = warm_worker()
+    worker.log.info(
+        "Worker %s ready in %.2fs (caches warmed in %.1fms), RSS %s KiB",
+        worker.pid, time.monotonic() - worker.forked_at, warm_ms, get_rss_kib()
+    )
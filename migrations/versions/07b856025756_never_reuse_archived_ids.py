@@ -0,0 +1,60 @@
+"""never reuse archived ids
+
+Without AUTOINCREMENT SQLite hands out max(id) + 1, so once the newest
+requests and service logs are archived their ids come back and collide in
+the archive tables. Each table created without it is copied into one with
+it, and its id sequence starts above every id in the table and its archive.
+Other databases never reuse ids and are left alone.
+
+Revision ID: 07b856025756
+Revises: 744fe663fc0d
+Create Date: 2026-10-19 14:33:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '07b856025756'
+down_revision = '744fe663fc0d'
+branch_labels = None
+depends_on = None
+
+# (hot table, archive table its rows move to)
+AUTOINCREMENT_TABLES = [
+    ("confirmation_requests", "archived_confirmation_requests"),
+    ("service_logs", "archived_service_logs"),
+]
+
+
+def uses_autoincrement(bind, table):
+    sql = bind.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).scalar()
+    return "AUTOINCREMENT" in sql.upper()
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    for table, archive_table in AUTOINCREMENT_TABLES:
+        if uses_autoincrement(bind, table):
+            continue
+        # SQLite can't add AUTOINCREMENT to a table, so copy the rows into a new one
+        with op.batch_alter_table(table, recreate="always", table_kwargs={"sqlite_autoincrement": True}):
+            pass
+        highest = max(
+            bind.scalar(sa.text(f"SELECT coalesce(max(id), 0) FROM {name}")) for name in (table, archive_table)
+        )
+        bind.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table})
+        bind.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"), {"name": table, "seq": highest})
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    for table, archive_table in AUTOINCREMENT_TABLES:
+        if uses_autoincrement(bind, table):
+            with op.batch_alter_table(table, recreate="always", table_kwargs={"sqlite_autoincrement": False}):
+                pass
@@ -0,0 +1,57 @@
+"""store hours as minutes
+
+Each float hours column is replaced by an integer minutes column holding the
+value rounded to the nearest minute, which also removes any drift that built
+up in the stored totals. Tables that were already converted, or don't exist
+yet, are skipped. Dropping a column needs SQLite 3.35 or later.
+
+Revision ID: 3d5401884886
+Revises: 9fbf9102c2d2
+Create Date: 2026-10-19 14:31:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d5401884886'
+down_revision = '9fbf9102c2d2'
+branch_labels = None
+depends_on = None
+
+MINUTES_PER_HOUR = 60
+
+# (table, float hours column, integer minutes column replacing it)
+HOURS_COLUMNS = [
+    ("students", "total_hours", "total_minutes"),
+    ("confirmation_requests", "hours", "minutes"),
+    ("service_logs", "hours", "minutes"),
+    ("archived_confirmation_requests", "hours", "minutes"),
+    ("archived_service_logs", "hours", "minutes"),
+    ("student_archive_summaries", "archived_hours", "archived_minutes"),
+]
+
+
+def convert(from_column, to_column, to_type, value):
+    inspector = sa.inspect(op.get_bind())
+    for names in HOURS_COLUMNS:
+        table = names[0]
+        if not inspector.has_table(table):
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        source, target = names[from_column], names[to_column]
+        if source not in columns or target in columns:
+            continue
+        op.add_column(table, sa.Column(target, to_type, nullable=False, server_default="0"))
+        rows = sa.table(table, sa.column(source), sa.column(target))
+        op.execute(rows.update().values({target: value(sa.func.coalesce(rows.c[source], 0))}))
+        op.drop_column(table, source)
+
+
+def upgrade():
+    convert(1, 2, sa.Integer(), lambda hours: sa.cast(sa.func.round(hours * MINUTES_PER_HOUR), sa.Integer))
+
+
+def downgrade():
+    convert(2, 1, sa.Float(), lambda minutes: minutes / float(MINUTES_PER_HOUR))
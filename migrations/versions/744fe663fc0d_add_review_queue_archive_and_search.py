@@ -0,0 +1,180 @@
+"""add review queue, archive and search
+
+The tables added since the first release (data versions, idempotency keys
+and the archive tables), the review queue's claim columns, the indexes on
+the status and date columns, and the description search index: the FTS5
+table on SQLite, filled from the existing rows, and GIN indexes on Postgres.
+Only what is missing is created, so a database made with `flask init` since
+these were added is left as it is.
+
+Revision ID: 744fe663fc0d
+Revises: 3d5401884886
+Create Date: 2026-10-19 14:32:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '744fe663fc0d'
+down_revision = '3d5401884886'
+branch_labels = None
+depends_on = None
+
+VERSIONED_DATA = ("users", "leaderboard")
+
+SEARCH_TABLE = "service_search"
+SEARCH_CONFIG = "english"
+# (kind, table) of the descriptions that are searched
+SEARCH_SOURCES = [("log", "service_logs"), ("request", "confirmation_requests")]
+
+# (index, table, column) added to the tables that existed before
+INDEXES = [
+    ("ix_confirmation_requests_status", "confirmation_requests", "status"),
+    ("ix_confirmation_requests_requested_at", "confirmation_requests", "requested_at"),
+    ("ix_service_logs_logged_at", "service_logs", "logged_at"),
+    ("ix_accolades_awarded_at", "accolades", "awarded_at"),
+]
+
+# confirmation_requests already created the type on Postgres
+request_status = sa.Enum("PENDING", "APPROVED", "REJECTED", name="requeststatus").with_variant(
+    postgresql.ENUM("PENDING", "APPROVED", "REJECTED", name="requeststatus", create_type=False), "postgresql"
+)
+
+
+def create_tables(existing):
+    if "data_versions" not in existing:
+        data_versions = op.create_table(
+            "data_versions",
+            sa.Column("name", sa.String(length=30), nullable=False),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        )
+        now = datetime.utcnow()
+        op.bulk_insert(data_versions, [{"name": name, "version": 0, "updated_at": now} for name in VERSIONED_DATA])
+    if "idempotency_keys" not in existing:
+        op.create_table(
+            "idempotency_keys",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("scope", sa.String(length=100), nullable=False),
+            sa.Column("key", sa.String(length=100), nullable=False),
+            sa.Column("response", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+        )
+        op.create_index("ix_idempotency_keys_created_at", "idempotency_keys", ["created_at"])
+    if "archived_confirmation_requests" not in existing:
+        op.create_table(
+            "archived_confirmation_requests",
+            sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column("student_id", sa.Integer(), nullable=False),
+            sa.Column("staff_id", sa.Integer(), nullable=True),
+            sa.Column("minutes", sa.Integer(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("status", request_status, nullable=False),
+            sa.Column("requested_at", sa.DateTime(), nullable=True),
+            sa.Column("responded_at", sa.DateTime(), nullable=True),
+            sa.Column("reason", sa.String(length=50), nullable=True),
+            sa.Column("archived_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["staff_id"], ["staff.id"]),
+            sa.ForeignKeyConstraint(["student_id"], ["students.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_archived_confirmation_requests_student_id", "archived_confirmation_requests", ["student_id"])
+    if "archived_service_logs" not in existing:
+        op.create_table(
+            "archived_service_logs",
+            sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column("student_id", sa.Integer(), nullable=False),
+            sa.Column("staff_id", sa.Integer(), nullable=False),
+            sa.Column("minutes", sa.Integer(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("logged_at", sa.DateTime(), nullable=True),
+            sa.Column("archived_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["staff_id"], ["users.id"]),
+            sa.ForeignKeyConstraint(["student_id"], ["students.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_archived_service_logs_student_id", "archived_service_logs", ["student_id"])
+    if "student_archive_summaries" not in existing:
+        op.create_table(
+            "student_archive_summaries",
+            sa.Column("student_id", sa.Integer(), nullable=False),
+            sa.Column("archived_requests", sa.Integer(), nullable=False),
+            sa.Column("archived_logs", sa.Integer(), nullable=False),
+            sa.Column("archived_minutes", sa.Integer(), nullable=False),
+            sa.Column("archived_through", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["student_id"], ["students.id"]),
+            sa.PrimaryKeyConstraint("student_id"),
+        )
+
+
+def add_claim_columns(inspector, dialect):
+    columns = {column["name"] for column in inspector.get_columns("confirmation_requests")}
+    if "claimed_by" not in columns:
+        if dialect == "sqlite":
+            # SQLite can't add a constraint to a table, but a new column may reference another
+            op.execute("ALTER TABLE confirmation_requests ADD COLUMN claimed_by INTEGER REFERENCES staff (id)")
+        else:
+            op.add_column("confirmation_requests", sa.Column("claimed_by", sa.Integer(), nullable=True))
+            op.create_foreign_key(None, "confirmation_requests", "staff", ["claimed_by"], ["id"])
+    if "claim_expires_at" not in columns:
+        op.add_column("confirmation_requests", sa.Column("claim_expires_at", sa.DateTime(), nullable=True))
+
+
+def add_search(inspector, dialect):
+    if dialect == "postgresql":
+        for kind, table in SEARCH_SOURCES:
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_description_search ON {table} "
+                f"USING gin (to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')))"
+            )
+    elif dialect == "sqlite" and not inspector.has_table(SEARCH_TABLE):
+        op.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} "
+            "USING fts5(description, kind UNINDEXED, source_id UNINDEXED, student_id UNINDEXED)"
+        )
+        for kind, table in SEARCH_SOURCES:
+            op.execute(
+                f"INSERT INTO {SEARCH_TABLE} (description, kind, source_id, student_id) "
+                f"SELECT coalesce(description, ''), '{kind}', id, student_id FROM {table}"
+            )
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    create_tables(set(inspector.get_table_names()))
+    add_claim_columns(inspector, bind.dialect.name)
+    for name, table, column in INDEXES:
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, [column])
+    add_search(inspector, bind.dialect.name)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if bind.dialect.name == "postgresql":
+        for kind, table in SEARCH_SOURCES:
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_description_search")
+    elif bind.dialect.name == "sqlite":
+        op.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+    for name, table, column in INDEXES:
+        op.drop_index(name, table_name=table)
+    # SQLite can only drop a column used by a foreign key by copying the table
+    with op.batch_alter_table("confirmation_requests") as batch:
+        for foreign_key in inspector.get_foreign_keys("confirmation_requests"):
+            if foreign_key["constrained_columns"] == ["claimed_by"] and foreign_key["name"]:
+                batch.drop_constraint(foreign_key["name"], type_="foreignkey")
+        batch.drop_column("claim_expires_at")
+        batch.drop_column("claimed_by")
+    for table in ["student_archive_summaries", "archived_service_logs", "archived_confirmation_requests",
+                  "idempotency_keys", "data_versions"]:
+        op.drop_table(table)
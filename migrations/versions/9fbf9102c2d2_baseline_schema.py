@@ -0,0 +1,102 @@
+"""baseline schema
+
+The tables as first released, with hours stored as floats. A database created
+with `flask init` before migrations already has them, so each one is only
+created when it is missing and `flask db upgrade` can take over from there.
+
+Revision ID: 9fbf9102c2d2
+Revises:
+Create Date: 2026-10-19 14:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9fbf9102c2d2'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TABLES = ["users", "students", "staff", "service_logs", "confirmation_requests", "accolades"]
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(length=20), nullable=False),
+            sa.Column("password", sa.String(length=256), nullable=False),
+            sa.Column("role", sa.Enum("STUDENT", "STAFF", name="userroleenum"), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("username"),
+        )
+    if "students" not in existing:
+        op.create_table(
+            "students",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("total_hours", sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("user_id"),
+        )
+    if "staff" not in existing:
+        op.create_table(
+            "staff",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("user_id"),
+        )
+    if "service_logs" not in existing:
+        op.create_table(
+            "service_logs",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("student_id", sa.Integer(), nullable=False),
+            sa.Column("staff_id", sa.Integer(), nullable=False),
+            sa.Column("hours", sa.Float(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("logged_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["staff_id"], ["users.id"]),
+            sa.ForeignKeyConstraint(["student_id"], ["students.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    if "confirmation_requests" not in existing:
+        op.create_table(
+            "confirmation_requests",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("student_id", sa.Integer(), nullable=False),
+            sa.Column("staff_id", sa.Integer(), nullable=True),
+            sa.Column("hours", sa.Float(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("status", sa.Enum("PENDING", "APPROVED", "REJECTED", name="requeststatus"), nullable=True),
+            sa.Column("requested_at", sa.DateTime(), nullable=True),
+            sa.Column("responded_at", sa.DateTime(), nullable=True),
+            sa.Column("reason", sa.String(length=50), nullable=True),
+            sa.ForeignKeyConstraint(["staff_id"], ["staff.id"]),
+            sa.ForeignKeyConstraint(["student_id"], ["students.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    if "accolades" not in existing:
+        op.create_table(
+            "accolades",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("student_id", sa.Integer(), nullable=False),
+            sa.Column("accolade_type", sa.String(length=10), nullable=False),
+            sa.Column("awarded_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["student_id"], ["students.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_table(table)
+    sa.Enum(name="requeststatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="userroleenum").drop(op.get_bind(), checkfirst=True)
@@ -1,22 +1,35 @@
-import click, pytest, sys
+import click, pytest, sys, time
 from flask.cli import with_appcontext, AppGroup
 from tabulate import tabulate
 from App.database import db, get_migrate
 from App.main import create_app
 from App.models import User
+from App.schemas import dumps
 from App.controllers import (
     # Service functions
     submit_hours, get_student_requests, get_pending_requests_for_student, 
     approve_request, reject_request, get_student_service_logs, get_pending_students,
-    interactive_request_review,
+    interactive_request_review, review_claimed_requests,
+    # Search functions
+    search_service_records, rebuild_search_index,
     # Accolade functions
-    check_and_award_accolades, get_student_accolades, get_leaderboard,
+    check_and_award_accolades, get_student_accolades, get_leaderboard, get_milestone_progress,
     # Session functions
     login, logout, get_current_user_info, require_login,
     # User functions
     create_user, list_users_formatted,
     # Initialize functions
-    initialize
+    initialize, reset_database, seed_database,
+    # Archive functions
+    archive_records,
+    # Idempotency functions
+    purge_idempotency_keys,
+    # Profiling functions
+    profile_cli_commands,
+    # Batch functions
+    run_batch,
+    # Snapshot functions
+    snapshot_path, save_snapshot, restore_snapshot
 )
 
 # This commands file allow you to create convenient CLI commands for testing controllers
@@ -26,8 +39,81 @@ migrate = get_migrate(app)
 
 # This command creates and initializes the database
 @app.cli.command("init", help="Creates and initializes the database")
-def init():
-    initialize()
+@click.option("--rebuild", is_flag=True, help="Recreate the sample data and its snapshot instead of restoring it")
+def init(rebuild):
+    start = time.perf_counter()
+    initialize(rebuild)
+    print(f"Finished in {time.perf_counter() - start:.2f}s")
+
+# This command bulk loads a large synthetic dataset for performance testing
+@app.cli.command("seed", help="Bulk loads synthetic students, requests, logs and accolades")
+@click.option("--students", default=1000, help="Number of students to create")
+@click.option("--requests", default=10000, help="Number of hour requests to create")
+@click.option("--staff", default=20, help="Number of staff members to create")
+@click.option("--seed", default=None, type=int, help="Random seed for repeatable data")
+@click.option("--chunk-size", default=10000, help="Rows per INSERT batch")
+@click.option("--reset", is_flag=True, help="Drop and recreate all tables in the current institution's database first")
+def seed_command(students, requests, staff, seed, chunk_size, reset):
+    if reset:
+        reset_database()
+    start = time.perf_counter()
+    result = seed_database(students, requests, staff, seed, chunk_size=chunk_size)
+    print(result["message"])
+    print(f"{result['approved']} approved, {result['rejected']} rejected, {result['pending']} pending, {result['accolades']} accolades")
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+
+# This command moves old processed requests and service logs into the archive tables
+@app.cli.command("archive", help="Moves processed requests and service logs older than a date into cold storage")
+@click.option("--before", required=True, type=click.DateTime(formats=["%Y-%m-%d"]), help="Archive records from before this date (YYYY-MM-DD)")
+@click.option("--chunk-size", default=5000, help="Rows moved per transaction")
+def archive_command(before, chunk_size):
+    start = time.perf_counter()
+    result = archive_records(before, chunk_size)
+    print(result["message"])
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+
+# This command runs a file of CLI commands in this process, sharing the app, session file and database connection
+@app.cli.command("run-batch", help="Runs a file of CLI commands or JSON lines in one process")
+@click.argument("file", type=click.File("r"))
+@click.option("--commit-every", default=100, help="Commands per database transaction")
+@click.option("--stop-on-error", is_flag=True, help="Stop at the first failing command")
+@click.option("--show-output", is_flag=True, help="Print each command's output")
+@click.option("--json", "as_json", is_flag=True, help="Print the result as JSON")
+def run_batch_command(file, commit_every, stop_on_error, show_output, as_json):
+    result = run_batch(app.cli, file, commit_every, stop_on_error)
+    if as_json:
+        print(dumps(result).decode())
+        return
+    for command in result["results"]:
+        status = "ok" if command["success"] else f"FAILED: {command['error']}"
+        print(f"[line {command['line']}] {command['command']} - {status} ({command['ms']} ms)")
+        if show_output or not command["success"]:
+            print(command["output"], end="")
+    print(result["message"])
+
+'''
+Snapshot Commands
+'''
+snapshot_cli = AppGroup('snapshot', help='Save and restore the whole database')
+
+# This command copies the current database to a file, e.g. after `flask seed`
+@snapshot_cli.command("save", help="Save the database to a snapshot file")
+@click.argument("path", required=False)
+def snapshot_save_command(path):
+    result = save_snapshot(path or snapshot_path("latest"))
+    print(result["message"])
+
+# This command replaces the current database with a saved snapshot
+@snapshot_cli.command("restore", help="Replace the database with a snapshot file")
+@click.argument("path", required=False)
+def snapshot_restore_command(path):
+    start = time.perf_counter()
+    result = restore_snapshot(path or snapshot_path("latest"))
+    print(result["message"])
+    if result["success"]:
+        print(f"Finished in {time.perf_counter() - start:.2f}s")
+
+app.cli.add_command(snapshot_cli)
 
 '''
 Authentication Commands
@@ -69,8 +155,12 @@ def create_user_command(username, password, role):
     print(result["message"])
 
 @user_cli.command("list", help="Lists users in the database")
-def list_user_command():
+@click.option("--json", "as_json", is_flag=True, help="Print the result as JSON")
+def list_user_command(as_json):
     result = list_users_formatted()
+    if as_json:
+        print(dumps(result).decode())
+        return
     print("\n" + "="*80)
     print(result["message"])
     print("="*80)
@@ -96,24 +186,29 @@ service_cli = AppGroup('service', help='Service logging and confirmation command
 @service_cli.command("submit-hours", help="Submit hours for approval (students only)")
 @click.argument("hours", type=float)
 @click.option("--description", default="", help="Description of the service performed")
-def submit_hours_command(hours, description):
+@click.option("--idempotency-key", default=None, help="Retrying with the same key returns the original result instead of submitting again")
+def submit_hours_command(hours, description, idempotency_key):
     login_result = require_login()
     if not login_result["success"]:
         print(login_result["message"])
         return
 
-    result = submit_hours(hours, description, login_result["user"])
+    result = submit_hours(hours, description, login_result["user"], idempotency_key)
     print(result["message"])
 
 # This command allows a student to view their submitted hour requests
 @service_cli.command("my-requests", help="View your submitted hour requests (students only)")
-def my_requests_command():
+@click.option("--json", "as_json", is_flag=True, help="Print the result as JSON")
+def my_requests_command(as_json):
     login_result = require_login()
     if not login_result["success"]:
         print(login_result["message"])
         return
     
     result = get_student_requests(login_result["user"])
+    if as_json:
+        print(dumps(result).decode())
+        return
     print(result["message"])
     
     if result["requests"]:
@@ -143,11 +238,32 @@ def review_requests_command(student_username):
     
     interactive_request_review(student_username, staff_user)
 
+# This command lets several staff members work through the pending backlog at once without reviewing the same request
+@service_cli.command("review-queue", help="Claim and review the next pending requests from any student (staff only)")
+@click.option("--batch", default=5, help="Number of requests to claim at a time")
+def review_queue_command(batch):
+    login_result = require_login()
+    if not login_result["success"]:
+        print(login_result["message"])
+        return
+    
+    if login_result["user"]["role"] != "staff":
+        print("Only staff can review requests")
+        return
+    
+    staff_user = User.query.filter_by(username=login_result["user"]["username"]).first()
+    
+    review_claimed_requests(staff_user, batch)
+
 # This command shows the leaderboard of students with the most service hours
 @service_cli.command("leaderboard", help="View student leaderboard")
 @click.option("--limit", default=10, help="Number of students to show")
-def leaderboard_command(limit):
+@click.option("--json", "as_json", is_flag=True, help="Print the result as JSON")
+def leaderboard_command(limit, as_json):
     result = get_leaderboard(limit)
+    if as_json:
+        print(dumps(result).decode())
+        return
     if not result["success"]:
         print(result["message"])
         return
@@ -190,15 +306,23 @@ def view_accolades_command():
     else:
         print("No accolades yet")
 
+    progress = get_milestone_progress(login_result["user"]["username"])
+    if progress["success"]:
+        print(f"\n{progress['message']}")
+
 # This command allows a student to view their confirmed service logs
 @service_cli.command("my-logs", help="View your confirmed service logs (students only)")
-def my_logs_command():
+@click.option("--json", "as_json", is_flag=True, help="Print the result as JSON")
+def my_logs_command(as_json):
     login_result = require_login()
     if not login_result["success"]:
         print(login_result["message"])
         return
     
     result = get_student_service_logs(login_result["user"])
+    if as_json:
+        print(dumps(result).decode())
+        return
     print(result["message"])
     
     if result["logs"]:
@@ -208,12 +332,16 @@ def my_logs_command():
             print(f"    Logged: {log['logged_at']}")
     else:
         print("No confirmed service logs found. Submit hours for approval first!")
+    if result["archived"]:
+        archived = result["archived"]
+        print(f"Plus {archived['logs']} archived logs ({archived['hours']}h) from before {archived['archived_through']}")
     
     print(f"\nTotal Confirmed Hours: {result['total_hours']}")
 
 # This command allows a staff member to view all students with pending hour requests
 @service_cli.command("pending-students", help="List students with pending hour requests (staff only)")
-def pending_students_command():
+@click.option("--json", "as_json", is_flag=True, help="Print the result as JSON")
+def pending_students_command(as_json):
     login_result = require_login()
     if not login_result["success"]:
         print(login_result["message"])
@@ -224,6 +352,9 @@ def pending_students_command():
         return
     
     result = get_pending_students()
+    if as_json:
+        print(dumps(result).decode())
+        return
     print(f"\n{result['message']}")
     
     if result["students"]:
@@ -239,8 +370,123 @@ def pending_students_command():
     
     print("Use 'flask service review-hours <username>' to review a specific student's requests.")
 
+# This command lets staff search service logs and hour requests by description
+@service_cli.command("search", help="Search service logs and requests by description (staff only)")
+@click.argument("query")
+@click.option("--page", default=1, help="Page of results to show")
+@click.option("--per-page", default=10, help="Number of results per page")
+@click.option("--json", "as_json", is_flag=True, help="Print the result as JSON")
+def search_command(query, page, per_page, as_json):
+    login_result = require_login()
+    if not login_result["success"]:
+        print(login_result["message"])
+        return
+    
+    if login_result["user"]["role"] != "staff":
+        print("Only staff can search service records")
+        return
+    
+    result = search_service_records(query, page, per_page)
+    if as_json:
+        print(dumps(result).decode())
+        return
+    print(f"\n{result['message']}")
+    
+    if result["results"]:
+        table_data = []
+        for match in result["results"]:
+            table_data.append([match["type"].title(), match["id"], match["student"], f"{match['hours']}h", match["status"], match["description"], match["date"]])
+        
+        headers = ["Type", "ID", "Student", "Hours", "Status", "Description", "Date"]
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        if result["has_next"]:
+            print(f"More results: flask service search \"{query}\" --page {page + 1}")
+
+# This command rebuilds the SQLite search index, e.g. after rows were bulk loaded
+@service_cli.command("reindex-search", help="Rebuild the description search index")
+def reindex_search_command():
+    result = rebuild_search_index()
+    print(result["message"])
+
+# This command removes stored idempotency keys once retries can no longer arrive
+@service_cli.command("purge-keys", help="Delete idempotency keys older than IDEMPOTENCY_KEY_TTL")
+@click.option("--ttl", default=None, type=int, help="Age in seconds (defaults to IDEMPOTENCY_KEY_TTL)")
+def purge_keys_command(ttl):
+    result = purge_idempotency_keys(ttl)
+    print(result["message"])
+
 app.cli.add_command(service_cli)
 
+'''
+Benchmark Commands
+'''
+bench_cli = AppGroup('bench', help='Performance benchmarks')
+
+# This command compares submit/approve throughput with and without the tuned SQLite pragmas
+@bench_cli.command("sqlite", help="Benchmark concurrent submit/approve throughput on SQLite")
+@click.option("--workers", default=4, help="Number of worker processes")
+@click.option("--operations", default=100, help="Submit/approve pairs per worker")
+def bench_sqlite_command(workers, operations):
+    from App.benchmarks import bench_submit_approve
+    profiles = [("SQLite defaults", {}), ("Tuned profile", app.config['SQLITE_PRAGMAS'])]
+    table_data = []
+    for name, pragmas in profiles:
+        result = bench_submit_approve(pragmas, workers, operations)
+        table_data.append([name, result["workers"], result["completed"], result["errors"], result["seconds"], result["ops_per_second"]])
+
+    headers = ["Profile", "Workers", "Completed", "Errors", "Seconds", "Ops/sec"]
+    print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+# This command measures how long it takes to turn request rows into a JSON payload
+@bench_cli.command("serialize", help="Benchmark JSON serialization of request rows")
+@click.option("--rows", default=10000, help="Number of rows in the payload")
+def bench_serialize_command(rows):
+    from App.benchmarks import bench_serialization
+    table_data = [[r["name"], r["rows"], r["ms"], r["peak_kib"]] for r in bench_serialization(rows)]
+    headers = ["Serializer", "Rows", "Best ms", "Peak KiB"]
+    print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+# This command compares per-student SUM over float hours and integer minutes
+@bench_cli.command("aggregate", help="Benchmark summing service log hours stored as REAL vs INTEGER minutes")
+@click.option("--rows", default=1000000, help="Number of service logs")
+@click.option("--students", default=1000, help="Number of students the logs are spread over")
+def bench_aggregate_command(rows, students):
+    from App.benchmarks import bench_aggregation
+    table_data = [[r["name"], r["rows"], r["ms"], r["pages"], f"{r['max_error']:.2e}"] for r in bench_aggregation(rows, students)]
+    headers = ["Storage", "Rows", "Best ms", "Pages", "Max error (h)"]
+    print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+# This command measures the per-call cost of the hot lookups with and without prebuilt statements
+@bench_cli.command("queries", help="Benchmark per-call overhead of the hot controller queries")
+@click.option("--calls", default=5000, help="Calls per query style")
+def bench_queries_command(calls):
+    from App.benchmarks import bench_queries
+    table_data = [[r["name"], r["calls"], r["us_per_call"]] for r in bench_queries(calls)]
+    headers = ["Query", "Calls", "us per call"]
+    print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+# This command compares the Flask routes with the async ASGI app on a mix of leaderboard reads and submissions
+@bench_cli.command("async", help="Benchmark the Flask API against the async ASGI app under concurrent load")
+@click.option("--concurrency", default=50, help="Requests in flight at once")
+@click.option("--requests", default=2000, help="Requests per server")
+def bench_async_command(concurrency, requests):
+    from App.benchmarks import bench_async
+    table_data = [[r["name"], r["concurrency"], r["requests"], r["errors"], r["rps"], r["p50_ms"], r["p99_ms"]]
+                  for r in bench_async(concurrency, requests)]
+    headers = ["Server", "Concurrency", "Requests", "Errors", "Req/sec", "p50 ms", "p99 ms"]
+    print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+# This command compares the read-only listings built from full ORM objects and from selected columns
+@bench_cli.command("rows", help="Benchmark read-only listings as ORM objects vs column rows")
+@click.option("--rows", default=100000, help="Rows in each listing")
+def bench_rows_command(rows):
+    from App.benchmarks import bench_rows
+    table_data = [[r["name"], r["style"], r["rows"], r["ms"], r["peak_mib"]] for r in bench_rows(rows)]
+    headers = ["Listing", "Loaded as", "Rows", "Best ms", "Peak MiB"]
+    print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+app.cli.add_command(bench_cli)
+
 '''
 Test Commands
 '''
@@ -257,4 +503,7 @@ def user_tests_command(type):
     else:
         sys.exit(pytest.main(["-k", "App"]))
 
-app.cli.add_command(test)
\ No newline at end of file
+app.cli.add_command(test)
+# With PROFILE_CLI set, every command above writes a profile to PROFILE_DIR
+if app.config['PROFILE_CLI']:
+    profile_cli_commands(app)